@@ -0,0 +1,22 @@
+"""
+Command construction: input validation in `CDPMethod.__init__` and building `command`.
+"""
+from cdpkit.protocol import Fetch, Network, Page, Runtime
+
+
+def time_no_params():
+    Network.Enable().command
+
+
+def time_navigate():
+    Page.Navigate(url='https://example.com/', referrer='https://example.org/').command
+
+
+def time_evaluate():
+    Runtime.Evaluate(expression='document.title', return_by_value=True, await_promise=True).command
+
+
+def time_fetch_enable_patterns():
+    Fetch.Enable(patterns=[
+        {'urlPattern': f'*://*.tracker{index}.example/*', 'requestStage': 'Request'} for index in range(20)
+    ]).command
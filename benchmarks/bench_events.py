@@ -0,0 +1,44 @@
+"""
+Event dispatch through `EventsManager` with 1/10/100 callbacks, validated and raw.
+"""
+from cdpkit.connection.manager import EventsManager
+from cdpkit.protocol import Network
+from cdpkit.testing import workloads
+
+EVENT_MESSAGE = {'method': 'Network.requestWillBeSent', 'params': workloads.request_will_be_sent(0)}
+
+
+_events_managers: dict[tuple[int, str], EventsManager] = {}
+
+
+async def _events_manager(callbacks: int, mode: str) -> EventsManager:
+    if (callbacks, mode) in _events_managers:
+        return _events_managers[(callbacks, mode)]
+
+    events_manager = EventsManager()
+
+    def _validated(event_data: Network.RequestWillBeSent):
+        pass
+
+    def _raw(event_data: dict):
+        pass
+
+    def _no_data():
+        pass
+
+    callback = {'validated': _validated, 'raw': _raw, 'no_data': _no_data}[mode]
+    for _ in range(callbacks):
+        await events_manager.register_callback(Network.RequestWillBeSent, callback, raw=mode == 'raw')
+    _events_managers[(callbacks, mode)] = events_manager
+    return events_manager
+
+
+async def time_dispatch(callbacks, mode):
+    await (await _events_manager(callbacks, mode)).process_event(EVENT_MESSAGE)
+
+
+time_dispatch.params = [(callbacks, mode) for mode in ('validated', 'raw', 'no_data') for callbacks in (1, 10, 100)]
+
+
+async def time_dispatch_unhandled():
+    await (await _events_manager(1, 'raw')).process_event({'method': 'Page.frameNavigated', 'params': {}})
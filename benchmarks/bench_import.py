@@ -0,0 +1,40 @@
+"""
+Import time of the generated protocol package, measured in a fresh interpreter.
+"""
+import subprocess
+import sys
+
+_SCRIPT = '''
+import time
+start = time.perf_counter()
+{imports}
+print(time.perf_counter() - start)
+'''
+
+
+def _import_time(imports: str) -> float:
+    output = subprocess.run(
+        [sys.executable, '-c', _SCRIPT.format(imports=imports)], capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def track_import_protocol():
+    return _import_time('import cdpkit.protocol')
+
+
+track_import_protocol.unit = 's'
+
+
+def track_import_protocol_domains():
+    return _import_time('from cdpkit.protocol import DOM, Network, Page, Runtime, Target')
+
+
+track_import_protocol_domains.unit = 's'
+
+
+def track_import_connection():
+    return _import_time('import cdpkit.connection')
+
+
+track_import_connection.unit = 's'
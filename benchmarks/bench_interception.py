@@ -0,0 +1,31 @@
+"""
+Rule matching of the interception engine with large block lists.
+"""
+from functools import cache
+
+from cdpkit.helpers import InterceptRule, RuleMatcher
+
+URLS = [
+    'https://www.example.com/static/js/app.3f9a1c.js',
+    'https://cdn.example.net/images/hero-banner.png?width=1200',
+    'https://tracker12345.ads.example/pixel.gif?uid=42',
+    'https://api.example.com/v1/items/123/comments?page=2&sort=desc',
+]
+
+
+@cache
+def _matcher(rules: int) -> RuleMatcher:
+    return RuleMatcher(
+        InterceptRule(url=f'*://*.tracker{index}.ads.example/*') if index % 2 else
+        InterceptRule(url=f'https://ads{index}.example.org/*', resource_types=['Script', 'Image'])
+        for index in range(rules)
+    )
+
+
+def time_match(rules):
+    matcher = _matcher(rules)
+    for url in URLS:
+        matcher.match_index(url, 'Script', 'GET')
+
+
+time_match.params = [(100,), (50000,)]
@@ -0,0 +1,51 @@
+"""
+Response parsing of representative outputs, small and large.
+"""
+import json
+from functools import cache
+
+from cdpkit.protocol import DOM, Accessibility, Target
+from cdpkit.testing import workloads
+
+
+@cache
+def _encoded(name: str, size: int) -> str:
+    if name == 'dom':
+        result = workloads.dom_document(size)
+    elif name == 'ax':
+        result = workloads.full_ax_tree(size)
+    else:
+        result = {'targetInfos': [
+            {'targetId': f'T{index}', 'type': 'page', 'title': '', 'url': 'about:blank', 'attached': False}
+            for index in range(size)
+        ]}
+    return json.dumps(result, separators=(',', ':'))
+
+
+async def time_get_targets(size):
+    await Target.GetTargets().parse_response(_encoded('targets', size))
+
+
+time_get_targets.params = [(1,), (100,)]
+
+
+async def time_dom_get_document(size):
+    await DOM.GetDocument(depth=-1).parse_response(_encoded('dom', size))
+
+
+time_dom_get_document.params = [(1000,), (20000,)]
+
+
+async def time_get_full_ax_tree(size):
+    await Accessibility.GetFullAXTree().parse_response(_encoded('ax', size))
+
+
+time_get_full_ax_tree.params = [(1000,), (20000,)]
+
+
+def track_dom_get_document_bytes(size):
+    return len(_encoded('dom', size))
+
+
+track_dom_get_document_bytes.params = [(20000,)]
+track_dom_get_document_bytes.unit = 'bytes'
@@ -0,0 +1,87 @@
+"""
+End-to-end throughput of a `CDPSession` against a local `MockCDPServer`.
+"""
+import asyncio
+import time
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.protocol import Network, Target
+from cdpkit.testing import MockCDPServer, workloads
+
+COMMANDS = 2000
+EVENTS = 20000
+
+
+async def track_commands_sequential():
+    async with MockCDPServer() as server:
+        session_manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+        cdp_session = await session_manager.get_session(server.add_target())
+        await cdp_session.execute(Network.Enable())
+
+        start = time.perf_counter()
+        for _ in range(COMMANDS):
+            await cdp_session.execute(Network.Enable())
+        elapsed = time.perf_counter() - start
+
+        await session_manager.close()
+    return COMMANDS / elapsed
+
+
+track_commands_sequential.unit = 'commands/s'
+track_commands_sequential.higher_is_better = True
+
+
+async def track_commands_concurrent(concurrency):
+    async with MockCDPServer() as server:
+        session_manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+        cdp_session = await session_manager.get_session()
+        server.add_target()
+        await cdp_session.execute(Target.GetTargets())
+
+        async def _worker():
+            for _ in range(COMMANDS // concurrency):
+                await cdp_session.execute(Target.GetTargets(), timeout=30)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        await session_manager.close()
+    return COMMANDS / elapsed
+
+
+track_commands_concurrent.params = [(10,), (100,)]
+track_commands_concurrent.unit = 'commands/s'
+track_commands_concurrent.higher_is_better = True
+
+
+async def track_events(mode):
+    async with MockCDPServer() as server:
+        session_manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+        target_id = server.add_target()
+        cdp_session = await session_manager.get_session(target_id)
+        await cdp_session.execute(Network.Enable())
+
+        received = 0
+        done = asyncio.Event()
+
+        def _on_request(event_data):
+            nonlocal received
+            received += 1
+            if received == EVENTS:
+                done.set()
+
+        await cdp_session.register_callback(Network.RequestWillBeSent, _on_request, raw=mode == 'raw')
+
+        start = time.perf_counter()
+        await server.stream_events(target_id, 'Network.requestWillBeSent', workloads.request_will_be_sent, 1e9, EVENTS)
+        await asyncio.wait_for(done.wait(), 120)
+        elapsed = time.perf_counter() - start
+
+        await session_manager.close()
+    return EVENTS / elapsed
+
+
+track_events.params = [('validated',), ('raw',)]
+track_events.unit = 'events/s'
+track_events.higher_is_better = True
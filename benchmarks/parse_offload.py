@@ -0,0 +1,88 @@
+"""
+Event-loop stall caused by validating large command responses.
+
+Parses synthetic `Accessibility.GetFullAXTree` responses while a ticker coroutine measures how late the event loop
+wakes it up, once with parse offloading disabled and once enabled. Only free-threaded builds (3.13t/3.14t) are
+expected to show a lower stall, on GIL builds the decoding still holds the GIL.
+
+    python -m benchmarks.parse_offload --nodes 50000 --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from cdpkit.logger import set_logger
+from cdpkit.protocol import Accessibility
+from cdpkit.protocol.base import set_parse_offload
+from cdpkit.testing.workloads import full_ax_tree
+
+TICK_INTERVAL = 0.001
+
+
+async def measure_stall(response: str, concurrency: int, rounds: int) -> dict[str, float]:
+    lateness = []
+    running = True
+
+    async def ticker():
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_INTERVAL)
+            lateness.append(time.perf_counter() - start - TICK_INTERVAL)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(Accessibility.GetFullAXTree().parse_response(response) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    running = False
+    await ticker_task
+
+    lateness.sort()
+    return {
+        'elapsed_s': elapsed,
+        'max_stall_ms': lateness[-1] * 1000,
+        'p99_stall_ms': lateness[int(len(lateness) * 0.99)] * 1000,
+        'mean_stall_ms': statistics.fmean(lateness) * 1000,
+    }
+
+
+async def main(args: argparse.Namespace) -> dict:
+    response = json.dumps(full_ax_tree(args.nodes), separators=(',', ':'))
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f'response size: {len(response) / 1024 / 1024:.1f} MiB, gil enabled: {gil_enabled}')
+
+    results = {}
+    for name, threshold in (('inline', None), ('offloaded', args.threshold)):
+        set_parse_offload(threshold, max_workers=args.concurrency)
+        await measure_stall(response, args.concurrency, 1)
+        results[name] = await measure_stall(response, args.concurrency, args.rounds)
+
+    print(f'{"mode":<10} {"elapsed s":>10} {"max stall ms":>13} {"p99 stall ms":>13} {"mean stall ms":>14}')
+    for name, result in results.items():
+        print(
+            f'{name:<10} {result["elapsed_s"]:>10.3f} {result["max_stall_ms"]:>13.2f} '
+            f'{result["p99_stall_ms"]:>13.2f} {result["mean_stall_ms"]:>14.3f}'
+        )
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=50000, help='nodes in the synthetic AX tree')
+    parser.add_argument('--concurrency', type=int, default=4, help='responses parsed concurrently')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--threshold', type=int, default=256 * 1024, help='offload threshold in characters')
+    parser.add_argument('--json', help='write the results to this file')
+
+    cli_args = parser.parse_args()
+    set_logger('WARNING')
+    bench_results = asyncio.run(main(cli_args))
+    if cli_args.json:
+        with open(cli_args.json, 'w') as f:
+            json.dump(bench_results, f, indent=2)
@@ -0,0 +1,204 @@
+"""
+Benchmark runner for the cdpkit wire and dispatch path.
+
+Benchmarks follow the asv conventions: module `benchmarks/bench_*.py`, functions `time_*` are timed and functions
+`track_*` return a measured value (unit from their `unit` attribute). A `params` attribute, a list of argument
+tuples, runs the benchmark once per tuple. Coroutine functions are run on an event loop. Values regress when they
+grow, unless the benchmark sets `higher_is_better = True`, e.g. for a throughput.
+
+    python -m benchmarks.run                              # all benchmarks, results/<cdp version>-<commit>.json
+    python -m benchmarks.run -k events -o new.json        # only benchmarks whose name contains 'events'
+    python -m benchmarks.run compare old.json new.json    # diff two result files
+"""
+import argparse
+import asyncio
+import datetime
+import importlib
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import cdpkit
+from cdpkit.logger import set_logger
+
+BENCHMARKS_PATH = Path(__file__).parent
+RESULTS_PATH = BENCHMARKS_PATH / 'results'
+
+MIN_RUN_TIME = 0.2
+
+
+def discover(name_filter: str | None) -> list[tuple[str, Callable, tuple]]:
+    benchmarks = []
+    for module_path in sorted(BENCHMARKS_PATH.glob('bench_*.py')):
+        module = importlib.import_module(f'benchmarks.{module_path.stem}')
+        for func_name, func in inspect.getmembers(module, inspect.isfunction):
+            if func.__module__ != module.__name__ or not func_name.startswith(('time_', 'track_')):
+                continue
+            for params in getattr(func, 'params', [()]):
+                name = f'{module_path.stem.removeprefix("bench_")}.{func_name}'
+                if params:
+                    name = f'{name}({", ".join(map(str, params))})'
+                if name_filter is None or name_filter in name:
+                    benchmarks.append((name, func, params))
+    return benchmarks
+
+
+def _caller(func: Callable, params: tuple) -> tuple[Callable[[], Any], Callable[[], None]]:
+    if inspect.iscoroutinefunction(func):
+        loop = asyncio.new_event_loop()
+        return lambda: loop.run_until_complete(func(*params)), loop.close
+    return lambda: func(*params), lambda: None
+
+
+def run_time(func: Callable, params: tuple, repeat: int) -> dict[str, Any]:
+    call, cleanup = _caller(func, params)
+    try:
+        call()
+
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                call()
+            if time.perf_counter() - start >= MIN_RUN_TIME:
+                break
+            number *= 2
+
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                call()
+            samples.append((time.perf_counter() - start) / number)
+    finally:
+        cleanup()
+
+    return _summary(samples, 's', number, False)
+
+
+def run_track(func: Callable, params: tuple, repeat: int) -> dict[str, Any]:
+    call, cleanup = _caller(func, params)
+    try:
+        samples = [call() for _ in range(repeat)]
+    finally:
+        cleanup()
+    return _summary(samples, getattr(func, 'unit', ''), 1, getattr(func, 'higher_is_better', False))
+
+
+def _summary(samples: list[float], unit: str, number: int, higher_is_better: bool) -> dict[str, Any]:
+    return {
+        'value': statistics.median(samples),
+        'unit': unit,
+        'higher_is_better': higher_is_better,
+        'min': min(samples),
+        'max': max(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'repeat': len(samples),
+        'number': number,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=BENCHMARKS_PATH, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(args: argparse.Namespace) -> None:
+    set_logger('WARNING')
+    commit = _git_commit()
+    results = {}
+
+    for name, func, params in discover(args.filter):
+        runner = run_time if func.__name__.startswith('time_') else run_track
+        result = runner(func, params, args.repeat)
+        results[name] = result
+        spread = result['stdev'] / (result['value'] or 1)
+        print(f'{name:<60} {_format(result["value"], result["unit"]):>14}  (±{spread:.1%})')
+
+    output = Path(args.output) if args.output else RESULTS_PATH / f'{cdpkit.__cdp_version__}-{commit}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'meta': {
+            'cdpkit_version': cdpkit.__version__,
+            'cdp_version': cdpkit.__cdp_version__,
+            'commit': commit,
+            'python': sys.version,
+            'gil_enabled': getattr(sys, '_is_gil_enabled', lambda: True)(),
+            'machine': platform.platform(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }, indent=2))
+    print(f'results written to {output}')
+
+
+def compare(args: argparse.Namespace) -> None:
+    old, new = (json.loads(Path(path).read_text()) for path in (args.old, args.new))
+    print(f'old: cdp {old["meta"]["cdp_version"]} @ {old["meta"]["commit"]}')
+    print(f'new: cdp {new["meta"]["cdp_version"]} @ {new["meta"]["commit"]}')
+
+    regressions = 0
+    for name in sorted(old['results'].keys() | new['results'].keys()):
+        if name not in old['results'] or name not in new['results']:
+            print(f'{name:<60} {"only in " + ("new" if name in new["results"] else "old"):>30}')
+            continue
+        old_result, new_result = old['results'][name], new['results'][name]
+        ratio = new_result['value'] / old_result['value'] if old_result['value'] else float('inf')
+        higher_is_better = new_result.get('higher_is_better', old_result.get('higher_is_better'))
+        if higher_is_better is None:
+            # result files written before the flag, their rates are the only values that improve as they grow
+            higher_is_better = new_result['unit'].endswith('/s')
+        worse = (1 / ratio if ratio else float('inf')) if higher_is_better else ratio
+        mark = ''
+        if worse > args.threshold:
+            mark = 'REGRESSION'
+            regressions += 1
+        elif worse < 1 / args.threshold:
+            mark = 'improved'
+        print(
+            f'{name:<60} {_format(old_result["value"], old_result["unit"]):>14} '
+            f'{_format(new_result["value"], new_result["unit"]):>14} {ratio:>7.2f}x {mark}'
+        )
+
+    if regressions:
+        sys.exit(1)
+
+
+def _format(value: float, unit: str) -> str:
+    if unit == 's':
+        for scale, suffix in ((1, 's'), (1e-3, 'ms'), (1e-6, 'us')):
+            if value >= scale:
+                return f'{value / scale:.3f}{suffix}'
+        return f'{value / 1e-9:.1f}ns'
+    return f'{value:,.1f}{unit and " " + unit}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command')
+
+    parser.add_argument('-k', '--filter', help='only run benchmarks whose name contains this string')
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('-o', '--output', help='result file, defaults to benchmarks/results/<cdp>-<commit>.json')
+
+    compare_parser = subparsers.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=1.1, help='ratio reported as a regression')
+
+    cli_args = parser.parse_args()
+    if cli_args.command == 'compare':
+        compare(cli_args)
+    else:
+        run(cli_args)
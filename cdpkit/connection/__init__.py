@@ -1,7 +1,15 @@
+from .cluster import BrowserLoad, BrowserNode, CDPClusterManager
 from .session import CDPSession, CDPSessionExecutor, CDPSessionManager
+from .sharding import CDPShardCoordinator, ShardEvent, ShardJob
 
 __all__ = [
     'CDPSessionManager',
     'CDPSession',
-    'CDPSessionExecutor'
+    'CDPSessionExecutor',
+    'CDPClusterManager',
+    'BrowserNode',
+    'BrowserLoad',
+    'CDPShardCoordinator',
+    'ShardEvent',
+    'ShardJob'
 ]
@@ -0,0 +1,383 @@
+import asyncio
+import time
+from contextlib import suppress
+
+import websockets
+from pydantic import BaseModel, Field, PrivateAttr
+
+from cdpkit.connection.session import CDPSession, CDPSessionManager
+from cdpkit.exception import (
+    CommandExecutionTimeout,
+    InvalidResponse,
+    NetworkError,
+    NoAvailableBrowser,
+    WebSocketConnectionClosed,
+)
+from cdpkit.exception.base import CustomException
+from cdpkit.logger import logger
+from cdpkit.protocol import Performance, SystemInfo, Target
+
+__all__ = [
+    'BrowserLoad',
+    'BrowserNode',
+    'CDPClusterManager'
+]
+
+# errors telling that a browser stopped answering, command errors come from a browser that is alive
+_BROWSER_DOWN_ERRORS = (
+    NetworkError, InvalidResponse, CommandExecutionTimeout, WebSocketConnectionClosed, websockets.WebSocketException,
+    OSError
+)
+
+
+class BrowserLoad(BaseModel):
+    """
+    Load sample of a single browser
+
+    Attributes:
+        open_targets (int): Number of page targets currently open in the browser.
+        inflight_commands (int): Number of commands sent by this client that are still waiting for a response.
+        cpu_usage (float): CPU seconds consumed per wall-clock second since the previous sample (SystemInfo).
+        js_heap_used (float): Sum of `JSHeapUsedSize` over the pages owned by the cluster (Performance.GetMetrics).
+        sampled_at (float): Monotonic timestamp of the sample.
+    """
+    open_targets: int = 0
+    inflight_commands: int = 0
+    cpu_usage: float = 0.0
+    js_heap_used: float = 0.0
+    sampled_at: float = 0.0
+
+
+class BrowserNode(BaseModel):
+    """
+    A browser that is a member of the cluster
+
+    Attributes:
+        ws_endpoint (str): The `remote-debugging-port` address of the browser, e.g. `host:9222`.
+        alive (bool): False once the browser stopped answering.
+        draining (bool): True while no new sessions may be routed to the browser.
+        load (BrowserLoad): The latest load sample.
+    """
+    ws_endpoint: str
+    alive: bool = True
+    draining: bool = False
+    load: BrowserLoad = Field(default_factory=BrowserLoad)
+
+    _session_manager: CDPSessionManager | None = PrivateAttr(default=None)
+    _targets: dict[str, str] = PrivateAttr(default_factory=dict)
+    _cpu_time: float | None = PrivateAttr(default=None)
+
+    def model_post_init(self, __context) -> None:
+        self._session_manager = CDPSessionManager(ws_endpoint=self.ws_endpoint)
+
+    @property
+    def session_manager(self) -> CDPSessionManager:
+        return self._session_manager
+
+    @property
+    def targets(self) -> dict[str, str]:
+        """ Page targets owned by the cluster on this browser, mapped to their last known url. """
+        return dict(self._targets)
+
+    @property
+    def available(self) -> bool:
+        return self.alive and not self.draining
+
+    def __str__(self) -> str:
+        return f'BrowserNode(ws_endpoint={self.ws_endpoint}, alive={self.alive}, draining={self.draining})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class CDPClusterManager(BaseModel):
+    """
+    Session manager over many browsers
+
+    Routes new pages to the least-loaded browser, samples the load of every browser periodically and moves the
+    pages of a dead or drained browser to the remaining ones.
+
+    Examples:
+        cluster = CDPClusterManager(ws_endpoints=['host-a:9222', 'host-b:9222'])
+        await cluster.start()
+
+        page_session = await cluster.new_page('https://example.com')
+        await page_session.execute(Page.Enable())
+    """
+    ws_endpoints: list[str]
+    sample_interval: float = 5.0
+    sample_page_metrics: bool = False
+    command_timeout: int = 3
+
+    target_weight: float = 1.0
+    inflight_weight: float = 0.5
+    cpu_weight: float = 10.0
+    js_heap_weight: float = 1 / (256 * 1024 * 1024)
+
+    _nodes: dict[str, BrowserNode] = PrivateAttr(default_factory=dict)
+    _target_nodes: dict[str, str] = PrivateAttr(default_factory=dict)
+    _relocated: dict[str, str] = PrivateAttr(default_factory=dict)
+    _monitor_task: asyncio.Task | None = PrivateAttr(default=None)
+
+    def model_post_init(self, __context) -> None:
+        for ws_endpoint in self.ws_endpoints:
+            self._nodes[ws_endpoint] = BrowserNode(ws_endpoint=ws_endpoint)
+
+    @property
+    def nodes(self) -> list[BrowserNode]:
+        return list(self._nodes.values())
+
+    def add_browser(self, ws_endpoint: str) -> BrowserNode:
+        if ws_endpoint not in self._nodes:
+            self._nodes[ws_endpoint] = BrowserNode(ws_endpoint=ws_endpoint)
+            self.ws_endpoints.append(ws_endpoint)
+        return self._nodes[ws_endpoint]
+
+    async def start(self) -> None:
+        await self.refresh()
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def close(self) -> None:
+        if self._monitor_task and not self._monitor_task.done():
+            self._monitor_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._monitor_task
+        self._monitor_task = None
+
+        for node in self._nodes.values():
+            await node.session_manager.close()
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            try:
+                await self.refresh()
+            except Exception as exc:
+                logger.error(f'Cluster load sampling failed: {exc}')
+
+    async def refresh(self) -> None:
+        """ Sample every live browser and move the pages of the browsers that stopped answering or failed sampling. """
+        nodes = [node for node in self._nodes.values() if node.alive]
+        results = await asyncio.gather(*(self._sample_load(node) for node in nodes), return_exceptions=True)
+
+        for node, result in zip(nodes, results):
+            if isinstance(result, BaseException):
+                # e.g. a malformed or refused sample, the browser is not fit to take pages either
+                logger.error(f'Sampling the load of {node.ws_endpoint} failed: {result!r}')
+            if result is not True:
+                await self._handle_browser_down(node)
+
+    async def _sample_load(self, node: BrowserNode) -> bool:
+        try:
+            browser_session = await node.session_manager.get_session()
+            targets_resp = await browser_session.execute(Target.GetTargets(), self.command_timeout)
+            process_resp = await browser_session.execute(SystemInfo.GetProcessInfo(), self.command_timeout)
+        except _BROWSER_DOWN_ERRORS as exc:
+            logger.warning(f'Browser {node.ws_endpoint} is not responding: {exc}')
+            return False
+
+        now = time.monotonic()
+        load = node.load
+
+        page_infos = [info for info in targets_resp.targetInfos if info.type == 'page']
+        for info in page_infos:
+            if info.targetId in node._targets:
+                node._targets[info.targetId] = info.url
+        alive_ids = {info.targetId for info in page_infos}
+        for target_id in [_ for _ in node._targets if _ not in alive_ids]:
+            self._forget_target(node, target_id)
+
+        cpu_time = sum(info.cpuTime for info in process_resp.processInfo)
+        if node._cpu_time is not None and load.sampled_at:
+            load.cpu_usage = max(cpu_time - node._cpu_time, 0.0) / max(now - load.sampled_at, 1e-6)
+        node._cpu_time = cpu_time
+
+        if self.sample_page_metrics:
+            load.js_heap_used = await self._sample_js_heap(node)
+
+        load.open_targets = len(page_infos)
+        load.inflight_commands = node.session_manager.pending_commands
+        load.sampled_at = now
+        return True
+
+    async def _sample_js_heap(self, node: BrowserNode) -> float:
+        async def _page_heap(target_id: str) -> float:
+            try:
+                page_session = await node.session_manager.get_session(target_id)
+                await page_session.execute(Performance.Enable(), self.command_timeout)
+                metrics_resp = await page_session.execute(Performance.GetMetrics(), self.command_timeout)
+            except (CustomException, OSError) as exc:
+                logger.debug(f'Failed to get metrics of target {target_id}: {exc}')
+                return 0.0
+            return next((metric.value for metric in metrics_resp.metrics if metric.name == 'JSHeapUsedSize'), 0.0)
+
+        return sum(await asyncio.gather(*(_page_heap(target_id) for target_id in node._targets)))
+
+    def score(self, node: BrowserNode) -> float:
+        load = node.load
+        return (
+            self.target_weight * load.open_targets
+            + self.inflight_weight * node.session_manager.pending_commands
+            + self.cpu_weight * load.cpu_usage
+            + self.js_heap_weight * load.js_heap_used
+        )
+
+    def least_loaded(self) -> BrowserNode:
+        nodes = [node for node in self._nodes.values() if node.available]
+        if not nodes:
+            raise NoAvailableBrowser()
+        return min(nodes, key=self.score)
+
+    def node_of(self, target_id: Target.TargetID) -> BrowserNode | None:
+        target_id = self._resolve_target(target_id)
+        if target_id in self._target_nodes:
+            return self._nodes[self._target_nodes[target_id]]
+        return None
+
+    def _resolve_target(self, target_id: Target.TargetID) -> Target.TargetID:
+        while target_id in self._relocated:
+            target_id = self._relocated[target_id]
+        return target_id
+
+    def _forget_target(self, node: BrowserNode, target_id: Target.TargetID) -> None:
+        node._targets.pop(target_id, None)
+        self._target_nodes.pop(target_id, None)
+
+    async def new_page(self, url: str = 'about:blank', **create_kwargs) -> CDPSession:
+        """
+        Open a page on the least-loaded browser
+
+        Args:
+            url (str): The url the page is opened with.
+            **create_kwargs: Extra keyword arguments passed to `Target.CreateTarget`.
+
+        Returns:
+            CDPSession: The session of the new page.
+
+        Raises:
+            CommandExecutionError: The browser refused to create the page.
+            NoAvailableBrowser: Every browser is down or draining.
+        """
+        while True:
+            node = self.least_loaded()
+            try:
+                browser_session = await node.session_manager.get_session()
+                create_resp = await browser_session.execute(
+                    Target.CreateTarget(url=url, **create_kwargs), self.command_timeout
+                )
+            except _BROWSER_DOWN_ERRORS as exc:
+                # other errors, e.g. of the arguments, are raised to the caller
+                logger.warning(f'Failed to open page on {node.ws_endpoint}: {exc}')
+                await self._handle_browser_down(node)
+                continue
+
+            target_id = create_resp.targetId
+            node._targets[target_id] = url
+            node.load.open_targets += 1
+            self._target_nodes[target_id] = node.ws_endpoint
+            return await node.session_manager.get_session(target_id)
+
+    async def get_session(
+        self, target_id: Target.TargetID = 'browser', ws_endpoint: str | None = None
+    ) -> CDPSession:
+        """
+        Get the session of a target in the cluster
+
+        Pages moved away from a dead browser are resolved to their replacement. The browser session is taken from
+        `ws_endpoint`, or from the least-loaded browser if omitted.
+        """
+        if target_id == 'browser':
+            node = self._nodes[ws_endpoint] if ws_endpoint else self.least_loaded()
+            return await node.session_manager.get_session()
+
+        target_id = self._resolve_target(target_id)
+        if ws_endpoint is None:
+            node = self.node_of(target_id)
+            if node is None:
+                raise NoAvailableBrowser(f'Target {target_id} is not owned by the cluster.')
+        else:
+            node = self._nodes[ws_endpoint]
+            node._targets.setdefault(target_id, '')
+            self._target_nodes[target_id] = ws_endpoint
+        return await node.session_manager.get_session(target_id)
+
+    async def close_page(self, target_id: Target.TargetID) -> None:
+        target_id = self._resolve_target(target_id)
+        node = self.node_of(target_id)
+        if node is None:
+            return
+
+        with suppress(CustomException, OSError):
+            browser_session = await node.session_manager.get_session()
+            await browser_session.execute(Target.CloseTarget(target_id=target_id), self.command_timeout)
+        await node.session_manager.remove_session(target_id)
+        self._forget_target(node, target_id)
+        node.load.open_targets = max(node.load.open_targets - 1, 0)
+
+    async def drain(self, ws_endpoint: str, rebalance: bool = True) -> dict[str, CDPSession]:
+        """
+        Stop routing to a browser and move its pages elsewhere
+
+        The pages are closed on the browser when it is still alive, so that a moved page is not left open twice.
+
+        Args:
+            ws_endpoint (str): The browser to drain.
+            rebalance (bool): Reopen the pages of the browser, with their last known url, on the other browsers.
+
+        Returns:
+            dict[str, CDPSession]: The replacement session of every moved page, keyed by the old target id.
+        """
+        node = self._nodes[ws_endpoint]
+        node.draining = True
+
+        targets = node.targets
+        if node.alive and targets:
+            browser_session = await node.session_manager.get_session()
+            results = await asyncio.gather(*(
+                browser_session.execute(Target.CloseTarget(target_id=target_id), self.command_timeout)
+                for target_id in targets
+            ), return_exceptions=True)
+            for target_id, result in zip(targets, results):
+                if isinstance(result, BaseException):
+                    logger.warning(f'Failed to close target {target_id} of drained {node.ws_endpoint}: {result!r}')
+        for target_id in targets:
+            await node.session_manager.remove_session(target_id)
+            self._forget_target(node, target_id)
+        node.load.open_targets = 0
+
+        if not rebalance:
+            return {}
+        return await self._rebalance(targets)
+
+    async def undrain(self, ws_endpoint: str) -> None:
+        node = self._nodes[ws_endpoint]
+        node.draining = False
+        node.alive = True
+
+    async def _rebalance(self, targets: dict[str, str]) -> dict[str, CDPSession]:
+        moved = {}
+        for target_id, url in targets.items():
+            try:
+                page_session = await self.new_page(url or 'about:blank')
+            except NoAvailableBrowser:
+                logger.error(f'No browser left to move target {target_id} to')
+                break
+            self._relocated[target_id] = page_session.target_id
+            moved[target_id] = page_session
+            logger.info(f'Moved target {target_id} to {page_session}')
+        return moved
+
+    async def _handle_browser_down(self, node: BrowserNode) -> None:
+        if not node.alive:
+            return
+        logger.error(f'Browser {node.ws_endpoint} is down, draining it')
+        node.alive = False
+        await self.drain(node.ws_endpoint)
+        await node.session_manager.close()
+
+    def __str__(self) -> str:
+        return f'CDPClusterManager(ws_endpoints={self.ws_endpoints})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
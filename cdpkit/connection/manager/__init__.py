@@ -1,7 +1,22 @@
 from .commands import CommandsManager
+from .contexts import ExecutionContextRegistry
+from .dialogs import DialogPolicy, DialogRule, FileChooserPolicy, FileChooserRule
 from .events import EventsManager
+from .frames import FrameInfo, FrameTree
+from .navigation import LIFECYCLE_EVENTS, NavigationTracker
+from .network import NetworkTracker
 
 __all__ = [
+    'LIFECYCLE_EVENTS',
     'CommandsManager',
-    'EventsManager'
+    'DialogPolicy',
+    'DialogRule',
+    'EventsManager',
+    'ExecutionContextRegistry',
+    'FileChooserPolicy',
+    'FileChooserRule',
+    'FrameInfo',
+    'FrameTree',
+    'NavigationTracker',
+    'NetworkTracker'
 ]
@@ -1,5 +1,4 @@
 import asyncio
-import json
 from typing import Any
 
 from pydantic import BaseModel, PrivateAttr
@@ -11,6 +10,10 @@ class CommandsManager(BaseModel):
     _pending_commands: dict[int, asyncio.Future] = PrivateAttr(default_factory=dict)
     _command_id: int = PrivateAttr(default=0)
 
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending_commands)
+
     def create_command_future(self) -> tuple[int, asyncio.Future]:
         self._command_id += 1
         future = asyncio.Future()
@@ -21,10 +24,20 @@ class CommandsManager(BaseModel):
         if response_id in self._pending_commands:
             del self._pending_commands[response_id]
 
-    def resolve_command(self, message: dict[str, Any]):
-        response_id = message.get('id')
+    def resolve_command(self, message: dict[str, Any] | str, response_id: int | None = None):
+        """
+        Resolve a pending command with its response message
+
+        Args:
+            message (dict[str, Any] | str): The decoded response message, or for large responses the still encoded
+                JSON text of its `result`, which is decoded by the command itself.
+            response_id (int | None): The id of the command, required when message is not decoded.
+        """
+        if response_id is None:
+            response_id = message.get('id')
         if response_id in self._pending_commands:
-            self._pending_commands[response_id].set_result(json.dumps(message))
-            del self._pending_commands[response_id]
+            future = self._pending_commands.pop(response_id)
+            if not future.done():
+                future.set_result(message)
         else:
             logger.warning(f'No pending message can be resolve for id {response_id}')
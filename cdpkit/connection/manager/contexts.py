@@ -0,0 +1,78 @@
+import asyncio
+
+from pydantic import BaseModel, PrivateAttr
+
+# (frame id, world name), the default world of a frame has an empty name
+type ContextKey = tuple[str, str]
+
+
+class ExecutionContextRegistry(BaseModel):
+    """
+    The execution contexts of the frames of a session by frame and world, fed with the raw `Runtime` context events
+
+    Contexts are only ever added by `Runtime.executionContextCreated`, and removed by the destroyed and cleared events
+    the browser sends when a frame navigates or goes away, so an id found here is one the browser still knows.
+    Waiters are resolved when the context of their frame and world is created.
+    """
+    _contexts: dict[ContextKey, int] = PrivateAttr(default_factory=dict)
+    _keys: dict[int, ContextKey] = PrivateAttr(default_factory=dict)
+    _waiters: dict[ContextKey, list[asyncio.Future]] = PrivateAttr(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def context_id(self, frame_id: str, world_name: str = '') -> int | None:
+        return self._contexts.get((frame_id, world_name))
+
+    def key(self, context_id: int) -> ContextKey | None:
+        """ The frame and world of a context. """
+        return self._keys.get(context_id)
+
+    def worlds(self, frame_id: str) -> dict[str, int]:
+        return {world: context_id for (frame, world), context_id in self._contexts.items() if frame == frame_id}
+
+    def wait_for(self, frame_id: str, world_name: str = '') -> asyncio.Future:
+        """Wait for the context of a frame and world.
+
+        Returns:
+            asyncio.Future: Resolved with the context id, cancelling it removes the waiter.
+        """
+        key = (frame_id, world_name)
+        future = asyncio.get_running_loop().create_future()
+        if (context_id := self._contexts.get(key)) is not None:
+            future.set_result(context_id)
+            return future
+        self._waiters.setdefault(key, []).append(future)
+        future.add_done_callback(lambda _: self._remove_waiter(key, future))
+        return future
+
+    def execution_context_created(self, event_data: dict) -> None:
+        context = event_data['context']
+        aux_data = context.get('auxData') or {}
+        if 'frameId' not in aux_data:
+            return
+        key = (aux_data['frameId'], '' if aux_data.get('isDefault') else context.get('name', ''))
+        if (previous := self._contexts.get(key)) is not None:
+            self._keys.pop(previous, None)
+        self._contexts[key] = context['id']
+        self._keys[context['id']] = key
+        for future in self._waiters.get(key, ()):
+            if not future.done():
+                future.set_result(context['id'])
+
+    def execution_context_destroyed(self, event_data: dict) -> None:
+        key = self._keys.pop(event_data['executionContextId'], None)
+        if key is not None and self._contexts.get(key) == event_data['executionContextId']:
+            del self._contexts[key]
+
+    def execution_contexts_cleared(self, event_data: dict) -> None:
+        self._contexts.clear()
+        self._keys.clear()
+
+    def _remove_waiter(self, key: ContextKey, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+        waiters.remove(future)
+        if not waiters:
+            del self._waiters[key]
@@ -0,0 +1,104 @@
+import re
+from typing import Any, Literal
+
+from pydantic import BaseModel, PrivateAttr, field_validator
+
+
+class DialogRule(BaseModel):
+    """
+    How to answer the dialogs matching a type and a message
+
+    Attributes:
+        type (str | None): 'alert', 'confirm', 'prompt' or 'beforeunload', any type if None.
+        message (str | None): Regular expression searched in the message of the dialog, any message if None.
+        accept (bool): Accept or dismiss the dialog.
+        prompt_text (str | None): The text entered in a prompt, its default text if None.
+    """
+    type: Literal['alert', 'confirm', 'prompt', 'beforeunload'] | None = None
+    message: str | None = None
+    accept: bool = True
+    prompt_text: str | None = None
+
+    _message_re: re.Pattern | None = PrivateAttr(default=None)
+
+    @field_validator('message')
+    @classmethod
+    def _compile_message(cls, message: str | None) -> str | None:
+        # rules are matched in the connection reader, an invalid pattern must fail here instead
+        if message is not None:
+            try:
+                re.compile(message)
+            except re.error as exc:
+                raise ValueError(f'Invalid message pattern {message!r}: {exc}')
+        return message
+
+    def model_post_init(self, __context) -> None:
+        if self.message is not None:
+            self._message_re = re.compile(self.message)
+
+    def matches(self, params: dict[str, Any]) -> bool:
+        return (self.type is None or self.type == params['type']) and (
+            self._message_re is None or self._message_re.search(params['message']) is not None
+        )
+
+
+class DialogPolicy(BaseModel):
+    """
+    Answers `Page.javascriptDialogOpening` from the reader of a session, the first matching rule or the default
+
+    Examples:
+        await session.set_dialog_policy(DialogPolicy())  # accept every dialog
+        await session.set_dialog_policy(DialogPolicy(accept=False, rules=[DialogRule(type='prompt', prompt_text='42')]))
+    """
+    accept: bool = True
+    prompt_text: str | None = None
+    rules: list[DialogRule] = []
+
+    def command(self, params: dict[str, Any]) -> dict[str, Any]:
+        """ The `Page.handleJavaScriptDialog` command answering a dialog, built from the raw event params. """
+        answer: DialogRule | DialogPolicy = next((rule for rule in self.rules if rule.matches(params)), self)
+        command_params: dict[str, Any] = {'accept': answer.accept}
+        if params['type'] == 'prompt' and answer.accept:
+            command_params['promptText'] = (
+                answer.prompt_text if answer.prompt_text is not None else params.get('defaultPrompt', '')
+            )
+        return {'method': 'Page.handleJavaScriptDialog', 'params': command_params}
+
+
+class FileChooserRule(BaseModel):
+    """
+    The files chosen in the file choosers matching a frame and a mode
+
+    Attributes:
+        files (list[str]): Absolute paths of the files, only the first one in a single file chooser, none cancels.
+        frame_id (str | None): The frame of the file input, any frame if None.
+        mode (str | None): 'selectSingle' or 'selectMultiple', any mode if None.
+    """
+    files: list[str]
+    frame_id: str | None = None
+    mode: Literal['selectSingle', 'selectMultiple'] | None = None
+
+    def matches(self, params: dict[str, Any]) -> bool:
+        return (self.frame_id is None or self.frame_id == params.get('frameId')) and (
+            self.mode is None or self.mode == params['mode']
+        )
+
+
+class FileChooserPolicy(BaseModel):
+    """
+    Answers `Page.fileChooserOpened` from the reader of a session, the first matching rule or the default files
+
+    Examples:
+        await session.set_file_chooser_policy(FileChooserPolicy(files=['/data/invoice.pdf']))
+    """
+    files: list[str] = []
+    rules: list[FileChooserRule] = []
+
+    def command(self, params: dict[str, Any]) -> dict[str, Any] | None:
+        """ The `DOM.setFileInputFiles` command answering a file chooser, None if it has no input element. """
+        if 'backendNodeId' not in params:
+            return None
+        files = next((rule.files for rule in self.rules if rule.matches(params)), self.files)
+        if params['mode'] == 'selectSingle':
+            files = files[:1]
+        return {'method': 'DOM.setFileInputFiles', 'params': {'files': files, 'backendNodeId': params['backendNodeId']}}
@@ -18,7 +18,7 @@ class EventsManager(BaseModel):
     _events_callbacks: dict[str, list[int]] = PrivateAttr(default=defaultdict(list))
 
     async def register_callback(
-        self, event: type[CDPEvent], callback: Callable, temporary: bool = False
+        self, event: type[CDPEvent], callback: Callable, temporary: bool = False, raw: bool = False
     ) -> int:
         if not callable(callback):
             logger.error('Callback must be callable function.')
@@ -29,7 +29,11 @@ class EventsManager(BaseModel):
             'event': event.EVENT_NAME,
             'callback': callback,
             'callback_event': event,
-            'temporary': temporary
+            'temporary': temporary,
+            'raw': raw,
+            # resolved once here rather than for every event, busy events arrive thousands of times per second
+            'pass_event_data': 'event_data' in inspect.signature(callback).parameters,
+            'is_coroutine': asyncio.iscoroutinefunction(callback)
         }
         self._events_callbacks[event.EVENT_NAME].append(self._callback_id)
 
@@ -69,13 +73,15 @@ class EventsManager(BaseModel):
 
             callback_func = callback_info['callback']
 
-            sig = inspect.signature(callback_func)
-            if 'event_data' in sig.parameters:
-                event_data = callback_info['callback_event'].model_validate(event_data['params'])
-                callback_func = partial(callback_func, event_data=event_data)
+            if callback_info['pass_event_data']:
+                if callback_info['raw']:
+                    callback_func = partial(callback_func, event_data=event_data['params'])
+                else:
+                    callback_event = callback_info['callback_event'].model_validate(event_data['params'])
+                    callback_func = partial(callback_func, event_data=callback_event)
 
             try:
-                if asyncio.iscoroutinefunction(callback_func):
+                if callback_info['is_coroutine']:
                     await callback_func()
                 else:
                     callback_func()
@@ -0,0 +1,147 @@
+from collections.abc import Callable
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from cdpkit.connection.manager.contexts import ExecutionContextRegistry
+
+
+class FrameInfo:
+    __slots__ = ('id', 'parent_id', 'url', 'name', 'loader_id', 'children')
+
+    def __init__(self, frame_id: str, parent_id: str | None) -> None:
+        self.id = frame_id
+        self.parent_id = parent_id
+        self.url = ''
+        self.name = ''
+        self.loader_id = ''
+        # insertion ordered, in the order the frames were attached
+        self.children: dict[str, None] = {}
+
+    def __str__(self) -> str:
+        return f'FrameInfo(id={self.id}, url={self.url})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class FrameTree(BaseModel):
+    """
+    The frames of a session, fed with the raw `Page` frame events
+
+    Loaded once from `Page.getFrameTree`, then kept up to date by the events, so that the url, parent, children and
+    default execution context (from the execution context registry of the session) of a frame are dict lookups.
+    Events received before the frame tree is loaded are replayed on top of it, in order.
+    """
+    main_frame_id: str | None = None
+    contexts: ExecutionContextRegistry = Field(default_factory=ExecutionContextRegistry)
+
+    _frames: dict[str, FrameInfo] = PrivateAttr(default_factory=dict)
+    # events waiting for `load`, None once loaded
+    _pending: list[tuple[Callable[[dict], None], dict]] | None = PrivateAttr(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, frame_id: str) -> bool:
+        return frame_id in self._frames
+
+    @property
+    def main_frame(self) -> FrameInfo | None:
+        return self._frames.get(self.main_frame_id) if self.main_frame_id is not None else None
+
+    @property
+    def frames(self) -> dict[str, FrameInfo]:
+        return dict(self._frames)
+
+    def frame(self, frame_id: str) -> FrameInfo | None:
+        return self._frames.get(frame_id)
+
+    def url(self, frame_id: str) -> str | None:
+        frame = self._frames.get(frame_id)
+        return None if frame is None else frame.url
+
+    def parent(self, frame_id: str) -> FrameInfo | None:
+        frame = self._frames.get(frame_id)
+        return None if frame is None or frame.parent_id is None else self._frames.get(frame.parent_id)
+
+    def children(self, frame_id: str) -> list[FrameInfo]:
+        frame = self._frames.get(frame_id)
+        return [] if frame is None else [self._frames[child_id] for child_id in frame.children]
+
+    def default_context_id(self, frame_id: str) -> int | None:
+        return self.contexts.context_id(frame_id)
+
+    def load(self, frame_tree: dict) -> None:
+        """ Replace the frames with those of a `Page.getFrameTree` result, as a dict, and apply the pending events. """
+        self._frames.clear()
+        self.main_frame_id = frame_tree['frame']['id']
+        nodes = [(frame_tree, None)]
+        while nodes:
+            node, parent_id = nodes.pop()
+            frame = node['frame']
+            self._set_frame(frame, parent_id)
+            nodes.extend((child, frame['id']) for child in reversed(node.get('childFrames', ())))
+
+        # events read while the snapshot was taken or returned, the last of them describe the current frames
+        pending, self._pending = self._pending or [], None
+        for handler, event_data in pending:
+            handler(event_data)
+
+    def _deferred(self, handler: Callable[[dict], None], event_data: dict) -> bool:
+        if self._pending is None:
+            return False
+        self._pending.append((handler, event_data))
+        return True
+
+    def frame_attached(self, event_data: dict) -> None:
+        if self._deferred(self.frame_attached, event_data):
+            return
+        frame_id, parent_id = event_data['frameId'], event_data['parentFrameId']
+        if frame_id not in self._frames:
+            self._frames[frame_id] = FrameInfo(frame_id, parent_id)
+        if (parent := self._frames.get(parent_id)) is not None:
+            parent.children[frame_id] = None
+
+    def frame_detached(self, event_data: dict) -> None:
+        if self._deferred(self.frame_detached, event_data):
+            return
+        self._remove(event_data['frameId'])
+
+    def frame_navigated(self, event_data: dict) -> None:
+        if self._deferred(self.frame_navigated, event_data):
+            return
+        frame = event_data['frame']
+        parent_id = frame.get('parentId')
+        if parent_id is None:
+            if self.main_frame_id is not None and self.main_frame_id != frame['id']:
+                # the main frame was swapped for a new one
+                self._remove(self.main_frame_id)
+            self.main_frame_id = frame['id']
+        self._set_frame(frame, parent_id)
+
+    def navigated_within_document(self, event_data: dict) -> None:
+        if self._deferred(self.navigated_within_document, event_data):
+            return
+        if (frame := self._frames.get(event_data['frameId'])) is not None:
+            frame.url = event_data['url']
+
+    def _set_frame(self, frame: dict, parent_id: str | None) -> None:
+        frame_id = frame['id']
+        info = self._frames.get(frame_id)
+        if info is None:
+            info = self._frames[frame_id] = FrameInfo(frame_id, parent_id)
+        info.parent_id = parent_id
+        info.url = frame['url'] + frame.get('urlFragment', '')
+        info.name = frame.get('name', '')
+        info.loader_id = frame['loaderId']
+        if parent_id is not None and (parent := self._frames.get(parent_id)) is not None:
+            parent.children[frame_id] = None
+
+    def _remove(self, frame_id: str) -> None:
+        frame = self._frames.pop(frame_id, None)
+        if frame is None:
+            return
+        if frame.parent_id is not None and (parent := self._frames.get(frame.parent_id)) is not None:
+            parent.children.pop(frame_id, None)
+        for child_id in list(frame.children):
+            self._remove(child_id)
@@ -0,0 +1,133 @@
+import asyncio
+from collections import OrderedDict
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.exception import NetworkError
+
+# the `wait_until` names of `CDPSession.goto` and the lifecycle events they wait for, 'commit' waits for none
+LIFECYCLE_EVENTS = {
+    'commit': None,
+    'domcontentloaded': 'DOMContentLoaded',
+    'load': 'load',
+    'networkalmostidle': 'networkAlmostIdle',
+    'networkidle': 'networkIdle',
+    'firstpaint': 'firstPaint',
+    'firstcontentfulpaint': 'firstContentfulPaint',
+    'firstmeaningfulpaint': 'firstMeaningfulPaint',
+}
+# lifecycle events of the loaders seen last are kept, those of older loaders are forgotten
+_MAX_LOADERS = 256
+
+
+class _LifecycleWaiter:
+    __slots__ = ('future', 'frame_id', 'loader_id', 'events')
+
+    def __init__(self, future: asyncio.Future, frame_id: str, loader_id: str, events: set[str]) -> None:
+        self.future = future
+        self.frame_id = frame_id
+        self.loader_id = loader_id
+        self.events = events
+
+
+class NavigationTracker(BaseModel):
+    """
+    Lifecycle events of the documents loaded in the frames of a session, fed with the raw `Page` events
+
+    Events are recorded per loader id from the moment the tracker is registered, so a navigation waited for after
+    `Page.navigate` returned still sees the events that arrived before. `Page.frameStoppedLoading` and
+    `Page.loadEventFired` complete the `DOMContentLoaded` and `load` events of the current document of a frame, for
+    documents that never report them. A navigation started in a frame fails the waiters of the one it replaces, and
+    the replaced loader can no longer take the frame back: its late `init` event is only recorded.
+    """
+    main_frame_id: str
+
+    _loaders: OrderedDict[str, set[str]] = PrivateAttr(default_factory=OrderedDict)
+    _frame_loaders: dict[str, str] = PrivateAttr(default_factory=dict)
+    # loaders replaced in their frame, the oldest are forgotten first
+    _superseded: OrderedDict[str, None] = PrivateAttr(default_factory=OrderedDict)
+    _waiters: dict[str, list[_LifecycleWaiter]] = PrivateAttr(default_factory=dict)
+
+    def current_loader(self, frame_id: str) -> str | None:
+        return self._frame_loaders.get(frame_id)
+
+    def lifecycle_event(self, event_data: dict) -> None:
+        frame_id, loader_id, name = event_data['frameId'], event_data['loaderId'], event_data['name']
+        if name == 'init':
+            self._start_loader(frame_id, loader_id)
+        self._record(loader_id, (name,))
+
+    def frame_stopped_loading(self, event_data: dict) -> None:
+        if (loader_id := self._frame_loaders.get(event_data['frameId'])) is not None:
+            self._record(loader_id, ('DOMContentLoaded', 'load'))
+
+    def load_event_fired(self, event_data: dict) -> None:
+        if (loader_id := self._frame_loaders.get(self.main_frame_id)) is not None:
+            self._record(loader_id, ('load',))
+
+    def frame_detached(self, event_data: dict) -> None:
+        frame_id = event_data['frameId']
+        self._frame_loaders.pop(frame_id, None)
+        self._fail_frame(frame_id, None, f'Frame {frame_id} was detached during its navigation')
+
+    def wait_for(self, frame_id: str, loader_id: str, events: set[str]) -> asyncio.Future:
+        """Wait until the document of a loader reported every lifecycle event of `events`.
+
+        Returns:
+            asyncio.Future: Resolved once every event was seen, cancelling it removes the waiter.
+        """
+        self._start_loader(frame_id, loader_id)
+        future = asyncio.get_running_loop().create_future()
+        if loader_id in self._superseded:
+            future.set_exception(NetworkError(f'Navigation of frame {frame_id} was replaced by another one'))
+            return future
+        missing = events - self._loaders.get(loader_id, set())
+        if not missing:
+            future.set_result(None)
+            return future
+
+        waiter = _LifecycleWaiter(future, frame_id, loader_id, missing)
+        self._waiters.setdefault(loader_id, []).append(waiter)
+        future.add_done_callback(lambda _: self._remove_waiter(waiter))
+        return future
+
+    def _start_loader(self, frame_id: str, loader_id: str) -> None:
+        previous = self._frame_loaders.get(frame_id)
+        if previous == loader_id or loader_id in self._superseded:
+            # a replaced loader reporting late is not a newer navigation
+            return
+        self._frame_loaders[frame_id] = loader_id
+        if previous is not None:
+            self._superseded[previous] = None
+            if len(self._superseded) > _MAX_LOADERS:
+                self._superseded.popitem(last=False)
+            self._fail_frame(frame_id, loader_id, f'Navigation of frame {frame_id} was replaced by another one')
+
+    def _record(self, loader_id: str, names: tuple[str, ...]) -> None:
+        seen = self._loaders.get(loader_id)
+        if seen is None:
+            seen = self._loaders[loader_id] = set()
+            if len(self._loaders) > _MAX_LOADERS:
+                self._loaders.popitem(last=False)
+        seen.update(names)
+
+        for waiter in self._waiters.get(loader_id, ()):
+            waiter.events.difference_update(names)
+            if not waiter.events and not waiter.future.done():
+                waiter.future.set_result(None)
+
+    def _fail_frame(self, frame_id: str, keep_loader_id: str | None, message: str) -> None:
+        for loader_id, waiters in list(self._waiters.items()):
+            if loader_id == keep_loader_id:
+                continue
+            for waiter in waiters:
+                if waiter.frame_id == frame_id and not waiter.future.done():
+                    waiter.future.set_exception(NetworkError(message))
+
+    def _remove_waiter(self, waiter: _LifecycleWaiter) -> None:
+        waiters = self._waiters.get(waiter.loader_id)
+        if waiters is None:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del self._waiters[waiter.loader_id]
@@ -0,0 +1,126 @@
+import asyncio
+import fnmatch
+import re
+from collections import Counter
+from typing import Any
+
+from pydantic import BaseModel, PrivateAttr
+
+
+class _IdleWaiter:
+    __slots__ = ('future', 'idle_time', 'max_inflight', 'timer')
+
+    def __init__(self, future: asyncio.Future, idle_time: float, max_inflight: int) -> None:
+        self.future = future
+        self.idle_time = idle_time
+        self.max_inflight = max_inflight
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class NetworkTracker(BaseModel):
+    """
+    Requests in flight on a session, fed with the raw `Network` request events
+
+    Requests of the ignored resource types (long-lived by nature) and urls matching the ignored patterns are not
+    counted. Idle waiters arm one timer when the count drops to their threshold and cancel it when it rises again.
+    """
+    ignore_types: frozenset[str] = frozenset(('WebSocket', 'EventSource', 'Ping', 'CSPViolationReport'))
+    ignore_urls: list[str] = []
+
+    _inflight: dict[str, str] = PrivateAttr(default_factory=dict)
+    _waiters: set[_IdleWaiter] = PrivateAttr(default_factory=set)
+    _ignore_url_re: re.Pattern | None = PrivateAttr(default=None)
+    _requests: Counter = PrivateAttr(default_factory=Counter)
+    _finished: int = PrivateAttr(default=0)
+    _failed: int = PrivateAttr(default=0)
+    _ignored: int = PrivateAttr(default=0)
+    _encoded_bytes: float = PrivateAttr(default=0)
+
+    def model_post_init(self, __context) -> None:
+        if self.ignore_urls:
+            self._ignore_url_re = re.compile('|'.join(fnmatch.translate(pattern) for pattern in self.ignore_urls))
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            'inflight': len(self._inflight),
+            'requests': sum(self._requests.values()),
+            'finished': self._finished,
+            'failed': self._failed,
+            'ignored': self._ignored,
+            'encoded_bytes': self._encoded_bytes,
+            'by_type': dict(self._requests),
+        }
+
+    def reset_stats(self) -> None:
+        self._requests.clear()
+        self._finished = self._failed = self._ignored = 0
+        self._encoded_bytes = 0
+
+    def request_started(self, event_data: dict) -> None:
+        request_id = event_data['requestId']
+        if request_id in self._inflight:
+            # a redirect keeps the requestId of the request it ends
+            return
+
+        resource_type = event_data.get('type') or 'Other'
+        if resource_type in self.ignore_types or (
+            self._ignore_url_re is not None and self._ignore_url_re.match(event_data['request']['url'])
+        ):
+            self._ignored += 1
+            return
+
+        self._requests[resource_type] += 1
+        self._inflight[request_id] = resource_type
+        if self._waiters:
+            self._update_waiters()
+
+    def request_finished(self, event_data: dict) -> None:
+        if self._inflight.pop(event_data['requestId'], None) is None:
+            return
+        if 'errorText' in event_data:
+            self._failed += 1
+        else:
+            self._finished += 1
+            self._encoded_bytes += event_data.get('encodedDataLength', 0)
+        if self._waiters:
+            self._update_waiters()
+
+    def wait_for_idle(self, idle_time: float, max_inflight: int = 0) -> asyncio.Future:
+        """Wait until at most `max_inflight` requests were in flight for `idle_time` seconds.
+
+        Returns:
+            asyncio.Future: Resolved once idle, cancelling it removes the waiter.
+        """
+        waiter = _IdleWaiter(asyncio.get_running_loop().create_future(), idle_time, max_inflight)
+        waiter.future.add_done_callback(lambda _: self._remove_waiter(waiter))
+        self._waiters.add(waiter)
+        self._update_waiter(waiter)
+        return waiter.future
+
+    def _update_waiters(self) -> None:
+        for waiter in list(self._waiters):
+            self._update_waiter(waiter)
+
+    def _update_waiter(self, waiter: _IdleWaiter) -> None:
+        if len(self._inflight) <= waiter.max_inflight:
+            if waiter.timer is None:
+                waiter.timer = asyncio.get_running_loop().call_later(waiter.idle_time, self._on_idle, waiter)
+        elif waiter.timer is not None:
+            waiter.timer.cancel()
+            waiter.timer = None
+
+    @staticmethod
+    def _on_idle(waiter: _IdleWaiter) -> None:
+        if not waiter.future.done():
+            waiter.future.set_result(None)
+
+    def _remove_waiter(self, waiter: _IdleWaiter) -> None:
+        self._waiters.discard(waiter)
+        if waiter.timer is not None:
+            waiter.timer.cancel()
+            waiter.timer = None
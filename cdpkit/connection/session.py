@@ -1,10 +1,11 @@
 import asyncio
 import inspect
 import json
+import math
 import re
-from collections.abc import AsyncIterable, Callable
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable
 from contextlib import suppress
-from typing import Any
+from typing import Any, Literal
 
 import aiohttp
 import websockets
@@ -12,17 +13,46 @@ from pydantic import BaseModel, PrivateAttr
 from websockets.asyncio.client import ClientConnection
 from websockets.protocol import State
 
-from cdpkit.connection.manager import CommandsManager, EventsManager
+from cdpkit.connection.manager import (
+    LIFECYCLE_EVENTS,
+    CommandsManager,
+    DialogPolicy,
+    EventsManager,
+    ExecutionContextRegistry,
+    FileChooserPolicy,
+    FrameTree,
+    NavigationTracker,
+    NetworkTracker,
+)
 from cdpkit.exception import (
     CallbackParameterError,
     CommandExecutionError,
     CommandExecutionTimeout,
     InvalidResponse,
     NetworkError,
+    ScriptRunError,
+    WaitTimeout,
     WebSocketConnectionClosed,
 )
 from cdpkit.logger import logger
-from cdpkit.protocol import RESULT_TYPE, CDPEvent, CDPMethod, Target
+from cdpkit.protocol import RESULT_TYPE, CDPEvent, CDPMethod, Network, Page, Runtime, Target
+from cdpkit.protocol.base import run_offloaded, should_offload
+from cdpkit.protocol.Page.methods import NavigateOutput
+from cdpkit.protocol.Runtime.methods import CallFunctionOnOutput, EvaluateOutput
+
+# `{"id":1,"result":{...}}`, the shape of every successful command response sent by the browser
+_RESULT_RESPONSE = re.compile(r'\{"id":(\d+),"result":')
+
+# called with (target_id, outgoing, message) for every message sent or received, e.g. by a recorder
+TrafficHook = Callable[[str, bool, str], None]
+
+WaitUntil = Literal[
+    'commit', 'domcontentloaded', 'load', 'networkalmostidle', 'networkidle', 'firstpaint', 'firstcontentfulpaint',
+    'firstmeaningfulpaint'
+]
+
+# awaited with every target session a manager creates, e.g. to enable domains or apply settings to new targets
+SessionHook = Callable[['CDPSession'], Awaitable[None]]
 
 
 class CDPSession(BaseModel):
@@ -33,6 +63,24 @@ class CDPSession(BaseModel):
     _ws_connection: ClientConnection | None = PrivateAttr(default=None)
     _commands_manager: CommandsManager = PrivateAttr(default=CommandsManager())
     _events_manager: EventsManager = PrivateAttr(default=EventsManager())
+    _traffic_hook: TrafficHook | None = PrivateAttr(default=None)
+    _background_tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+    _network_tracker: NetworkTracker | None = PrivateAttr(default=None)
+    _navigation_tracker: NavigationTracker | None = PrivateAttr(default=None)
+    _frame_tree: FrameTree | None = PrivateAttr(default=None)
+    _execution_contexts: ExecutionContextRegistry | None = PrivateAttr(default=None)
+    _world_creations: dict[tuple[str, str], asyncio.Task] = PrivateAttr(default_factory=dict)
+    _tracker_lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+    _connect_lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+    _dialog_policy: DialogPolicy | None = PrivateAttr(default=None)
+    _file_chooser_policy: FileChooserPolicy | None = PrivateAttr(default=None)
+
+    def set_traffic_hook(self, hook: TrafficHook | None) -> None:
+        self._traffic_hook = hook
+
+    @property
+    def pending_commands(self) -> int:
+        return self._commands_manager.pending_count
 
     async def _parse_ws_address(self) -> str:
         if self.target_id == 'browser':
@@ -53,7 +101,10 @@ class CDPSession(BaseModel):
 
     async def _ensure_active_connection(self) -> None:
         if self._ws_connection is None or self._ws_connection.state is State.CLOSED:
-            await self.establish_new_connection()
+            # commands sent together on a new session must share its connection
+            async with self._connect_lock:
+                if self._ws_connection is None or self._ws_connection.state is State.CLOSED:
+                    await self.establish_new_connection()
 
     async def establish_new_connection(self) -> None:
         ws_address = await self._parse_ws_address()
@@ -83,12 +134,16 @@ class CDPSession(BaseModel):
         logger.info(f'execute command: {command}')
 
         try:
-            await self._ws_connection.send(json.dumps(command))
-            response: str = await asyncio.wait_for(future, timeout)
-            resp_json = json.loads(response)
-            if 'error' in resp_json:
-                raise CommandExecutionError(f'Command {command} execution failed: {resp_json["error"]}')
-            return await cdp_method.parse_response(json.dumps(resp_json['result']))
+            message = json.dumps(command)
+            if self._traffic_hook is not None:
+                self._traffic_hook(self.target_id, True, message)
+            await self._ws_connection.send(message)
+            response: dict[str, Any] | str = await asyncio.wait_for(future, timeout)
+            if isinstance(response, str):
+                return await cdp_method.parse_response(response)
+            if 'error' in response:
+                raise CommandExecutionError(f'Command {command} execution failed: {response["error"]}')
+            return await cdp_method.parse_response(response['result'])
         except TimeoutError:
             self._commands_manager.remove_pending_command(_id)
             raise CommandExecutionTimeout()
@@ -96,8 +151,47 @@ class CDPSession(BaseModel):
             await self.close()
             raise WebSocketConnectionClosed()
 
+    def send(self, cdp_method: CDPMethod[RESULT_TYPE], timeout: int = 3) -> asyncio.Task[RESULT_TYPE]:
+        """
+        Execute a command without waiting for its response
+
+        Event callbacks run in the task reading the connection, so they must not await `execute` themselves: the
+        response could only be read once the callback returned. `send` can be used there instead, failures are
+        logged in case the task is never awaited.
+
+        Returns:
+            asyncio.Task[RESULT_TYPE]: The task executing the command.
+        """
+        task = asyncio.create_task(self.execute(cdp_method, timeout))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+        return task
+
+    async def _send_from_reader(self, command: dict[str, Any]) -> None:
+        # writes a command from the reader without a task, its response only resolves a future nobody awaits
+        _id, future = self._commands_manager.create_command_future()
+        command['id'] = _id
+        future.add_done_callback(self._on_reader_command_done)
+        message = json.dumps(command)
+        if self._traffic_hook is not None:
+            self._traffic_hook(self.target_id, True, message)
+        await self._ws_connection.send(message)
+
+    def _on_reader_command_done(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            return
+        response = future.result()
+        if isinstance(response, dict) and 'error' in response:
+            logger.warning(f'Automatic command failed on {self}: {response["error"]}')
+
+    def _on_background_task_done(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f'Background command failed on {self}: {task.exception()!r}')
+
     async def close(self) -> None:
         await self.clear_callbacks()
+        self._network_tracker = None
 
         if self._ws_connection:
             with suppress(websockets.ConnectionClosed):
@@ -117,6 +211,8 @@ class CDPSession(BaseModel):
     async def _receive_events(self) -> None:
         try:
             async for raw_message in self._incoming_messages():
+                if self._traffic_hook is not None:
+                    self._traffic_hook(self.target_id, False, raw_message)
                 await self._process_single_message(raw_message)
         except websockets.ConnectionClosed as exc:
             logger.info(f'Connection closed gracefully: {exc}')
@@ -125,6 +221,14 @@ class CDPSession(BaseModel):
             raise exc
 
     async def _process_single_message(self, raw_message: str) -> None:
+        if should_offload(len(raw_message)):
+            # large command results are handed over undecoded, the command validates them off the event loop
+            match = _RESULT_RESPONSE.match(raw_message)
+            if match and raw_message.endswith('}}'):
+                logger.info(f'Processing large command response: {match.group(1)}')
+                self._commands_manager.resolve_command(raw_message[match.end():-1], int(match.group(1)))
+                return
+
         message = await self._parse_message(raw_message)
         if message is None:
             return
@@ -141,6 +245,8 @@ class CDPSession(BaseModel):
     @staticmethod
     async def _parse_message(raw_message: str) -> dict[str, Any] | None:
         try:
+            if should_offload(len(raw_message)):
+                return await run_offloaded(json.loads, raw_message)
             return json.loads(raw_message)
         except json.JSONDecodeError as exc:
             logger.warning(f'Failed to parse raw message: {raw_message[:200]}, {exc}')
@@ -154,7 +260,20 @@ class CDPSession(BaseModel):
     async def _handle_event_message(self, message: dict[str, Any]) -> None:
         logger.info(f'Processing event message: {message}')
 
-        if 'method' in message:
+        # dialogs and file choosers block their page, they are answered before any callback runs
+        method = message.get('method')
+        try:
+            if method == 'Page.javascriptDialogOpening' and self._dialog_policy is not None:
+                await self._send_from_reader(self._dialog_policy.command(message['params']))
+            elif method == 'Page.fileChooserOpened' and self._file_chooser_policy is not None:
+                if (command := self._file_chooser_policy.command(message['params'])) is not None:
+                    await self._send_from_reader(command)
+        except websockets.ConnectionClosed:
+            raise
+        except Exception as exc:
+            logger.error(f'Error answering {method} on {self}: {exc!r}')
+
+        if method is not None:
             await self._events_manager.process_event(message)
         else:
             logger.warning('unknown event')
@@ -165,24 +284,334 @@ class CDPSession(BaseModel):
     def __repr__(self) -> str:
         return self.__str__()
 
-    async def register_callback(self, event: type[CDPEvent], callback: Callable, temporary: bool = False) -> int:
+    async def register_callback(
+        self, event: type[CDPEvent], callback: Callable, temporary: bool = False, raw: bool = False
+    ) -> int:
         return await self._events_manager.register_callback(
             event=event,
             callback=callback,
-            temporary=temporary
+            temporary=temporary,
+            raw=raw
         )
 
     async def remove_callback(self, callback_id: int) -> bool:
         return await self._events_manager.remove_callback(callback_id)
 
+    async def set_dialog_policy(self, policy: DialogPolicy | None) -> None:
+        """Answer every JavaScript dialog of the session as soon as it is read, None stops answering them.
+
+        The `Page.handleJavaScriptDialog` command is written by the task reading the connection, from the raw event,
+        before the callbacks of the event run.
+        """
+        self._dialog_policy = policy
+        if policy is not None:
+            await self.execute(Page.Enable())
+
+    async def set_file_chooser_policy(self, policy: FileChooserPolicy | None) -> None:
+        """Intercept the file choosers of the session and choose their files as soon as they are read, see
+        `set_dialog_policy`. None lets the file choosers open again.
+        """
+        self._file_chooser_policy = policy
+        await asyncio.gather(
+            self.send(Page.Enable()), self.send(Page.SetInterceptFileChooserDialog(enabled=policy is not None))
+        )
+
+    @property
+    def network_tracker(self) -> NetworkTracker | None:
+        return self._network_tracker
+
+    async def track_network(
+        self, ignore_types: Iterable[str] | None = None, ignore_urls: list[str] | None = None
+    ) -> NetworkTracker:
+        """Count the requests in flight on the session, once per session.
+
+        Args:
+            ignore_types (Iterable[str] | None): Resource types not counted, defaults to WebSocket, EventSource,
+                Ping and CSPViolationReport.
+            ignore_urls (list[str] | None): Glob patterns of urls not counted, e.g. long-polling endpoints.
+
+        Returns:
+            NetworkTracker: The tracker of the session.
+        """
+        async with self._tracker_lock:
+            if self._network_tracker is not None:
+                return self._network_tracker
+
+            options = {}
+            if ignore_types is not None:
+                options['ignore_types'] = frozenset(ignore_types)
+            if ignore_urls is not None:
+                options['ignore_urls'] = ignore_urls
+            tracker = NetworkTracker(**options)
+
+            await self.register_callback(Network.RequestWillBeSent, tracker.request_started, raw=True)
+            await self.register_callback(Network.LoadingFinished, tracker.request_finished, raw=True)
+            await self.register_callback(Network.LoadingFailed, tracker.request_finished, raw=True)
+            await self.execute(Network.Enable())
+            self._network_tracker = tracker
+            return tracker
+
+    async def network_idle(self, idle_ms: int = 500, max_inflight: int = 0, timeout: float | None = 30) -> None:
+        """Wait until at most `max_inflight` requests were in flight for `idle_ms` milliseconds.
+
+        Starts tracking the network of the session on first use, requests sent before are not known.
+
+        Raises:
+            WaitTimeout: The network was not idle within `timeout` seconds.
+        """
+        tracker = await self.track_network()
+        try:
+            await asyncio.wait_for(tracker.wait_for_idle(idle_ms / 1000, max_inflight), timeout)
+        except TimeoutError:
+            raise WaitTimeout(f'Network of {self} not idle after {timeout}s, {tracker.inflight} requests in flight')
+
+    @property
+    def navigation_tracker(self) -> NavigationTracker | None:
+        return self._navigation_tracker
+
+    async def track_navigation(self) -> NavigationTracker:
+        """ Record the lifecycle events of the documents of the session, once per session. """
+        async with self._tracker_lock:
+            if self._navigation_tracker is not None:
+                return self._navigation_tracker
+
+            tracker = NavigationTracker(main_frame_id=self.target_id)
+            await self.register_callback(Page.LifecycleEvent, tracker.lifecycle_event, raw=True)
+            await self.register_callback(Page.FrameStoppedLoading, tracker.frame_stopped_loading, raw=True)
+            await self.register_callback(Page.LoadEventFired, tracker.load_event_fired, raw=True)
+            await self.register_callback(Page.FrameDetached, tracker.frame_detached, raw=True)
+            await asyncio.gather(
+                self.send(Page.Enable()), self.send(Page.SetLifecycleEventsEnabled(enabled=True))
+            )
+            self._navigation_tracker = tracker
+            return tracker
+
+    async def frame_tree(self) -> FrameTree:
+        """The frames of the session, fetched once and then kept up to date by the frame events.
+
+        Returns:
+            FrameTree: The frame tree of the session, with the default execution context of every frame.
+        """
+        async with self._tracker_lock:
+            if self._frame_tree is not None:
+                return self._frame_tree
+
+            tree = FrameTree(contexts=await self._track_contexts())
+            for event, callback in (
+                (Page.FrameAttached, tree.frame_attached),
+                (Page.FrameDetached, tree.frame_detached),
+                (Page.FrameNavigated, tree.frame_navigated),
+                (Page.NavigatedWithinDocument, tree.navigated_within_document),
+            ):
+                await self.register_callback(event, callback, raw=True)
+            # events read until the frame tree is loaded are replayed on top of it
+            _, result = await asyncio.gather(self.send(Page.Enable()), self.send(Page.GetFrameTree()))
+            tree.load(result.frameTree.model_dump(exclude_none=True))
+            self._frame_tree = tree
+            return tree
+
+    @property
+    def execution_context_registry(self) -> ExecutionContextRegistry | None:
+        return self._execution_contexts
+
+    async def execution_contexts(self) -> ExecutionContextRegistry:
+        """ The execution contexts of the frames of the session by frame and world, tracked once per session. """
+        async with self._tracker_lock:
+            return await self._track_contexts()
+
+    async def _track_contexts(self) -> ExecutionContextRegistry:
+        # called with the tracker lock held
+        if self._execution_contexts is not None:
+            return self._execution_contexts
+
+        registry = ExecutionContextRegistry()
+        await self.register_callback(Runtime.ExecutionContextCreated, registry.execution_context_created, raw=True)
+        await self.register_callback(Runtime.ExecutionContextDestroyed, registry.execution_context_destroyed, raw=True)
+        await self.register_callback(Runtime.ExecutionContextsCleared, registry.execution_contexts_cleared, raw=True)
+        # enabling the domain reports every existing context before its response
+        await self.execute(Runtime.Enable())
+        self._execution_contexts = registry
+        return registry
+
+    async def execution_context(
+        self, frame_id: Page.FrameId | None = None, world_name: str = '', timeout: float = 10
+    ) -> Runtime.ExecutionContextId:
+        """The execution context of a frame in a world, creating an isolated world the first time it is asked for.
+
+        A known context is a dict lookup. An isolated world is created once per frame and document: concurrent
+        callers share the creation, and a navigation drops the contexts of the previous document, so the next call
+        creates the world again.
+
+        Args:
+            frame_id (Page.FrameId | None): The frame, the main frame by default.
+            world_name (str): The name of an isolated world, the default world of the frame if empty.
+            timeout (float): Seconds before giving up.
+
+        Raises:
+            WaitTimeout: The context was not created within `timeout` seconds.
+        """
+        contexts = await self.execution_contexts()
+        frame_id = frame_id or self.target_id
+        if (context_id := contexts.context_id(frame_id, world_name)) is not None:
+            return context_id
+
+        waiter = contexts.wait_for(frame_id, world_name)
+        try:
+            async with asyncio.timeout(timeout):
+                if not world_name:
+                    return await waiter
+                key = (frame_id, world_name)
+                creation = self._world_creations.get(key)
+                if creation is None:
+                    creation = self._world_creations[key] = self.send(
+                        Page.CreateIsolatedWorld(frame_id=frame_id, world_name=world_name), math.ceil(timeout)
+                    )
+                    creation.add_done_callback(lambda _: self._world_creations.pop(key, None))
+                result = await asyncio.shield(creation)
+                # the created event usually arrives before the response
+                return waiter.result() if waiter.done() else result.executionContextId
+        except (TimeoutError, CommandExecutionTimeout):
+            raise WaitTimeout(f'No execution context for world {world_name!r} of frame {frame_id} within {timeout}s')
+        finally:
+            waiter.cancel()
+
+    async def evaluate(
+        self,
+        expression: str,
+        frame_id: Page.FrameId | None = None,
+        world_name: str = '',
+        await_promise: bool = True,
+        timeout: float = 30
+    ) -> Any:
+        """Evaluate an expression in a frame and world, see `execution_context`.
+
+        Returns:
+            Any: The value of the expression, serialized by value.
+
+        Raises:
+            ScriptRunError: The expression threw.
+        """
+        context_id = await self.execution_context(frame_id, world_name, timeout)
+        result = await self.execute(
+            Runtime.Evaluate(
+                expression=expression, context_id=context_id, return_by_value=True, await_promise=await_promise
+            ),
+            math.ceil(timeout)
+        )
+        return self._script_value(result)
+
+    async def call_function(
+        self,
+        function_declaration: str,
+        *args: Any,
+        frame_id: Page.FrameId | None = None,
+        world_name: str = '',
+        await_promise: bool = True,
+        timeout: float = 30
+    ) -> Any:
+        """Call a function with JSON serializable arguments in a frame and world, see `execution_context`.
+
+        The arguments are sent as one array spread by a wrapper function, so None arrives as null.
+
+        Returns:
+            Any: The return value of the function, serialized by value.
+
+        Raises:
+            ScriptRunError: The function threw.
+        """
+        context_id = await self.execution_context(frame_id, world_name, timeout)
+        arguments = None
+        if args:
+            # a None `CallArgument` value is dropped on the wire and the function would get undefined, inside one
+            # array value it stays null
+            function_declaration = f'function(args) {{ return ({function_declaration}).apply(this, args) }}'
+            arguments = [Runtime.CallArgument(value=list(args))]
+        result = await self.execute(
+            Runtime.CallFunctionOn(
+                function_declaration=function_declaration,
+                arguments=arguments,
+                execution_context_id=context_id,
+                return_by_value=True,
+                await_promise=await_promise
+            ),
+            math.ceil(timeout)
+        )
+        return self._script_value(result)
+
+    @staticmethod
+    def _script_value(result: EvaluateOutput | CallFunctionOnOutput) -> Any:
+        if (details := result.exceptionDetails) is not None:
+            description = details.exception.description if details.exception is not None else None
+            raise ScriptRunError(description or details.text)
+        return result.result.value
+
+    async def goto(
+        self,
+        url: str,
+        wait_until: WaitUntil | Iterable[WaitUntil] = 'load',
+        timeout: float = 30,
+        referrer: str | None = None,
+        frame_id: Page.FrameId | None = None
+    ) -> NavigateOutput:
+        """Navigate a frame and wait for the lifecycle events of the new document.
+
+        The events are matched by the loader id of the navigation. A single deadline covers the navigation and the
+        wait; the listeners are registered once per session, so navigations of many pages can run concurrently.
+
+        Args:
+            url (str): The url to navigate to.
+            wait_until (WaitUntil | Iterable[WaitUntil]): The events to wait for, all of them if several.
+            timeout (float): Seconds before giving up.
+            referrer (str | None): The referrer of the navigation.
+            frame_id (Page.FrameId | None): The frame to navigate, the main frame by default.
+
+        Raises:
+            NetworkError: The navigation failed or was replaced by another one.
+            WaitTimeout: The events did not fire within `timeout` seconds.
+        """
+        names = [wait_until] if isinstance(wait_until, str) else list(wait_until)
+        events = {LIFECYCLE_EVENTS[name] for name in names} - {None}
+        tracker = await self.track_navigation()
+        try:
+            async with asyncio.timeout(timeout):
+                result = await self.execute(
+                    Page.Navigate(url=url, referrer=referrer, frame_id=frame_id), math.ceil(timeout)
+                )
+                if result.errorText:
+                    raise NetworkError(f'Navigation to {url} failed: {result.errorText}')
+                if result.loaderId is None or not events:
+                    # navigations within the document have no loader and no lifecycle
+                    return result
+                await tracker.wait_for(result.frameId, result.loaderId, events)
+                return result
+        except (TimeoutError, CommandExecutionTimeout):
+            raise WaitTimeout(f'Navigation of {self} to {url} did not reach {", ".join(names)} within {timeout}s')
+
     async def clear_callbacks(self):
         await self._events_manager.clear_callbacks()
+        # the trackers are fed by callbacks
+        self._network_tracker = None
+        self._navigation_tracker = None
+        self._frame_tree = None
+        self._execution_contexts = None
 
 
 class CDPSessionManager(BaseModel):
     ws_endpoint: str
 
     _connection_session: dict[str, CDPSession] = PrivateAttr(default_factory=dict)
+    _traffic_hook: TrafficHook | None = PrivateAttr(default=None)
+    _session_hooks: list[SessionHook] = PrivateAttr(default_factory=list)
+    _hooks_running: dict[str, asyncio.Future] = PrivateAttr(default_factory=dict)
+    _watch_callback_ids: list[int] = PrivateAttr(default_factory=list)
+    _watched_types: set[str] = PrivateAttr(default_factory=set)
+    _background_tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+
+    def set_traffic_hook(self, hook: TrafficHook | None) -> None:
+        """ Set the traffic hook of every current and future session of the manager. """
+        self._traffic_hook = hook
+        for cdp_session in self._connection_session.values():
+            cdp_session.set_traffic_hook(hook)
 
     async def remove_session(self, target_id: Target.TargetID = 'browser') -> None:
         if target_id in self._connection_session:
@@ -195,12 +624,124 @@ class CDPSessionManager(BaseModel):
                 ws_endpoint=self.ws_endpoint,
                 target_id=target_id,
             )
+            cdp_session.set_traffic_hook(self._traffic_hook)
             self._connection_session[target_id] = cdp_session
+            if self._session_hooks and target_id != 'browser':
+                self._hooks_running[target_id] = asyncio.ensure_future(
+                    self._apply_hooks(cdp_session, list(self._session_hooks))
+                )
         else:
             cdp_session = self._connection_session[target_id]
 
+        # concurrent callers of a new target all wait until its hooks have run
+        if (hooks_running := self._hooks_running.get(target_id)) is not None:
+            await asyncio.shield(hooks_running)
+            self._hooks_running.pop(target_id, None)
+
         return cdp_session
 
+    async def add_session_hook(self, hook: SessionHook, apply_now: bool = True) -> dict[str, BaseException | None]:
+        """Run a hook on every current and future target session of the manager.
+
+        Hooks run in the order they were added, before `get_session` returns a new session. Failures are logged
+        and do not prevent the session from being returned.
+
+        Args:
+            hook (SessionHook): Coroutine function called with the session.
+            apply_now (bool): Also run the hook on the current sessions.
+
+        Returns:
+            dict[str, BaseException | None]: Target id to the exception raised by the hook on the current sessions,
+                None where it succeeded.
+        """
+        self._session_hooks.append(hook)
+        if not apply_now:
+            return {}
+        target_sessions = [
+            cdp_session for target_id, cdp_session in self._connection_session.items() if target_id != 'browser'
+        ]
+        results = await asyncio.gather(*(self._apply_hooks(cdp_session, [hook]) for cdp_session in target_sessions))
+        return {cdp_session.target_id: result for cdp_session, result in zip(target_sessions, results)}
+
+    def remove_session_hook(self, hook: SessionHook) -> None:
+        with suppress(ValueError):
+            self._session_hooks.remove(hook)
+
+    @staticmethod
+    async def _apply_hooks(cdp_session: CDPSession, hooks: list[SessionHook]) -> BaseException | None:
+        for hook in hooks:
+            try:
+                await hook(cdp_session)
+            except Exception as exc:
+                logger.error(f'Error running session hook {hook} on {cdp_session}: {exc!r}')
+                return exc
+        return None
+
+    async def watch_targets(self, target_types: Iterable[str] = ('page', 'iframe')) -> None:
+        """Open a session, running the session hooks, for every current and future target of the given types.
+
+        Targets are discovered with `Target.setDiscoverTargets` on the browser session and their sessions removed
+        once they are destroyed. Types add up over calls. Returns once the hooks ran on the current targets.
+
+        Args:
+            target_types (Iterable[str]): Target types to open sessions for, e.g. 'page', 'iframe', 'worker'.
+        """
+        browser_session = await self.get_session()
+        self._watched_types.update(target_types)
+
+        if not self._watch_callback_ids:
+            self._watch_callback_ids = [
+                await browser_session.register_callback(Target.TargetCreated, self._on_target_created, raw=True),
+                await browser_session.register_callback(Target.TargetDestroyed, self._on_target_destroyed, raw=True),
+            ]
+            await browser_session.execute(Target.SetDiscoverTargets(discover=True))
+
+        targets_resp = await browser_session.execute(Target.GetTargets())
+        await asyncio.gather(*(
+            self.get_session(target_info.targetId) for target_info in targets_resp.targetInfos
+            if target_info.type in self._watched_types
+        ))
+
+    async def unwatch_targets(self) -> None:
+        self._watched_types.clear()
+        if not self._watch_callback_ids or 'browser' not in self._connection_session:
+            return
+        browser_session = self._connection_session['browser']
+        for callback_id in self._watch_callback_ids:
+            await browser_session.remove_callback(callback_id)
+        self._watch_callback_ids = []
+
+    def _on_target_created(self, event_data: dict) -> None:
+        target_info = event_data['targetInfo']
+        if target_info['type'] in self._watched_types and target_info['targetId'] not in self._connection_session:
+            self._spawn(self.get_session(target_info['targetId']))
+
+    def _on_target_destroyed(self, event_data: dict) -> None:
+        if event_data['targetId'] in self._connection_session:
+            self._spawn(self.remove_session(event_data['targetId']))
+
+    def _spawn(self, coro: Awaitable) -> None:
+        # watch callbacks run in the reader of the browser session, new sessions are opened beside it
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    @property
+    def sessions(self) -> dict[str, CDPSession]:
+        return dict(self._connection_session)
+
+    @property
+    def pending_commands(self) -> int:
+        return sum(cdp_session.pending_commands for cdp_session in self._connection_session.values())
+
+    async def close(self) -> None:
+        for task in self._background_tasks:
+            task.cancel()
+        self._watch_callback_ids = []
+        self._watched_types.clear()
+        for target_id in list(self._connection_session):
+            await self.remove_session(target_id)
+
     def __str__(self):
         return f'CDPSessionManager(ws_endpoint={self.ws_endpoint})'
 
@@ -212,7 +753,7 @@ class CDPSessionExecutor(BaseModel):
     session: CDPSession | None = None
     session_manager: CDPSessionManager | None = None
 
-    async def on(self, event: type[CDPEvent], callback: callable, temporary: bool = False) -> int:
+    async def on(self, event: type[CDPEvent], callback: callable, temporary: bool = False, raw: bool = False) -> int:
         """
 
         Examples:
@@ -220,9 +761,15 @@ class CDPSessionExecutor(BaseModel):
                 ...
 
             await session.on(event=TargetCreated, callback=_on_target_created)
+
+            # raw=True skips pydantic validation, event_data is the `params` dict of the event
+            async def _on_frame(event_data: dict):
+                ...
+
+            await session.on(event=Network.WebSocketFrameReceived, callback=_on_frame, raw=True)
         """
         sig = inspect.signature(callback)
-        if 'event_data' in sig.parameters:
+        if 'event_data' in sig.parameters and not raw:
             # raise CallbackParameterError('Required parameter "event_data" not found in callback function')
             event_data_type = sig.parameters["event_data"].annotation
 
@@ -243,7 +790,7 @@ class CDPSessionExecutor(BaseModel):
                     f"Expected {event_name}, but got {event_data_type.__name__}."
                 )
         return await self.session.register_callback(
-            event, callback, temporary
+            event, callback, temporary, raw
         )
 
     async def execute_method(self, cdp_method: CDPMethod[RESULT_TYPE], timeout: int = 60) -> RESULT_TYPE:
@@ -0,0 +1,355 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import pickle
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import suppress
+from functools import partial
+from typing import Any, NamedTuple
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from cdpkit.connection.session import CDPSession, CDPSessionManager
+from cdpkit.exception import ShardJobError
+from cdpkit.logger import logger
+from cdpkit.protocol import CDPEvent, Target
+
+__all__ = [
+    'CDPShardCoordinator',
+    'ShardEvent',
+    'ShardJob'
+]
+
+# coordinator -> shard
+_JOB, _SUBSCRIBE, _UNSUBSCRIBE, _CLOSE = range(4)
+# shard -> coordinator
+_RESULT, _EVENTS = range(2)
+
+ShardJob = Callable[..., Awaitable[Any]]
+
+
+class ShardEvent(NamedTuple):
+    """
+    An event streamed back from a shard
+
+    The params are kept as the compact JSON text sent by the shard, validation only happens on `parse`.
+    """
+    subscription_id: int
+    target_id: str
+    event_name: str
+    params: str
+
+    def parse(self, event: type[CDPEvent]) -> CDPEvent:
+        return event.model_validate_json(self.params)
+
+
+class _ShardWorker:
+    """ Runs inside the shard process, owns an event loop and the connections of the targets of the shard. """
+
+    def __init__(self, shard_index: int, ws_endpoint: str, inbox, outbox):
+        self._shard_index = shard_index
+        self._inbox = inbox
+        self._outbox = outbox
+        self._session_manager = CDPSessionManager(ws_endpoint=ws_endpoint)
+        self._subscriptions: dict[int, tuple[CDPSession, int]] = {}
+        self._event_batch: list[tuple[int, str, str, str]] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        logger.info(f'Shard {self._shard_index} started in process {os.getpid()}')
+
+        while True:
+            message = await loop.run_in_executor(None, self._inbox.get)
+            kind = message[0]
+            if kind == _CLOSE:
+                break
+            elif kind == _JOB:
+                task = asyncio.create_task(self._run_job(*message[1:]))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            elif kind == _SUBSCRIBE:
+                await self._subscribe(*message[1:])
+            elif kind == _UNSUBSCRIBE:
+                await self._unsubscribe(*message[1:])
+
+        for task in self._tasks:
+            task.cancel()
+        await self._session_manager.close()
+        self._flush_events()
+
+    async def _run_job(self, job_id: int, target_id: str, job_payload: bytes) -> None:
+        try:
+            job, args, kwargs = pickle.loads(job_payload)
+            cdp_session = await self._session_manager.get_session(target_id)
+            payload = pickle.dumps(await job(cdp_session, *args, **kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+            ok = True
+        except Exception as exc:
+            try:
+                payload = pickle.dumps(exc, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                payload = pickle.dumps(ShardJobError(f'{type(exc).__name__}: {exc}'))
+            ok = False
+        self._outbox.put((_RESULT, job_id, ok, payload))
+
+    async def _subscribe(self, subscription_id: int, target_id: str, event: type[CDPEvent]) -> None:
+        cdp_session = await self._session_manager.get_session(target_id)
+        callback_id = await cdp_session.register_callback(
+            event,
+            partial(self._on_event, subscription_id=subscription_id, target_id=target_id, event_name=event.EVENT_NAME),
+            raw=True
+        )
+        self._subscriptions[subscription_id] = (cdp_session, callback_id)
+
+    async def _unsubscribe(self, subscription_id: int) -> None:
+        if subscription_id in self._subscriptions:
+            cdp_session, callback_id = self._subscriptions.pop(subscription_id)
+            await cdp_session.remove_callback(callback_id)
+
+    def _on_event(self, subscription_id: int, target_id: str, event_name: str, event_data: dict) -> None:
+        if not self._event_batch:
+            asyncio.get_running_loop().call_soon(self._flush_events)
+        self._event_batch.append(
+            (subscription_id, target_id, event_name, json.dumps(event_data, separators=(',', ':')))
+        )
+
+    def _flush_events(self) -> None:
+        if self._event_batch:
+            self._outbox.put((_EVENTS, self._event_batch))
+            self._event_batch = []
+
+
+def _shard_main(shard_index: int, ws_endpoint: str, inbox, outbox) -> None:
+    asyncio.run(_ShardWorker(shard_index, ws_endpoint, inbox, outbox).run())
+
+
+class CDPShardCoordinator(BaseModel):
+    """
+    Spreads the sessions of a browser across worker processes
+
+    Every shard is a process with its own event loop and connections, so message decoding and validation of
+    busy pages run on several cores. A target always stays on the shard it was first assigned to.
+
+    Jobs are importable coroutine functions `async def job(session: CDPSession, *args, **kwargs)`, they run in the
+    shard owning the target and their return value is pickled back. Subscribed events are streamed back in batches
+    as compact JSON and are only validated when `ShardEvent.parse` is called.
+
+    Examples:
+        async def get_title(session: CDPSession) -> str:
+            resp = await session.execute(Runtime.Evaluate(expression='document.title'))
+            return resp.result.value
+
+        async def main():
+            coordinator = CDPShardCoordinator(ws_endpoint='localhost:9222', workers=4)
+            await coordinator.start()
+            titles = await coordinator.gather((target_id, get_title) for target_id in target_ids)
+
+        if __name__ == '__main__':
+            asyncio.run(main())
+    """
+    ws_endpoint: str
+    workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    event_queue_size: int = 10000
+    monitor_interval: float = 1.0
+
+    _context: Any = PrivateAttr(default=None)
+    _processes: list = PrivateAttr(default_factory=list)
+    _inboxes: list = PrivateAttr(default_factory=list)
+    _outbox: Any = PrivateAttr(default=None)
+    _reader_thread: threading.Thread | None = PrivateAttr(default=None)
+    _monitor_task: asyncio.Task | None = PrivateAttr(default=None)
+    _loop: asyncio.AbstractEventLoop | None = PrivateAttr(default=None)
+
+    _job_id: int = PrivateAttr(default=0)
+    _pending_jobs: dict[int, tuple[int, asyncio.Future]] = PrivateAttr(default_factory=dict)
+    _subscription_id: int = PrivateAttr(default=0)
+    _subscriptions: dict[int, int] = PrivateAttr(default_factory=dict)
+    _target_shards: dict[str, int] = PrivateAttr(default_factory=dict)
+    _shard_loads: list[int] = PrivateAttr(default_factory=list)
+    _events: asyncio.Queue | None = PrivateAttr(default=None)
+    _dropped_events: int = PrivateAttr(default=0)
+
+    @property
+    def dropped_events(self) -> int:
+        return self._dropped_events
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._context = multiprocessing.get_context('spawn')
+        self._outbox = self._context.Queue()
+        self._events = asyncio.Queue(self.event_queue_size)
+
+        for shard_index in range(self.workers):
+            self._inboxes.append(None)
+            self._processes.append(None)
+            self._shard_loads.append(0)
+            self._spawn_shard(shard_index)
+
+        self._reader_thread = threading.Thread(target=self._read_outbox, name='cdpkit-shard-reader', daemon=True)
+        self._reader_thread.start()
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    def _spawn_shard(self, shard_index: int) -> None:
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=_shard_main,
+            args=(shard_index, self.ws_endpoint, inbox, self._outbox),
+            name=f'cdpkit-shard-{shard_index}',
+            daemon=True
+        )
+        process.start()
+        self._inboxes[shard_index] = inbox
+        self._processes[shard_index] = process
+
+    def _read_outbox(self) -> None:
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                break
+            self._loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: tuple) -> None:
+        if message[0] == _RESULT:
+            _, job_id, ok, payload = message
+            if job_id not in self._pending_jobs:
+                return
+            _, future = self._pending_jobs.pop(job_id)
+            if future.done():
+                return
+            try:
+                result = pickle.loads(payload)
+            except Exception as exc:
+                # e.g. a class the shard could import but this process cannot
+                future.set_exception(ShardJobError(f'Cannot unpickle the result of job {job_id}: {exc!r}'))
+                return
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+        else:
+            for subscription_id, target_id, event_name, params in message[1]:
+                try:
+                    self._events.put_nowait(ShardEvent(subscription_id, target_id, event_name, params))
+                except asyncio.QueueFull:
+                    self._dropped_events += 1
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.monitor_interval)
+            for shard_index, process in enumerate(self._processes):
+                if process.is_alive():
+                    continue
+                logger.error(f'Shard {shard_index} exited with code {process.exitcode}, restarting it')
+                self._fail_jobs(ShardJobError(f'Shard {shard_index} exited.'), shard_index)
+                for subscription_id in [k for k, v in self._subscriptions.items() if v == shard_index]:
+                    del self._subscriptions[subscription_id]
+                self._spawn_shard(shard_index)
+
+    def _fail_jobs(self, exc: Exception, shard_index: int | None = None) -> None:
+        for job_id, (job_shard, future) in list(self._pending_jobs.items()):
+            if shard_index is None or job_shard == shard_index:
+                del self._pending_jobs[job_id]
+                if not future.done():
+                    future.set_exception(exc)
+
+    def shard_of(self, target_id: Target.TargetID) -> int:
+        """ Return the shard owning the target, assigning new targets to the shard with the fewest targets. """
+        if target_id not in self._target_shards:
+            shard_index = min(range(self.workers), key=self._shard_loads.__getitem__)
+            self._target_shards[target_id] = shard_index
+            self._shard_loads[shard_index] += 1
+        return self._target_shards[target_id]
+
+    def release_target(self, target_id: Target.TargetID) -> None:
+        if target_id in self._target_shards:
+            self._shard_loads[self._target_shards.pop(target_id)] -= 1
+
+    def submit(self, target_id: Target.TargetID, job: ShardJob, *args, **kwargs) -> asyncio.Future:
+        """
+        Run a job against a target in the shard owning it
+
+        Args:
+            target_id (Target.TargetID): The target the job session is created for, 'browser' for the browser.
+            job (ShardJob): An importable coroutine function called with the session and the extra arguments.
+
+        Returns:
+            asyncio.Future: Resolved with the return value of the job, failed with `ShardJobError` if the job or its
+                arguments cannot be pickled.
+        """
+        self._job_id += 1
+        future = self._loop.create_future()
+        try:
+            # the inbox pickles in its feeder thread, where a failure would only be printed and the job lost
+            job_payload = pickle.dumps((job, args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as exc:
+            future.set_exception(ShardJobError(f'Cannot pickle job {self._job_id} ({job!r}): {exc!r}'))
+            return future
+        shard_index = self.shard_of(target_id)
+        self._pending_jobs[self._job_id] = (shard_index, future)
+        self._inboxes[shard_index].put((_JOB, self._job_id, target_id, job_payload))
+        return future
+
+    async def gather(
+        self, jobs: Iterable[tuple], return_exceptions: bool = False
+    ) -> list[Any]:
+        """
+        Run many jobs concurrently
+
+        Args:
+            jobs (Iterable[tuple]): Items of `(target_id, job, *args)`.
+            return_exceptions (bool): Same as `asyncio.gather`.
+        """
+        futures = [self.submit(target_id, job, *args) for target_id, job, *args in jobs]
+        return await asyncio.gather(*futures, return_exceptions=return_exceptions)
+
+    async def subscribe(self, target_id: Target.TargetID, event: type[CDPEvent]) -> int:
+        self._subscription_id += 1
+        shard_index = self.shard_of(target_id)
+        self._subscriptions[self._subscription_id] = shard_index
+        self._inboxes[shard_index].put((_SUBSCRIBE, self._subscription_id, target_id, event))
+        return self._subscription_id
+
+    async def unsubscribe(self, subscription_id: int) -> bool:
+        if subscription_id not in self._subscriptions:
+            return False
+        shard_index = self._subscriptions.pop(subscription_id)
+        self._inboxes[shard_index].put((_UNSUBSCRIBE, subscription_id))
+        return True
+
+    async def events(self) -> AsyncIterator[ShardEvent]:
+        """ Iterate over the events of all subscriptions until the coordinator is closed. """
+        while True:
+            shard_event = await self._events.get()
+            if shard_event is None:
+                return
+            yield shard_event
+
+    async def close(self, timeout: float = 5) -> None:
+        if self._monitor_task and not self._monitor_task.done():
+            self._monitor_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._monitor_task
+
+        for inbox in self._inboxes:
+            inbox.put((_CLOSE,))
+        for process in self._processes:
+            await asyncio.to_thread(process.join, timeout)
+            if process.is_alive():
+                process.terminate()
+
+        self._outbox.put(None)
+        await asyncio.to_thread(self._reader_thread.join)
+        self._fail_jobs(ShardJobError('The coordinator is closed.'))
+
+        if self._events.full():
+            self._events.get_nowait()
+        self._events.put_nowait(None)
+        logger.info('Shard coordinator closed')
+
+    def __str__(self) -> str:
+        return f'CDPShardCoordinator(ws_endpoint={self.ws_endpoint}, workers={self.workers})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
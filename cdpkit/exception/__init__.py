@@ -16,6 +16,9 @@ from .connection import (
     InvalidCallback,
     InvalidResponse,
     NetworkError,
+    NoAvailableBrowser,
+    ShardJobError,
+    WaitTimeout,
     WebSocketConnectionClosed,
 )
 from .generate import GeneratorNameNotFound
@@ -37,5 +40,8 @@ __all__ = [
     'ArgumentAlreadyExistsInOptions',
     'ParamsMustSpecified',
     'ScriptRunError',
-    'CommandExecutionError'
+    'CommandExecutionError',
+    'NoAvailableBrowser',
+    'ShardJobError',
+    'WaitTimeout'
 ]
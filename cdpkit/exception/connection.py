@@ -27,3 +27,15 @@ class CommandExecutionError(CustomException):
 
 class WebSocketConnectionClosed(CustomException):
     ERROR_INFO = 'The WebSocket connection is closed'
+
+
+class NoAvailableBrowser(CustomException):
+    ERROR_INFO = 'No available browser in the cluster.'
+
+
+class ShardJobError(CustomException):
+    ERROR_INFO = 'The job failed in the shard worker.'
+
+
+class WaitTimeout(CustomException):
+    ERROR_INFO = 'The awaited condition was not met in time.'
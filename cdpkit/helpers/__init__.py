@@ -0,0 +1,62 @@
+from .blocking import BLOCK_PROFILES, ResourceBlocker, compact_patterns, domain_patterns
+from .bodies import BodyCallback, BodyHarvester, HarvestedBody
+from .cache import CacheEntry, CacheRule, ResponseCache, ResponseStore
+from .cookies import CookieJar, CookieSync, CookieSyncReport
+from .downloads import Download, DownloadManager
+from .har import HarRecorder, HarWriter
+from .interception import InterceptionEngine, InterceptRule, RuleMatcher, glob_to_regex
+from .io import read_stream
+from .pdf import PdfExporter, PdfSink
+from .screencast import ScreencastFrame, ScreencastRecorder, ffmpeg_command
+from .screenshots import ChangeDetector, Screenshot, ScreenshotService, perceptual_hash
+from .scripts import InitScript, InitScriptRegistry
+from .streams import ResponseStream, ServerSentEvent, StreamReassembler
+from .throttling import THROTTLING_PROFILES, ThrottlingController, ThrottlingProfile, ThrottlingReport
+from .websocket import CapturedFrame, WebSocketCapture, WebSocketLog
+
+__all__ = [
+    'BLOCK_PROFILES',
+    'THROTTLING_PROFILES',
+    'BodyCallback',
+    'BodyHarvester',
+    'CacheEntry',
+    'CacheRule',
+    'CapturedFrame',
+    'ChangeDetector',
+    'CookieJar',
+    'CookieSync',
+    'CookieSyncReport',
+    'Download',
+    'DownloadManager',
+    'HarRecorder',
+    'HarWriter',
+    'HarvestedBody',
+    'InitScript',
+    'InitScriptRegistry',
+    'InterceptionEngine',
+    'InterceptRule',
+    'PdfExporter',
+    'PdfSink',
+    'ResourceBlocker',
+    'ResponseCache',
+    'ResponseStore',
+    'ResponseStream',
+    'RuleMatcher',
+    'ScreencastFrame',
+    'ScreencastRecorder',
+    'Screenshot',
+    'ScreenshotService',
+    'ServerSentEvent',
+    'StreamReassembler',
+    'ThrottlingController',
+    'ThrottlingProfile',
+    'ThrottlingReport',
+    'WebSocketCapture',
+    'WebSocketLog',
+    'compact_patterns',
+    'domain_patterns',
+    'ffmpeg_command',
+    'glob_to_regex',
+    'perceptual_hash',
+    'read_stream'
+]
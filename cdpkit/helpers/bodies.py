@@ -0,0 +1,384 @@
+import asyncio
+import base64
+import inspect
+import mimetypes
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession
+from cdpkit.exception.base import CustomException
+from cdpkit.logger import logger
+from cdpkit.protocol import Network
+from cdpkit.protocol.base import run_offloaded
+
+__all__ = [
+    'HarvestedBody',
+    'BodyCallback',
+    'BodyHarvester'
+]
+
+# base64 is decoded in slices so that the thread decoding a large body regularly releases the GIL
+_DECODE_SLICE = 64 * 1024 * 4
+# responses tracked until they finish, requests that never finish are forgotten oldest first
+_MAX_TRACKED = 10000
+
+
+class HarvestedBody(NamedTuple):
+    request_id: str
+    url: str
+    mime_type: str
+    resource_type: str
+    size: int
+    # None when the body was written to `path`
+    body: bytes | None
+    path: Path | None
+
+
+BodyCallback = Callable[[HarvestedBody], Awaitable[None] | None]
+
+
+def _decode(data: str, base64_encoded: bool, path: Path | None) -> tuple[bytes | None, int]:
+    """ Decode a body and write it to path if given, runs in the offload pool. """
+    if base64_encoded:
+        chunks = (base64.b64decode(data[i:i + _DECODE_SLICE]) for i in range(0, len(data), _DECODE_SLICE))
+    else:
+        chunks = (data.encode(),)
+
+    if path is None:
+        body = b''.join(chunks)
+        return body, len(body)
+    size = 0
+    with open(path, 'wb') as f:
+        for chunk in chunks:
+            size += f.write(chunk)
+    return None, size
+
+
+class _Response:
+    __slots__ = ('url', 'mime_type', 'resource_type', 'priority', 'stream', 'stream_size', 'pending', 'ready',
+                 'finished', 'writer')
+
+    def __init__(self, url: str, mime_type: str, resource_type: str, priority: int) -> None:
+        self.url = url
+        self.mime_type = mime_type
+        self.resource_type = resource_type
+        self.priority = priority
+        # streamed bodies, chunks are kept pending until the buffered data arrived and the writer decoded them
+        self.stream: BinaryIO | bytearray | None = None
+        self.stream_size = 0
+        self.pending: deque[str] = deque()
+        self.ready = False
+        self.finished = False
+        self.writer: asyncio.Task | None = None
+
+
+class BodyHarvester(BaseModel):
+    """
+    Fetches response bodies of a session with bounded concurrency and memory
+
+    Finished responses whose mime type matches `mime_types` are queued on `Network.loadingFinished`, earlier
+    prefixes first, and fetched by `max_concurrency` workers with `Network.getResponseBody`. Base64 is decoded in
+    the offload thread pool. Responses announcing at least `stream_threshold` bytes are streamed instead with
+    `Network.streamResourceContent`, their chunks decoded in the offload pool and written in order as
+    `Network.dataReceived` events arrive.
+
+    Bodies go to every configured sink: files under `directory` (the body is then not kept in memory), `callback`,
+    and `bodies()` when `queue_size` is set, whose bounded queue slows the workers down to the consumer. Requests
+    arriving while `max_queued` bodies wait are dropped and counted, so are the bodies still waiting for the
+    consumer when `stop` times out.
+
+    Examples:
+        harvester = BodyHarvester(session=cdp_session, directory=Path('bodies'), mime_types=['application/json'])
+        await harvester.start()
+        ...
+        await harvester.stop()
+    """
+    session: CDPSession
+    mime_types: list[str] | None = ['application/json', 'text/html', 'text/', 'application/javascript']
+    max_concurrency: int = 4
+    max_queued: int = 1000
+    max_body_size: int = 50 * 1024 * 1024
+    stream_threshold: int | None = 5 * 1024 * 1024
+    directory: Path | None = None
+    callback: BodyCallback | None = None
+    queue_size: int = 0
+    command_timeout: int = 30
+
+    _responses: OrderedDict[str, _Response] = PrivateAttr(default_factory=OrderedDict)
+    _queue: asyncio.PriorityQueue | None = PrivateAttr(default=None)
+    _results: asyncio.Queue | None = PrivateAttr(default=None)
+    _workers: list[asyncio.Task] = PrivateAttr(default_factory=list)
+    _write_tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+    _emit_tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+    _callback_ids: list[int] = PrivateAttr(default_factory=list)
+    _sequence: int = PrivateAttr(default=0)
+    _stats: dict[str, int] = PrivateAttr(default_factory=lambda: dict.fromkeys(
+        ('queued', 'fetched', 'streamed', 'dropped', 'failed', 'bytes'), 0
+    ))
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {**self._stats, 'waiting': self._queue.qsize() if self._queue else 0}
+
+    async def start(self) -> None:
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.PriorityQueue(self.max_queued)
+        if self.queue_size:
+            self._results = asyncio.Queue(self.queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+
+        for event, callback in (
+            (Network.ResponseReceived, self._on_response_received),
+            (Network.DataReceived, self._on_data_received),
+            (Network.LoadingFinished, self._on_loading_finished),
+            (Network.LoadingFailed, self._on_loading_failed),
+        ):
+            self._callback_ids.append(await self.session.register_callback(event, callback, raw=True))
+        await self.session.execute(Network.Enable())
+
+    async def stop(self, drain: bool = True, timeout: float = 30) -> None:
+        """Stop harvesting, after fetching the queued bodies when `drain` is set.
+
+        Args:
+            drain (bool): Fetch the queued bodies and finish the streams first.
+            timeout (float): Seconds to wait for them, and for the consumer of `bodies()` to take them, the
+                bodies not delivered by then are dropped.
+        """
+        for callback_id in self._callback_ids:
+            await self.session.remove_callback(callback_id)
+        self._callback_ids.clear()
+
+        deadline = asyncio.get_running_loop().time() + timeout
+        if drain:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except TimeoutError:
+                logger.warning(f'{self} stopped with bodies left to fetch or deliver')
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+        for tasks in (self._write_tasks, self._emit_tasks):
+            if not tasks:
+                continue
+            _, pending = await asyncio.wait(tasks, timeout=max(deadline - asyncio.get_running_loop().time(), 0))
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for tracked in self._responses.values():
+            if tracked.stream is not None:
+                self._close_stream(tracked)
+        self._responses.clear()
+        if self._results is not None:
+            if self._results.full():
+                # nobody takes the bodies, the oldest one makes room for the end of the iteration
+                self._results.get_nowait()
+                self._stats['dropped'] += 1
+            self._results.put_nowait(None)
+
+    async def bodies(self) -> AsyncIterator[HarvestedBody]:
+        """ Iterate over the harvested bodies until the harvester is stopped, requires `queue_size`. """
+        while True:
+            harvested = await self._results.get()
+            if harvested is None:
+                return
+            yield harvested
+
+    def _priority(self, mime_type: str) -> int | None:
+        if self.mime_types is None:
+            return 0
+        for priority, prefix in enumerate(self.mime_types):
+            if mime_type.startswith(prefix):
+                return priority
+        return None
+
+    def _path(self, request_id: str, mime_type: str) -> Path | None:
+        if self.directory is None:
+            return None
+        return self.directory / f'{request_id}{mimetypes.guess_extension(mime_type) or ".bin"}'
+
+    def _on_response_received(self, event_data: dict) -> None:
+        response = event_data['response']
+        mime_type = response.get('mimeType', '')
+        if (priority := self._priority(mime_type)) is None:
+            return
+
+        request_id = event_data['requestId']
+        tracked = self._responses[request_id] = _Response(response['url'], mime_type, event_data['type'], priority)
+        if len(self._responses) > _MAX_TRACKED:
+            _, forgotten = self._responses.popitem(last=False)
+            if forgotten.stream is not None:
+                self._close_stream(forgotten)
+
+        headers = {name.lower(): value for name, value in response.get('headers', {}).items()}
+        content_length = headers.get('content-length', '')
+        if content_length.isdigit():
+            if int(content_length) > self.max_body_size:
+                del self._responses[request_id]
+            elif self.stream_threshold is not None and int(content_length) >= self.stream_threshold:
+                path = self._path(request_id, mime_type)
+                tracked.stream = open(path, 'wb') if path is not None else bytearray()
+                task = self.session.send(Network.StreamResourceContent(request_id=request_id), self.command_timeout)
+                task.add_done_callback(lambda t: self._on_stream_started(request_id, t))
+
+    def _on_stream_started(self, request_id: str, task: asyncio.Task) -> None:
+        tracked = self._responses.get(request_id)
+        if tracked is None or tracked.stream is None:
+            return
+        if task.cancelled() or task.exception() is not None:
+            # fall back to fetching the whole body once loaded
+            self._close_stream(tracked)
+            if tracked.finished:
+                self._enqueue(self._responses.pop(request_id), request_id)
+            return
+        tracked.ready = True
+        tracked.pending.appendleft(task.result().bufferedData)
+        self._start_writer(request_id, tracked)
+
+    def _start_writer(self, request_id: str, tracked: _Response) -> None:
+        if tracked.writer is None:
+            tracked.writer = asyncio.create_task(self._write_stream(request_id, tracked))
+            self._write_tasks.add(tracked.writer)
+            tracked.writer.add_done_callback(self._write_tasks.discard)
+
+    async def _write_stream(self, request_id: str, tracked: _Response) -> None:
+        """ Write the pending chunks of a stream in order, and finish it once loaded. """
+        try:
+            while tracked.pending and tracked.stream is not None:
+                chunk = await run_offloaded(base64.b64decode, tracked.pending.popleft())
+                if tracked.stream is None:
+                    # the request failed or was forgotten meanwhile
+                    return
+                tracked.stream_size += len(chunk)
+                if tracked.stream_size > self.max_body_size:
+                    # forgotten, so that the body is not fetched once loaded either
+                    self._close_stream(tracked)
+                    self._responses.pop(request_id, None)
+                    self._stats['dropped'] += 1
+                    if path := self._path(request_id, tracked.mime_type):
+                        path.unlink(missing_ok=True)
+                elif isinstance(tracked.stream, bytearray):
+                    tracked.stream.extend(chunk)
+                else:
+                    tracked.stream.write(chunk)
+            if tracked.finished and tracked.stream is not None:
+                self._responses.pop(request_id, None)
+                self._finish_stream(request_id, tracked)
+        finally:
+            tracked.writer = None
+
+    @staticmethod
+    def _close_stream(tracked: _Response) -> None:
+        if not isinstance(tracked.stream, bytearray):
+            tracked.stream.close()
+        tracked.stream = None
+        tracked.pending.clear()
+
+    def _on_data_received(self, event_data: dict) -> None:
+        tracked = self._responses.get(event_data['requestId'])
+        if tracked is None or tracked.stream is None or not event_data.get('data'):
+            return
+        tracked.pending.append(event_data['data'])
+        if tracked.ready:
+            self._start_writer(event_data['requestId'], tracked)
+
+    def _on_loading_finished(self, event_data: dict) -> None:
+        request_id = event_data['requestId']
+        tracked = self._responses.get(request_id)
+        if tracked is None:
+            return
+
+        if tracked.stream is not None:
+            # the stream is finished by its writer, once its buffered data arrived and the chunks are written
+            tracked.finished = True
+            if tracked.ready:
+                self._start_writer(request_id, tracked)
+            return
+        del self._responses[request_id]
+        self._enqueue(tracked, request_id)
+
+    def _enqueue(self, tracked: _Response, request_id: str) -> None:
+        self._sequence += 1
+        try:
+            self._queue.put_nowait((tracked.priority, self._sequence, request_id, tracked))
+            self._stats['queued'] += 1
+        except asyncio.QueueFull:
+            self._stats['dropped'] += 1
+
+    def _on_loading_failed(self, event_data: dict) -> None:
+        tracked = self._responses.pop(event_data['requestId'], None)
+        if tracked is not None and tracked.stream is not None:
+            self._close_stream(tracked)
+
+    def _finish_stream(self, request_id: str, tracked: _Response) -> None:
+        path = None
+        body = tracked.stream
+        if isinstance(body, bytearray):
+            body = bytes(body)
+        else:
+            path = Path(body.name)
+            body.close()
+            body = None
+        self._stats['streamed'] += 1
+        self._stats['bytes'] += tracked.stream_size
+        harvested = HarvestedBody(
+            request_id, tracked.url, tracked.mime_type, tracked.resource_type, tracked.stream_size, body, path
+        )
+        task = asyncio.create_task(self._emit(harvested))
+        self._emit_tasks.add(task)
+        task.add_done_callback(self._emit_tasks.discard)
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, request_id, tracked = await self._queue.get()
+            try:
+                await self._fetch(request_id, tracked)
+            except (CustomException, OSError) as exc:
+                self._stats['failed'] += 1
+                logger.debug(f'No body for request {request_id}: {exc}')
+            finally:
+                self._queue.task_done()
+
+    async def _fetch(self, request_id: str, tracked: _Response) -> None:
+        body_resp = await self.session.execute(Network.GetResponseBody(request_id=request_id), self.command_timeout)
+        path = self._path(request_id, tracked.mime_type)
+        body, size = await run_offloaded(_decode, body_resp.body, body_resp.base64Encoded, path)
+        if size > self.max_body_size:
+            self._stats['dropped'] += 1
+            if path is not None:
+                path.unlink(missing_ok=True)
+            return
+
+        self._stats['fetched'] += 1
+        self._stats['bytes'] += size
+        await self._emit(HarvestedBody(
+            request_id, tracked.url, tracked.mime_type, tracked.resource_type, size, body, path
+        ))
+
+    async def _emit(self, harvested: HarvestedBody) -> None:
+        if self.callback is not None:
+            try:
+                result = self.callback(harvested)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as exc:
+                logger.error(f'Error processing body callback {harvested.request_id}: {exc}')
+        if self._results is not None:
+            try:
+                await self._results.put(harvested)
+            except asyncio.CancelledError:
+                # stopped while waiting for the consumer
+                self._stats['dropped'] += 1
+                raise
+
+    def __str__(self) -> str:
+        return f'BodyHarvester(session={self.session}, stats={self.stats})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,325 @@
+import asyncio
+import base64
+import hashlib
+import json
+import mmap
+import re
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession
+from cdpkit.exception.base import CustomException
+from cdpkit.helpers.interception import glob_to_regex
+from cdpkit.helpers.io import read_stream
+from cdpkit.logger import logger
+from cdpkit.protocol import Fetch
+
+__all__ = [
+    'CacheEntry',
+    'CacheRule',
+    'ResponseStore',
+    'ResponseCache'
+]
+
+# the stored body is already decoded, these headers would describe the original transfer
+_DROPPED_HEADERS = frozenset(('content-encoding', 'content-length', 'transfer-encoding'))
+_MAX_AGE = re.compile(r'(?:s-maxage|max-age)\s*=\s*(\d+)', re.IGNORECASE)
+
+
+class CacheEntry(BaseModel):
+    digest: str
+    status: int
+    headers: list[tuple[str, str]]
+    size: int
+    stored_at: float
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class CacheRule(BaseModel):
+    """
+    Caches the responses whose url matches `url` (a Fetch url pattern) for `ttl` seconds, whatever their headers
+    say. A ttl of 0 never caches them.
+    """
+    url: str
+    ttl: float
+
+    _url_re: re.Pattern | None = PrivateAttr(default=None)
+
+    def matches(self, url: str) -> bool:
+        if self._url_re is None:
+            self._url_re = re.compile(glob_to_regex(self.url), re.DOTALL)
+        return self._url_re.fullmatch(url) is not None
+
+
+class ResponseStore(BaseModel):
+    """
+    Content-addressed, size-bounded LRU store of responses
+
+    Bodies are stored once per sha256 digest, in memory or as files under `directory` that are mmap'd when served.
+    The index of a directory store is persisted by `save` and loaded again on creation, so repeated crawls start
+    warm. A store can be shared by the caches of many sessions.
+    """
+    directory: Path | None = None
+    max_size: int = 512 * 1024 * 1024
+    max_entries: int = 100000
+
+    _index: OrderedDict[str, CacheEntry] = PrivateAttr(default_factory=OrderedDict)
+    _blobs: dict[str, bytes] = PrivateAttr(default_factory=dict)
+    _blob_refs: dict[str, int] = PrivateAttr(default_factory=dict)
+    _size: int = PrivateAttr(default=0)
+    _hits: int = PrivateAttr(default=0)
+    _misses: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context) -> None:
+        if self.directory is None:
+            return
+        (self.directory / 'blobs').mkdir(parents=True, exist_ok=True)
+
+        index_path = self.directory / 'index.json'
+        if index_path.exists():
+            for key, entry in json.loads(index_path.read_text()).items():
+                entry = CacheEntry.model_validate(entry)
+                if entry.fresh and self._blob_path(entry.digest).exists():
+                    self._add(key, entry)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'entries': len(self._index), 'size': self._size, 'hits': self._hits, 'misses': self._misses}
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / 'blobs' / digest[:2] / digest
+
+    def _add(self, key: str, entry: CacheEntry) -> None:
+        if self._blob_refs.get(entry.digest, 0) == 0:
+            self._size += entry.size
+        self._blob_refs[entry.digest] = self._blob_refs.get(entry.digest, 0) + 1
+        self._index[key] = entry
+
+    def _remove(self, key: str) -> None:
+        self._release(self._index.pop(key))
+
+    def _release(self, entry: CacheEntry) -> None:
+        self._blob_refs[entry.digest] -= 1
+        if self._blob_refs[entry.digest] == 0:
+            del self._blob_refs[entry.digest]
+            self._size -= entry.size
+            if self.directory is None:
+                del self._blobs[entry.digest]
+            else:
+                with suppress(FileNotFoundError):
+                    self._blob_path(entry.digest).unlink()
+
+    def get(self, key: str) -> CacheEntry | None:
+        entry = self._index.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        if not entry.fresh:
+            self._remove(key)
+            self._misses += 1
+            return None
+        self._index.move_to_end(key)
+        self._hits += 1
+        return entry
+
+    def put(self, key: str, status: int, headers: list[tuple[str, str]], body: bytes, ttl: float) -> CacheEntry:
+        digest = hashlib.sha256(body).hexdigest()
+        if digest not in self._blob_refs:
+            if self.directory is None:
+                self._blobs[digest] = body
+            else:
+                blob_path = self._blob_path(digest)
+                blob_path.parent.mkdir(exist_ok=True)
+                blob_path.write_bytes(body)
+
+        previous = self._index.pop(key, None)
+        now = time.time()
+        entry = CacheEntry(
+            digest=digest, status=status, headers=headers, size=len(body), stored_at=now, expires_at=now + ttl
+        )
+        # the new reference is taken first, so a body stored again under its key keeps its blob
+        self._add(key, entry)
+        if previous is not None:
+            self._release(previous)
+
+        while self._index and (self._size > self.max_size or len(self._index) > self.max_entries):
+            self._remove(next(iter(self._index)))
+        return entry
+
+    def encoded_body(self, entry: CacheEntry) -> str:
+        """ The body of an entry encoded in base64, read straight from the mmap'd blob for directory stores. """
+        if self.directory is None:
+            return base64.b64encode(self._blobs[entry.digest]).decode()
+        if entry.size == 0:
+            return ''
+        with open(self._blob_path(entry.digest), 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return base64.b64encode(mm).decode()
+
+    def save(self) -> None:
+        if self.directory is not None:
+            (self.directory / 'index.json').write_text(json.dumps({
+                key: entry.model_dump() for key, entry in self._index.items()
+            }))
+
+
+def _header(headers: list[dict[str, str]], name: str) -> str | None:
+    for header in headers:
+        if header['name'].lower() == name:
+            return header['value']
+    return None
+
+
+def _header_ttl(headers: list[dict[str, str]]) -> float | None:
+    """ Freshness lifetime from the cache headers, None when the headers do not say. """
+    cache_control = (_header(headers, 'cache-control') or '').lower()
+    if 'no-store' in cache_control or 'no-cache' in cache_control or 'private' in cache_control:
+        return 0
+    if match := _MAX_AGE.search(cache_control):
+        return float(match.group(1))
+    if expires := _header(headers, 'expires'):
+        try:
+            return max(parsedate_to_datetime(expires).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return 0
+    return None
+
+
+class ResponseCache(BaseModel):
+    """
+    Serves repeated requests of a session from a `ResponseStore` with `Fetch.fulfillRequest`
+
+    Requests matching the url patterns and resource types pause at the request stage. Fresh hits are fulfilled
+    from the store, misses are continued with `interceptResponse` so that only they pause again at the response
+    stage, where cacheable responses are read with `Fetch.takeResponseBodyAsStream`, stored and fulfilled.
+
+    Freshness follows the Cache-Control and Expires headers when `respect_headers` is set, `rules` override them
+    and `default_ttl` applies to responses whose headers say nothing. `Fetch.enable` replaces the patterns of
+    the session, so a cache should not share a session with an `InterceptionEngine`.
+    """
+    session: CDPSession
+    store: ResponseStore
+    url_patterns: list[str] = ['*']
+    resource_types: list[str] | None = ['Script', 'Stylesheet', 'Image', 'Font']
+    rules: list[CacheRule] = []
+    respect_headers: bool = True
+    default_ttl: float = 0
+    max_body_size: int = 10 * 1024 * 1024
+    chunk_size: int = 1024 * 1024
+    command_timeout: int = 30
+
+    _callback_id: int | None = PrivateAttr(default=None)
+    _tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+
+    async def start(self) -> None:
+        self._callback_id = await self.session.register_callback(
+            Fetch.RequestPaused, self._on_request_paused, raw=True
+        )
+        patterns = [
+            {'urlPattern': url, 'requestStage': 'Request', **({'resourceType': rt} if rt else {})}
+            for url in self.url_patterns
+            for rt in self.resource_types or [None]
+        ]
+        await self.session.execute(Fetch.Enable(patterns=patterns))
+
+    async def stop(self) -> None:
+        await self.session.execute(Fetch.Disable())
+        if self._callback_id is not None:
+            await self.session.remove_callback(self._callback_id)
+            self._callback_id = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.store.save()
+
+    @staticmethod
+    def cache_key(request: dict[str, Any]) -> str:
+        return f'{request["method"]} {request["url"].split("#", 1)[0]}'
+
+    def _ttl(self, url: str, headers: list[dict[str, str]]) -> float:
+        for rule in self.rules:
+            if rule.matches(url):
+                return rule.ttl
+        ttl = _header_ttl(headers) if self.respect_headers else None
+        return self.default_ttl if ttl is None else ttl
+
+    def _on_request_paused(self, event_data: dict) -> None:
+        request_id = event_data['requestId']
+        request = event_data['request']
+
+        if 'responseStatusCode' in event_data or 'responseErrorReason' in event_data:
+            self._on_response(event_data)
+        elif request['method'] != 'GET':
+            self.session.send(Fetch.ContinueRequest(request_id=request_id), self.command_timeout)
+        elif (entry := self.store.get(self.cache_key(request))) is not None:
+            self.session.send(Fetch.FulfillRequest(
+                request_id=request_id,
+                response_code=entry.status,
+                response_headers=[{'name': name, 'value': value} for name, value in entry.headers],
+                body=self.store.encoded_body(entry)
+            ), self.command_timeout)
+        else:
+            self.session.send(
+                Fetch.ContinueRequest(request_id=request_id, intercept_response=True), self.command_timeout
+            )
+
+    def _on_response(self, event_data: dict) -> None:
+        request_id = event_data['requestId']
+        headers = event_data.get('responseHeaders') or []
+        content_length = _header(headers, 'content-length')
+        ttl = 0
+        if event_data.get('responseStatusCode') == 200:
+            ttl = self._ttl(event_data['request']['url'], headers)
+
+        if ttl <= 0 or (content_length and content_length.isdigit() and int(content_length) > self.max_body_size):
+            self.session.send(Fetch.ContinueResponse(request_id=request_id), self.command_timeout)
+            return
+
+        task = asyncio.create_task(self._store_response(event_data, headers, ttl))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _store_response(self, event_data: dict, headers: list[dict[str, str]], ttl: float) -> None:
+        request_id = event_data['requestId']
+        try:
+            stream_resp = await self.session.execute(
+                Fetch.TakeResponseBodyAsStream(request_id=request_id), self.command_timeout
+            )
+        except (CustomException, OSError) as exc:
+            logger.debug(f'Cannot stream response {request_id}: {exc}')
+            self.session.send(Fetch.ContinueResponse(request_id=request_id), self.command_timeout)
+            return
+
+        try:
+            chunks = [_ async for _ in read_stream(self.session, stream_resp.stream, self.chunk_size)]
+        except (CustomException, OSError) as exc:
+            logger.warning(f'Failed to read response {request_id}: {exc}')
+            self.session.send(Fetch.FailRequest(request_id=request_id, error_reason='Failed'), self.command_timeout)
+            return
+
+        body = b''.join(chunks)
+        kept_headers = [(h['name'], h['value']) for h in headers if h['name'].lower() not in _DROPPED_HEADERS]
+        status = event_data['responseStatusCode']
+        if len(body) <= self.max_body_size:
+            self.store.put(self.cache_key(event_data['request']), status, kept_headers, body, ttl)
+
+        self.session.send(Fetch.FulfillRequest(
+            request_id=request_id,
+            response_code=status,
+            response_headers=[{'name': name, 'value': value} for name, value in kept_headers],
+            body=base64.b64encode(body).decode()
+        ), self.command_timeout)
+
+    def __str__(self) -> str:
+        return f'ResponseCache(session={self.session}, store={self.store.stats})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
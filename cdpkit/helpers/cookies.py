@@ -0,0 +1,372 @@
+import asyncio
+import bisect
+import gzip
+import json
+import os
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession
+from cdpkit.logger import logger
+from cdpkit.protocol import Network, Storage
+
+__all__ = [
+    'CookieJar',
+    'CookieSyncReport',
+    'CookieSync'
+]
+
+# a cookie is kept as a tuple of these fields, session cookies have an expiry of -1
+_FIELDS = (
+    'name', 'value', 'domain', 'path', 'expires', 'httpOnly', 'secure', 'sameSite', 'priority', 'sourceScheme',
+    'sourcePort', 'partitionKey'
+)
+_FORMAT_VERSION = 1
+
+type CookieRow = tuple
+# (domain, path, name, top level site of the partition)
+type CookieKey = tuple[str, str, str, str]
+
+
+def _row_from_cookie(cookie: Network.Cookie | dict) -> CookieRow:
+    if isinstance(cookie, dict):
+        cookie = Network.Cookie.model_validate(cookie)
+    partition_key = cookie.partitionKey
+    return (
+        cookie.name, cookie.value, cookie.domain, cookie.path, -1 if cookie.session else cookie.expires,
+        cookie.httpOnly, cookie.secure, cookie.sameSite, cookie.priority, cookie.sourceScheme, cookie.sourcePort,
+        None if partition_key is None else (partition_key.topLevelSite, partition_key.hasCrossSiteAncestor)
+    )
+
+
+def _key(row: CookieRow) -> CookieKey:
+    return row[2], row[3], row[0], '' if row[11] is None else row[11][0]
+
+
+def _cookie_param(row: CookieRow, expires: float | None = None) -> dict:
+    """ The `Network.CookieParam` recreating the cookie of a row, expired if `expires` is in the past. """
+    name, value, domain, path, row_expires, http_only, secure, same_site, priority, scheme, port, partition = row
+    param = {'name': name, 'value': value, 'path': path, 'secure': secure, 'httpOnly': http_only}
+    if domain.startswith('.'):
+        param['domain'] = domain
+    else:
+        # a domain attribute would turn a host-only cookie into a domain cookie
+        param['url'] = f'{"https" if secure else "http"}://{domain}{path}'
+    expires = row_expires if expires is None else expires
+    if expires != -1:
+        param['expires'] = expires
+    for field, field_value in (
+        ('sameSite', same_site), ('priority', priority), ('sourceScheme', scheme), ('sourcePort', port)
+    ):
+        if field_value is not None:
+            param[field] = field_value
+    if partition is not None:
+        param['partitionKey'] = {'topLevelSite': partition[0], 'hasCrossSiteAncestor': partition[1]}
+    return param
+
+
+class CookieJar(BaseModel):
+    """
+    Local cookie jar indexed by domain, path, name and partition, with a revision per change
+
+    Every change bumps the revision of the jar; cookies are kept in the order of their last change and removals are
+    kept as tombstones, so the changes since any revision are found without scanning the jar. With a `path` the jar
+    is loaded on creation and written by `save` as gzip-compressed JSON rows.
+    """
+    path: Path | None = None
+
+    _cookies: dict[CookieKey, tuple[CookieRow, int]] = PrivateAttr(default_factory=dict)
+    _by_domain: dict[str, set[CookieKey]] = PrivateAttr(default_factory=dict)
+    _tombstone_revisions: list[int] = PrivateAttr(default_factory=list)
+    _tombstones: list[CookieRow] = PrivateAttr(default_factory=list)
+    _revision: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context) -> None:
+        if self.path is not None and self.path.exists():
+            self._load(self.path)
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    def __len__(self) -> int:
+        return len(self._cookies)
+
+    def __contains__(self, key: CookieKey) -> bool:
+        return key in self._cookies
+
+    def cookies(self, domain: str | None = None) -> list[dict]:
+        """The cookies of the jar as `Network.CookieParam` dicts.
+
+        Args:
+            domain (str | None): Only the cookies of this domain and its subdomains.
+        """
+        if domain is None:
+            keys: Iterable[CookieKey] = self._cookies
+        else:
+            domain = domain.lstrip('.')
+            keys = [
+                key for cookie_domain, domain_keys in self._by_domain.items()
+                if cookie_domain == domain or cookie_domain.endswith(f'.{domain}') for key in domain_keys
+            ]
+        return [_cookie_param(self._cookies[key][0]) for key in keys]
+
+    def set(self, cookies: Iterable[Network.Cookie | dict]) -> int:
+        """Add or replace cookies.
+
+        Args:
+            cookies (Iterable[Network.Cookie | dict]): Cookies as returned by `Storage.getCookies`.
+
+        Returns:
+            int: The number of cookies that changed.
+        """
+        return sum(self._set_row(_row_from_cookie(cookie)) for cookie in cookies)
+
+    def delete(self, name: str, domain: str, path: str = '/', top_level_site: str = '') -> bool:
+        return self._delete((domain, path, name, top_level_site))
+
+    def purge_expired(self, now: float | None = None) -> int:
+        """ Delete the persistent cookies that expired, returns their number. """
+        now = time.time() if now is None else now
+        expired = [key for key, (row, _) in self._cookies.items() if 0 <= row[4] < now]
+        for key in expired:
+            self._delete(key)
+        return len(expired)
+
+    def changes(self, since: int) -> tuple[list[CookieRow], list[CookieRow]]:
+        """The cookies changed and deleted after a revision.
+
+        Returns:
+            tuple[list[CookieRow], list[CookieRow]]: The current rows of the changed cookies and the last rows of the
+                deleted cookies that are still absent.
+        """
+        changed = []
+        for row, revision in reversed(self._cookies.values()):
+            if revision <= since:
+                break
+            changed.append(row)
+        start = bisect.bisect_right(self._tombstone_revisions, since)
+        deleted = {_key(row): row for row in self._tombstones[start:]}
+        return changed, [row for key, row in deleted.items() if key not in self._cookies]
+
+    def merge(self, snapshot: dict[CookieKey, CookieRow], since: int | None) -> tuple[int, int]:
+        """Merge the cookies of a browser last synced at a revision.
+
+        The changes of the jar after `since` win over the browser. Cookies the browser lacks are deleted when they
+        did not change after `since`; with `since` None nothing is deleted and the browser wins every conflict.
+
+        Returns:
+            tuple[int, int]: The number of cookies changed and deleted.
+        """
+        pending: set[CookieKey] = set()
+        if since is not None:
+            changed, deleted = self.changes(since)
+            pending.update(map(_key, changed), map(_key, deleted))
+        merged = sum(self._set_row(row) for key, row in snapshot.items() if key not in pending)
+
+        dropped = []
+        if since is not None:
+            for key, (_, revision) in self._cookies.items():
+                if revision > since:
+                    break
+                if key not in snapshot:
+                    dropped.append(key)
+            for key in dropped:
+                self._delete(key)
+        return merged, len(dropped)
+
+    def compact(self, revision: int) -> None:
+        """ Forget the tombstones up to a revision, once every remote saw them. """
+        end = bisect.bisect_right(self._tombstone_revisions, revision)
+        del self._tombstone_revisions[:end]
+        del self._tombstones[:end]
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f'{self.path.name}.tmp')
+        with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=1) as file:
+            json.dump({
+                'version': _FORMAT_VERSION,
+                'revision': self._revision,
+                'fields': _FIELDS,
+                'cookies': [[*row, revision] for row, revision in self._cookies.values()],
+            }, file, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+
+    def _load(self, path: Path) -> None:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get('version') != _FORMAT_VERSION or tuple(data['fields']) != _FIELDS:
+            logger.warning(f'Ignoring cookie jar {path} written in another format')
+            return
+        for *row, revision in data['cookies']:
+            if row[11] is not None:
+                row[11] = tuple(row[11])
+            row = tuple(row)
+            key = _key(row)
+            self._cookies[key] = (row, revision)
+            self._by_domain.setdefault(key[0], set()).add(key)
+        self._revision = data['revision']
+
+    def _set_row(self, row: CookieRow) -> bool:
+        key = _key(row)
+        entry = self._cookies.get(key)
+        if entry is not None:
+            if entry[0] == row:
+                return False
+            # moved to the end, the cookies stay ordered by revision
+            del self._cookies[key]
+        else:
+            self._by_domain.setdefault(key[0], set()).add(key)
+        self._revision += 1
+        self._cookies[key] = (row, self._revision)
+        return True
+
+    def _delete(self, key: CookieKey) -> bool:
+        if (entry := self._cookies.pop(key, None)) is None:
+            return False
+        domain_keys = self._by_domain[key[0]]
+        domain_keys.discard(key)
+        if not domain_keys:
+            del self._by_domain[key[0]]
+        self._revision += 1
+        self._tombstone_revisions.append(self._revision)
+        self._tombstones.append(entry[0])
+        return True
+
+    def __str__(self) -> str:
+        return f'CookieJar(path={self.path}, cookies={len(self._cookies)}, revision={self._revision})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class CookieSyncReport(BaseModel):
+    # cookies taken from the browser, and deleted from the jar because the browser dropped them
+    pulled: int = 0
+    removed: int = 0
+    # cookies set in the browser, and deleted from it because the jar dropped them
+    pushed: int = 0
+    deleted: int = 0
+    batches: int = 0
+
+
+class CookieSync(BaseModel):
+    """
+    Keeps the cookies of many browsers in sync with a `CookieJar`
+
+    Each browser (or browser context) is a remote that remembers the jar revision it was last synced at. A sync reads
+    the cookies of the browser with `Storage.getCookies`, merges what the browser changed into the jar and pushes the
+    jar changes since that revision, as batches of `Storage.setCookies` sent concurrently. Deletions are pushed as
+    already expired cookies. Jar changes not pushed to a remote yet win over the browser; on the first sync of a
+    remote the browser wins.
+
+    Examples:
+        cookie_sync = CookieSync(jar=CookieJar(path=Path('cookies.json.gz')))
+        await cookie_sync.sync_all([browser_session for browser_session in browser_sessions])
+        cookie_sync.jar.save()
+    """
+    jar: CookieJar
+    batch_size: int = 500
+    command_timeout: int = 30
+
+    _remotes: dict[tuple[str, str | None], int] = PrivateAttr(default_factory=dict)
+    _locks: dict[tuple[str, str | None], asyncio.Lock] = PrivateAttr(default_factory=dict)
+
+    async def sync(self, session: CDPSession, browser_context_id: str | None = None) -> CookieSyncReport:
+        """Merge the cookies of a browser into the jar and push the changes of the jar to it.
+
+        Args:
+            session (CDPSession): A browser session.
+            browser_context_id (str | None): The browser context, the default one if None.
+        """
+        remote = (session.ws_endpoint, browser_context_id)
+        async with self._locks.setdefault(remote, asyncio.Lock()):
+            output = await session.execute(
+                Storage.GetCookies(browser_context_id=browser_context_id), self.command_timeout
+            )
+            known = self._remotes.get(remote)
+            report = CookieSyncReport()
+            snapshot = {_key(row): row for row in map(_row_from_cookie, output.cookies)}
+            report.pulled, report.removed = self.jar.merge(snapshot, known)
+
+            changed, deleted = self.jar.changes(known or 0)
+            revision = self.jar.revision
+            await self._push(session, browser_context_id, report, [
+                _cookie_param(row) for row in changed if snapshot.get(_key(row)) != row
+            ], [
+                _cookie_param(row, expires=1) for row in deleted if _key(row) in snapshot
+            ])
+            self._remotes[remote] = revision
+            self._compact()
+            return report
+
+    async def push(self, session: CDPSession, browser_context_id: str | None = None) -> CookieSyncReport:
+        """ Push the changes of the jar to a browser without reading its cookies, everything on the first push. """
+        remote = (session.ws_endpoint, browser_context_id)
+        async with self._locks.setdefault(remote, asyncio.Lock()):
+            report = CookieSyncReport()
+            changed, deleted = self.jar.changes(self._remotes.get(remote, 0))
+            revision = self.jar.revision
+            await self._push(
+                session, browser_context_id, report,
+                [_cookie_param(row) for row in changed], [_cookie_param(row, expires=1) for row in deleted]
+            )
+            self._remotes[remote] = revision
+            self._compact()
+            return report
+
+    async def sync_all(
+        self, sessions: Iterable[CDPSession], browser_context_id: str | None = None
+    ) -> list[CookieSyncReport | BaseException]:
+        """ Sync several browsers concurrently, failed syncs are returned as their exception. """
+        sessions = list(sessions)
+        self.jar.purge_expired()
+        results = await asyncio.gather(
+            *(self.sync(session, browser_context_id) for session in sessions), return_exceptions=True
+        )
+        for session, result in zip(sessions, results):
+            if isinstance(result, BaseException):
+                logger.warning(f'Cookie sync of {session} failed: {result!r}')
+        return results
+
+    def forget(self, session: CDPSession, browser_context_id: str | None = None) -> None:
+        """ Forget a browser that went away, its next sync is a first one. """
+        self._remotes.pop((session.ws_endpoint, browser_context_id), None)
+        self._locks.pop((session.ws_endpoint, browser_context_id), None)
+
+    async def _push(
+        self,
+        session: CDPSession,
+        browser_context_id: str | None,
+        report: CookieSyncReport,
+        changed: list[dict],
+        deleted: list[dict]
+    ) -> None:
+        cookies = changed + deleted
+        if not cookies:
+            return
+        # the commands are pipelined, a failed batch fails the push and the remote keeps its revision
+        await asyncio.gather(*(
+            session.send(Storage.SetCookies(
+                cookies=cookies[start:start + self.batch_size], browser_context_id=browser_context_id
+            ), self.command_timeout)
+            for start in range(0, len(cookies), self.batch_size)
+        ))
+        report.pushed = len(changed)
+        report.deleted = len(deleted)
+        report.batches = -(-len(cookies) // self.batch_size)
+
+    def _compact(self) -> None:
+        self.jar.compact(min(self._remotes.values()))
+
+    def __str__(self) -> str:
+        return f'CookieSync(jar={self.jar}, remotes={len(self._remotes)})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import shutil
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession
+from cdpkit.exception import NetworkError, WaitTimeout
+from cdpkit.logger import logger
+from cdpkit.protocol import Browser
+from cdpkit.protocol.base import run_offloaded
+
+__all__ = [
+    'Download',
+    'DownloadManager'
+]
+
+# finished downloads kept in the table, the oldest are forgotten first
+_MAX_FINISHED = 10000
+_HASH_CHUNK = 1024 * 1024
+
+
+def _store(path: Path, store_dir: Path) -> tuple[Path, str, bool]:
+    """ Move a file to its content addressed path, runs in the offload pool. """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(_HASH_CHUNK):
+            digest.update(chunk)
+    hex_digest = digest.hexdigest()
+    stored_path = store_dir / hex_digest[:2] / hex_digest
+    if stored_path.exists():
+        path.unlink()
+        return stored_path, hex_digest, True
+    stored_path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(path, stored_path)
+    return stored_path, hex_digest, False
+
+
+class Download:
+    __slots__ = ('guid', 'url', 'suggested_filename', 'frame_id', 'state', 'received_bytes', 'total_bytes',
+                 'started_at', 'finished_at', 'path', 'digest', 'error', '_future')
+
+    def __init__(self, guid: str, url: str, suggested_filename: str, frame_id: str) -> None:
+        self.guid = guid
+        self.url = url
+        self.suggested_filename = suggested_filename
+        self.frame_id = frame_id
+        # 'inProgress', 'storing', 'completed', 'canceled' or 'failed'
+        self.state = 'inProgress'
+        self.received_bytes = 0
+        self.total_bytes = 0
+        self.started_at = time.monotonic()
+        self.finished_at: float | None = None
+        self.path: Path | None = None
+        # sha256 of the file once stored
+        self.digest: str | None = None
+        self.error: str | None = None
+        self._future: asyncio.Future | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    async def done(self) -> Path:
+        """Wait until the file is complete and stored.
+
+        Returns:
+            Path: The path of the file.
+
+        Raises:
+            NetworkError: The download was canceled or could not be stored.
+        """
+        if not self.finished:
+            if self._future is None:
+                self._future = asyncio.get_running_loop().create_future()
+            await asyncio.shield(self._future)
+        if self.state != 'completed':
+            raise NetworkError(f'Download {self.guid} of {self.url} {self.state}: {self.error}')
+        return self.path
+
+    def _finish(self, state: str, error: str | None = None) -> None:
+        self.state = state
+        self.error = error
+        self.finished_at = time.monotonic()
+        if self._future is not None and not self._future.done():
+            self._future.set_result(None)
+
+    def __str__(self) -> str:
+        return f'Download(guid={self.guid}, state={self.state}, received_bytes={self.received_bytes})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class DownloadManager(BaseModel):
+    """
+    Tracks the downloads of a browser, fed with the raw `Browser` download events
+
+    `Browser.setDownloadBehavior` saves downloads under `download_dir` named by their guid, and every download is a
+    row of a table keyed by guid, updated in place by `Browser.downloadProgress`. Downloads beginning while
+    `max_concurrent` are in progress are canceled with `Browser.cancelDownload`. Completed files are hashed and
+    moved to `store_dir/<sha256[:2]>/<sha256>` in the offload thread pool, a file already stored is dropped.
+
+    Examples:
+        manager = DownloadManager(session=browser_session, download_dir=Path('tmp'), store_dir=Path('blobs'))
+        await manager.start()
+        download = await manager.wait_for_download()
+        path = await download.done()
+    """
+    session: CDPSession
+    download_dir: Path
+    store_dir: Path | None = None
+    max_concurrent: int | None = None
+    browser_context_id: str | None = None
+    command_timeout: int = 10
+
+    _downloads: OrderedDict[str, Download] = PrivateAttr(default_factory=OrderedDict)
+    _active: int = PrivateAttr(default=0)
+    _waiters: list[asyncio.Future] = PrivateAttr(default_factory=list)
+    _store_tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+    _callback_ids: list[int] = PrivateAttr(default_factory=list)
+    _stats: dict[str, int] = PrivateAttr(default_factory=lambda: dict.fromkeys(
+        ('started', 'completed', 'canceled', 'capped', 'failed', 'duplicates', 'received_bytes'), 0
+    ))
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {**self._stats, 'active': self._active, 'storing': len(self._store_tasks)}
+
+    @property
+    def downloads(self) -> dict[str, Download]:
+        return dict(self._downloads)
+
+    def get(self, guid: str) -> Download | None:
+        return self._downloads.get(guid)
+
+    async def start(self) -> None:
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        for event, callback in (
+            (Browser.DownloadWillBegin, self._on_download_will_begin),
+            (Browser.DownloadProgress, self._on_download_progress),
+        ):
+            self._callback_ids.append(await self.session.register_callback(event, callback, raw=True))
+        await self.session.execute(Browser.SetDownloadBehavior(
+            behavior='allowAndName',
+            browser_context_id=self.browser_context_id,
+            download_path=str(self.download_dir.absolute()),
+            events_enabled=True
+        ), self.command_timeout)
+
+    async def stop(self) -> None:
+        """ Restore the default download behavior and wait for the completed files to be stored. """
+        try:
+            await self.session.execute(Browser.SetDownloadBehavior(
+                behavior='default', browser_context_id=self.browser_context_id
+            ), self.command_timeout)
+        finally:
+            for callback_id in self._callback_ids:
+                await self.session.remove_callback(callback_id)
+            self._callback_ids.clear()
+            if self._store_tasks:
+                await asyncio.gather(*self._store_tasks, return_exceptions=True)
+
+    async def wait_for_download(self, timeout: float = 30) -> Download:
+        """ Wait for the next download to begin. """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except TimeoutError:
+            raise WaitTimeout(f'No download began within {timeout}s')
+        finally:
+            with suppress(ValueError):
+                self._waiters.remove(future)
+
+    async def cancel(self, guid: str) -> None:
+        await self.session.execute(
+            Browser.CancelDownload(guid=guid, browser_context_id=self.browser_context_id), self.command_timeout
+        )
+
+    async def metrics(self, interval: float = 1) -> AsyncIterator[dict[str, Any]]:
+        """ Yield the stats every `interval` seconds with the throughput since the previous ones, in bytes/s. """
+        received, last = self._stats['received_bytes'], time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            stats = self.stats
+            stats['throughput'] = (stats['received_bytes'] - received) / (now - last)
+            received, last = stats['received_bytes'], now
+            yield stats
+
+    def _on_download_will_begin(self, event_data: dict) -> None:
+        guid = event_data['guid']
+        download = Download(guid, event_data['url'], event_data['suggestedFilename'], event_data['frameId'])
+        self._downloads[guid] = download
+        self._stats['started'] += 1
+        if self.max_concurrent is not None and self._active >= self.max_concurrent:
+            # finished by its canceled progress event
+            self._stats['capped'] += 1
+            download.error = f'more than {self.max_concurrent} concurrent downloads'
+            self.session.send(
+                Browser.CancelDownload(guid=guid, browser_context_id=self.browser_context_id), self.command_timeout
+            )
+        self._active += 1
+
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(download)
+        self._waiters.clear()
+        self._forget_finished()
+
+    def _on_download_progress(self, event_data: dict) -> None:
+        download = self._downloads.get(event_data['guid'])
+        if download is None or download.finished or download.state == 'storing':
+            return
+        received_bytes = int(event_data['receivedBytes'])
+        self._stats['received_bytes'] += received_bytes - download.received_bytes
+        download.received_bytes = received_bytes
+        download.total_bytes = int(event_data['totalBytes'])
+
+        state = event_data['state']
+        if state == 'inProgress':
+            return
+        self._active -= 1
+        if state == 'canceled':
+            self._stats['canceled'] += 1
+            download._finish('canceled', download.error or 'canceled by the browser')
+            return
+
+        download.path = Path(event_data.get('filePath') or self.download_dir / download.guid)
+        if self.store_dir is None:
+            self._stats['completed'] += 1
+            download._finish('completed')
+            return
+        download.state = 'storing'
+        task = asyncio.create_task(self._store(download))
+        self._store_tasks.add(task)
+        task.add_done_callback(self._store_tasks.discard)
+
+    async def _store(self, download: Download) -> None:
+        try:
+            download.path, download.digest, duplicate = await run_offloaded(_store, download.path, self.store_dir)
+        except Exception as exc:
+            # any failure, not only of the file system, must finish the download for `done` to return
+            logger.error(f'Error storing {download}: {exc!r}')
+            self._stats['failed'] += 1
+            download._finish('failed', repr(exc))
+            return
+        self._stats['duplicates'] += duplicate
+        self._stats['completed'] += 1
+        download._finish('completed')
+
+    def _forget_finished(self) -> None:
+        excess = len(self._downloads) - _MAX_FINISHED
+        if excess <= 0:
+            return
+        # downloads in progress are kept, the oldest finished ones are forgotten
+        finished = (guid for guid, download in self._downloads.items() if download.finished)
+        for guid in list(islice(finished, excess)):
+            del self._downloads[guid]
+
+    def __str__(self) -> str:
+        return f'DownloadManager(session={self.session}, download_dir={self.download_dir})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
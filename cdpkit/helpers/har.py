@@ -0,0 +1,400 @@
+import asyncio
+import datetime
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, TextIO
+from urllib.parse import parse_qsl, urlsplit
+
+from pydantic import BaseModel, PrivateAttr
+
+import cdpkit
+from cdpkit.connection import CDPSession
+from cdpkit.exception.base import CustomException
+from cdpkit.logger import logger
+from cdpkit.protocol import Network
+
+__all__ = [
+    'HarRecorder',
+    'HarWriter'
+]
+
+# ids of the requests finished last, whose late extra info events are dropped
+_MAX_FINISHED_IDS = 10000
+# entries holding only extra info, for requests never seen, are forgotten oldest first
+_MAX_PLACEHOLDERS = 1000
+
+
+class HarWriter:
+    """
+    Writes a HAR file entry by entry
+
+    The `log` object is written up front and every entry is appended as soon as it is finished, so memory use does
+    not grow with the number of entries. The archive is only valid JSON once `close` wrote the trailer.
+    """
+
+    def __init__(self, path: Path, creator: str = 'cdpkit'):
+        self._file: TextIO = open(path, 'w', encoding='utf-8')
+        self._file.write(json.dumps({
+            'log': {
+                'version': '1.2',
+                'creator': {'name': creator, 'version': cdpkit.__version__},
+                'pages': [],
+            }
+        })[:-2] + ', "entries": [\n')
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def write_entry(self, entry: dict[str, Any]) -> None:
+        if self._count:
+            self._file.write(',\n')
+        self._file.write(json.dumps(entry, separators=(',', ':')))
+        self._count += 1
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.write('\n]}}\n')
+            self._file.close()
+
+
+class _HarEntry:
+    """ Per-request state, kept only until the request finished and its entry was written. """
+    __slots__ = (
+        'request', 'request_headers', 'wall_time', 'timestamp', 'resource_type',
+        'response', 'response_headers', 'response_headers_text', 'status_code',
+        'data_length', 'encoded_data_length', 'finished_timestamp', 'error_text', 'body', 'body_encoding'
+    )
+
+    def __init__(self, request: dict, wall_time: float, timestamp: float, resource_type: str | None):
+        self.request = request
+        self.request_headers: dict | None = None
+        self.wall_time = wall_time
+        self.timestamp = timestamp
+        self.resource_type = resource_type
+        self.response: dict | None = None
+        self.response_headers: dict | None = None
+        self.response_headers_text: str | None = None
+        self.status_code: int | None = None
+        self.data_length = 0
+        self.encoded_data_length = 0
+        self.finished_timestamp: float | None = None
+        self.error_text: str | None = None
+        self.body: str | None = None
+        self.body_encoding: str | None = None
+
+
+def _har_headers(headers: dict[str, str] | None) -> list[dict[str, str]]:
+    # multiple values of a header are joined by '\n'
+    return [
+        {'name': name, 'value': value}
+        for name, values in (headers or {}).items()
+        for value in str(values).split('\n')
+    ]
+
+
+def _header(headers: dict[str, str] | None, name: str) -> str | None:
+    name = name.lower()
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _request_cookies(headers: dict[str, str] | None) -> list[dict[str, str]]:
+    cookies = []
+    for part in (_header(headers, 'cookie') or '').split(';'):
+        name, sep, value = part.strip().partition('=')
+        if sep:
+            cookies.append({'name': name, 'value': value})
+    return cookies
+
+
+def _response_cookies(headers: dict[str, str] | None) -> list[dict[str, str]]:
+    cookies = []
+    for line in (_header(headers, 'set-cookie') or '').split('\n'):
+        name, sep, value = line.split(';', 1)[0].strip().partition('=')
+        if sep:
+            cookies.append({'name': name, 'value': value})
+    return cookies
+
+
+def _http_version(protocol: str | None) -> str:
+    return {'h2': 'HTTP/2.0', 'h3': 'HTTP/3.0', None: ''}.get(protocol, (protocol or '').upper())
+
+
+def _timings(entry: _HarEntry) -> tuple[float, dict[str, float]]:
+    timing = (entry.response or {}).get('timing')
+    end = entry.finished_timestamp or entry.timestamp
+    if not timing:
+        total = max(end - entry.timestamp, 0) * 1000
+        return total, {'send': 0, 'wait': total, 'receive': 0}
+
+    def _span(start: str, stop: str) -> float:
+        return timing[stop] - timing[start] if timing.get(start, -1) >= 0 else -1
+
+    blocked = next((timing[_] for _ in ('dnsStart', 'connectStart', 'sendStart') if timing.get(_, -1) >= 0), 0)
+    timings = {
+        'blocked': blocked + max(timing['requestTime'] - entry.timestamp, 0) * 1000,
+        'dns': _span('dnsStart', 'dnsEnd'),
+        'connect': _span('connectStart', 'connectEnd'),
+        'ssl': _span('sslStart', 'sslEnd'),
+        'send': max(timing['sendEnd'] - timing['sendStart'], 0),
+        'wait': max(timing['receiveHeadersEnd'] - timing['sendEnd'], 0),
+        'receive': max((end - timing['requestTime']) * 1000 - timing['receiveHeadersEnd'], 0),
+    }
+    # ssl is part of connect in HAR
+    total = sum(value for name, value in timings.items() if name != 'ssl' and value > 0)
+    return total, timings
+
+
+class HarRecorder(BaseModel):
+    """
+    Streams the network traffic of a session into a HAR file
+
+    Correlates `Network.requestWillBeSent`, `responseReceived`, their `ExtraInfo` events, `dataReceived`,
+    `loadingFinished` and `loadingFailed` by requestId in a compact state table. Events are consumed unvalidated,
+    and an entry is written to disk and dropped from memory as soon as its request finished.
+
+    Response bodies are only fetched when `fetch_bodies` is set, for the configured mime type prefixes, with at
+    most `max_concurrent_bodies` `Network.getResponseBody` calls in flight. Bodies are skipped while more than
+    `max_pending_bodies` requests wait for their body, so a burst cannot make the state table grow unbounded.
+
+    Examples:
+        har_recorder = HarRecorder(session=cdp_session, path='trace.har', fetch_bodies=True)
+        await har_recorder.start()
+        ...
+        await har_recorder.stop()
+    """
+    session: CDPSession
+    path: Path
+    fetch_bodies: bool = False
+    body_mime_types: tuple[str, ...] = ('text/', 'application/json', 'application/javascript', 'application/xml')
+    max_body_size: int = 1024 * 1024
+    max_concurrent_bodies: int = 4
+    max_pending_bodies: int = 1000
+
+    _writer: HarWriter | None = PrivateAttr(default=None)
+    _entries: dict[str, _HarEntry] = PrivateAttr(default_factory=dict)
+    _placeholders: OrderedDict[str, None] = PrivateAttr(default_factory=OrderedDict)
+    _finished_ids: OrderedDict[str, None] = PrivateAttr(default_factory=OrderedDict)
+    _callback_ids: list[int] = PrivateAttr(default_factory=list)
+    _body_semaphore: asyncio.Semaphore | None = PrivateAttr(default=None)
+    _body_tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+
+    @property
+    def entries_written(self) -> int:
+        return self._writer.count if self._writer else 0
+
+    @property
+    def pending_entries(self) -> int:
+        return len(self._entries)
+
+    async def start(self) -> None:
+        self._writer = HarWriter(self.path)
+        self._body_semaphore = asyncio.Semaphore(self.max_concurrent_bodies)
+
+        for event, callback in (
+            (Network.RequestWillBeSent, self._on_request_will_be_sent),
+            (Network.RequestWillBeSentExtraInfo, self._on_request_extra_info),
+            (Network.ResponseReceived, self._on_response_received),
+            (Network.ResponseReceivedExtraInfo, self._on_response_extra_info),
+            (Network.DataReceived, self._on_data_received),
+            (Network.LoadingFinished, self._on_loading_finished),
+            (Network.LoadingFailed, self._on_loading_failed),
+        ):
+            self._callback_ids.append(await self.session.register_callback(event, callback, raw=True))
+
+        await self.session.execute(Network.Enable())
+
+    async def stop(self) -> None:
+        """ Stop recording, write the requests still in flight as incomplete entries and close the file. """
+        for callback_id in self._callback_ids:
+            await self.session.remove_callback(callback_id)
+        self._callback_ids.clear()
+
+        if self._body_tasks:
+            await asyncio.gather(*self._body_tasks, return_exceptions=True)
+
+        for entry in self._entries.values():
+            # entries without request only ever received extra info
+            if entry.request:
+                self._writer.write_entry(self._build_entry(entry))
+        self._entries.clear()
+        self._placeholders.clear()
+        self._finished_ids.clear()
+        self._writer.close()
+        logger.info(f'HAR with {self._writer.count} entries written to {self.path}')
+
+    def _on_request_will_be_sent(self, event_data: dict) -> None:
+        request_id = event_data['requestId']
+        previous = self._entries.pop(request_id, None)
+        self._placeholders.pop(request_id, None)
+        self._finished_ids.pop(request_id, None)
+        if previous is not None and 'redirectResponse' in event_data:
+            previous.response = event_data['redirectResponse']
+            previous.finished_timestamp = event_data['timestamp']
+            self._writer.write_entry(self._build_entry(previous))
+
+        entry = _HarEntry(
+            event_data['request'], event_data['wallTime'], event_data['timestamp'], event_data.get('type')
+        )
+        if previous is not None and not previous.request:
+            # extra info arrived before this event
+            entry.request_headers = previous.request_headers
+            entry.response_headers = previous.response_headers
+            entry.response_headers_text = previous.response_headers_text
+            entry.status_code = previous.status_code
+        self._entries[request_id] = entry
+
+    def _entry(self, request_id: str) -> _HarEntry | None:
+        entry = self._entries.get(request_id)
+        if entry is not None:
+            return entry
+        if request_id in self._finished_ids:
+            # extra info arriving after loadingFinished, the entry is already written
+            return None
+        # extra info events may arrive before requestWillBeSent
+        entry = self._entries[request_id] = _HarEntry({}, 0.0, 0.0, None)
+        self._placeholders[request_id] = None
+        if len(self._placeholders) > _MAX_PLACEHOLDERS:
+            forgotten_id, _ = self._placeholders.popitem(last=False)
+            self._entries.pop(forgotten_id, None)
+        return entry
+
+    def _on_request_extra_info(self, event_data: dict) -> None:
+        if (entry := self._entry(event_data['requestId'])) is not None:
+            entry.request_headers = event_data['headers']
+
+    def _on_response_received(self, event_data: dict) -> None:
+        entry = self._entries.get(event_data['requestId'])
+        if entry is not None:
+            entry.response = event_data['response']
+            entry.resource_type = event_data['type']
+
+    def _on_response_extra_info(self, event_data: dict) -> None:
+        entry = self._entry(event_data['requestId'])
+        if entry is None:
+            return
+        entry.response_headers = event_data['headers']
+        entry.response_headers_text = event_data.get('headersText')
+        entry.status_code = event_data['statusCode']
+
+    def _on_data_received(self, event_data: dict) -> None:
+        entry = self._entries.get(event_data['requestId'])
+        if entry is not None:
+            entry.data_length += event_data['dataLength']
+            entry.encoded_data_length += event_data['encodedDataLength']
+
+    def _on_loading_finished(self, event_data: dict) -> None:
+        request_id = event_data['requestId']
+        entry = self._entries.get(request_id)
+        if entry is None:
+            return
+        entry.finished_timestamp = event_data['timestamp']
+        entry.encoded_data_length = event_data['encodedDataLength']
+
+        if self._wants_body(entry):
+            task = asyncio.create_task(self._fetch_body(request_id, entry))
+            self._body_tasks.add(task)
+            task.add_done_callback(self._body_tasks.discard)
+        else:
+            self._finish(request_id)
+
+    def _on_loading_failed(self, event_data: dict) -> None:
+        entry = self._entries.get(event_data['requestId'])
+        if entry is None:
+            return
+        entry.finished_timestamp = event_data['timestamp']
+        entry.error_text = event_data['errorText']
+        self._finish(event_data['requestId'])
+
+    def _wants_body(self, entry: _HarEntry) -> bool:
+        if not self.fetch_bodies or entry.response is None or len(self._body_tasks) >= self.max_pending_bodies:
+            return False
+        if entry.data_length > self.max_body_size:
+            return False
+        return entry.response.get('mimeType', '').startswith(self.body_mime_types)
+
+    async def _fetch_body(self, request_id: str, entry: _HarEntry) -> None:
+        async with self._body_semaphore:
+            try:
+                body_resp = await self.session.execute(Network.GetResponseBody(request_id=request_id))
+                entry.body = body_resp.body
+                entry.body_encoding = 'base64' if body_resp.base64Encoded else None
+            except (CustomException, OSError) as exc:
+                logger.debug(f'No body for request {request_id}: {exc}')
+        self._finish(request_id)
+
+    def _finish(self, request_id: str) -> None:
+        entry = self._entries.pop(request_id, None)
+        self._placeholders.pop(request_id, None)
+        self._finished_ids[request_id] = None
+        if len(self._finished_ids) > _MAX_FINISHED_IDS:
+            self._finished_ids.popitem(last=False)
+        # a placeholder that never saw requestWillBeSent has nothing to write
+        if entry is not None and entry.request and self._writer is not None:
+            self._writer.write_entry(self._build_entry(entry))
+
+    def _build_entry(self, entry: _HarEntry) -> dict[str, Any]:
+        request = entry.request
+        response = entry.response or {}
+        request_headers = entry.request_headers or request.get('headers')
+        response_headers = entry.response_headers or response.get('headers')
+        url = request.get('url', '')
+        total, timings = _timings(entry)
+
+        har_request = {
+            'method': request.get('method', ''),
+            'url': url,
+            'httpVersion': _http_version(response.get('protocol')),
+            'cookies': _request_cookies(request_headers),
+            'headers': _har_headers(request_headers),
+            'queryString': [{'name': k, 'value': v} for k, v in parse_qsl(urlsplit(url).query, True)],
+            'headersSize': -1,
+            'bodySize': len(request.get('postData', '')),
+        }
+        if 'postData' in request:
+            har_request['postData'] = {
+                'mimeType': _header(request_headers, 'content-type') or '',
+                'text': request['postData'],
+            }
+
+        content = {'size': entry.data_length, 'mimeType': response.get('mimeType', 'x-unknown')}
+        if entry.body is not None:
+            content['text'] = entry.body
+            if entry.body_encoding:
+                content['encoding'] = entry.body_encoding
+
+        har_entry = {
+            'startedDateTime': datetime.datetime.fromtimestamp(entry.wall_time, datetime.UTC).isoformat(),
+            'time': total,
+            'request': har_request,
+            'response': {
+                'status': entry.status_code or response.get('status', 0),
+                'statusText': response.get('statusText', ''),
+                'httpVersion': _http_version(response.get('protocol')),
+                'cookies': _response_cookies(response_headers),
+                'headers': _har_headers(response_headers),
+                'content': content,
+                'redirectURL': _header(response_headers, 'location') or '',
+                'headersSize': len(entry.response_headers_text) if entry.response_headers_text else -1,
+                'bodySize': entry.encoded_data_length if response else -1,
+            },
+            'cache': {},
+            'timings': timings,
+            '_resourceType': (entry.resource_type or '').lower(),
+        }
+        if 'remoteIPAddress' in response:
+            har_entry['serverIPAddress'] = response['remoteIPAddress']
+        if entry.error_text:
+            har_entry['_error'] = entry.error_text
+        return har_entry
+
+    def __str__(self) -> str:
+        return f'HarRecorder(session={self.session}, path={self.path})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
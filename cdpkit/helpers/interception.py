@@ -0,0 +1,373 @@
+import base64
+import re
+from collections.abc import Iterable
+from typing import Any, Literal
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession
+from cdpkit.logger import logger
+from cdpkit.protocol import CDPMethod, Fetch
+
+__all__ = [
+    'InterceptRule',
+    'RuleMatcher',
+    'InterceptionEngine',
+    'glob_to_regex'
+]
+
+_END = ''
+# literal tokens used by the combined regex are capped, longer literals are still verified by the rule itself
+_MAX_TOKEN_LENGTH = 32
+_MIN_TOKEN_LENGTH = 3
+
+
+def _split_glob(pattern: str) -> list[str]:
+    """ Split a Fetch url pattern into literal runs and the wildcards '*' and '?' (returned as None and ''). """
+    parts, literal, escaped = [], [], False
+    for char in pattern:
+        if escaped:
+            literal.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in '*?':
+            if literal:
+                parts.append(''.join(literal))
+                literal = []
+            parts.append(None if char == '*' else '')
+        else:
+            literal.append(char)
+    if literal:
+        parts.append(''.join(literal))
+    return parts
+
+
+def glob_to_regex(pattern: str) -> str:
+    """ Translate a Fetch url pattern ('*' zero or more, '?' exactly one, '\\' escape) into a regex. """
+    return ''.join('.*' if part is None else '.' if part == '' else re.escape(part) for part in _split_glob(pattern))
+
+
+class InterceptRule(BaseModel):
+    """
+    A declarative interception rule
+
+    Attributes:
+        url (str | None): Fetch url pattern, '*' matches zero or more characters and '?' exactly one.
+        url_regex (str | None): Regex searched in the url, such rules cannot be pushed down to the browser.
+        resource_types (list[str] | None): Network.ResourceType values, e.g. ['Image', 'Font'].
+        methods (list[str] | None): HTTP methods, e.g. ['POST'].
+        headers (dict[str, str] | None): Header name to a regex searched in its value.
+        stage (str): 'Request' or 'Response', the stage the rule applies to.
+        action (str): 'fail', 'fulfill' or 'continue'.
+        error_reason (str): Network.ErrorReason of 'fail'.
+        response_code (int): Status of 'fulfill'.
+        response_headers (dict[str, str] | None): Headers of 'fulfill'.
+        body (bytes | str | None): Body of 'fulfill'.
+        set_url (str | None): Url a 'continue' request is rewritten to.
+        set_headers (dict[str, str] | None): Headers added or replaced in a 'continue' request.
+    """
+    url: str | None = None
+    url_regex: str | None = None
+    resource_types: list[str] | None = None
+    methods: list[str] | None = None
+    headers: dict[str, str] | None = None
+    stage: Literal['Request', 'Response'] = 'Request'
+
+    action: Literal['fail', 'fulfill', 'continue'] = 'fail'
+    error_reason: str = 'BlockedByClient'
+    response_code: int = 200
+    response_headers: dict[str, str] | None = None
+    body: bytes | str | None = None
+    set_url: str | None = None
+    set_headers: dict[str, str] | None = None
+
+    _url_re: re.Pattern | None = PrivateAttr(default=None)
+    _header_res: dict[str, re.Pattern] | None = PrivateAttr(default=None)
+    _encoded_body: str | None = PrivateAttr(default=None)
+
+    @property
+    def pushable(self) -> bool:
+        """ Whether the url condition can be expressed as a `Fetch.RequestPattern`. """
+        return self.url_regex is None
+
+    def matches(self, url: str, resource_type: str | None, method: str | None, headers: dict | None) -> bool:
+        if self.resource_types is not None and resource_type not in self.resource_types:
+            return False
+        if self.methods is not None and method not in self.methods:
+            return False
+        if self.headers is not None and not self._headers_match(headers or {}):
+            return False
+
+        if self._url_re is None:
+            if self.url_regex is not None:
+                self._url_re = re.compile(self.url_regex)
+            else:
+                self._url_re = re.compile(glob_to_regex(self.url or '*'), re.DOTALL)
+        if self.url_regex is not None:
+            return self._url_re.search(url) is not None
+        return self._url_re.fullmatch(url) is not None
+
+    def _headers_match(self, headers: dict[str, str]) -> bool:
+        if self._header_res is None:
+            self._header_res = {name.lower(): re.compile(value) for name, value in self.headers.items()}
+        lowered = {name.lower(): value for name, value in headers.items()}
+        return all(
+            name in lowered and pattern.search(lowered[name]) is not None
+            for name, pattern in self._header_res.items()
+        )
+
+    @property
+    def encoded_body(self) -> str:
+        if self._encoded_body is None:
+            body = self.body.encode() if isinstance(self.body, str) else self.body or b''
+            self._encoded_body = base64.b64encode(body).decode()
+        return self._encoded_body
+
+
+def _trie_insert(trie: dict, key: str, value: int) -> None:
+    node = trie
+    for char in key:
+        node = node.setdefault(char, {})
+    node.setdefault(_END, []).append(value)
+
+
+def _trie_regex(node: dict) -> str:
+    # a token ending here already proves a match at this position, longer tokens are found by the trie walk
+    if _END in node:
+        return ''
+    alternatives = [re.escape(char) + _trie_regex(child) for char, child in node.items()]
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return f'(?:{"|".join(alternatives)})'
+
+
+class RuleMatcher:
+    """
+    Finds the first rule matching a request
+
+    Url patterns starting with a literal are indexed in a prefix trie walked along the url. Patterns starting with
+    a wildcard are indexed by their longest literal run: a single combined regex, shaped like the trie of these
+    literals, finds the positions where any of them occurs and the trie is only walked from these positions. Only
+    the candidates found this way, plus the rules without any literal, are checked completely.
+    """
+
+    def __init__(self, rules: Iterable[InterceptRule]):
+        self.rules = list(rules)
+        self._prefix_trie: dict = {}
+        self._token_trie: dict = {}
+        self._token_re: re.Pattern | None = None
+        self._unindexed: list[int] = []
+
+        for index, rule in enumerate(self.rules):
+            if not rule.pushable or not rule.url:
+                self._unindexed.append(index)
+                continue
+
+            parts = _split_glob(rule.url)
+            if parts and parts[0]:
+                _trie_insert(self._prefix_trie, parts[0], index)
+                continue
+
+            literal = max((part for part in parts if part), key=len, default='')
+            if len(literal) < _MIN_TOKEN_LENGTH:
+                self._unindexed.append(index)
+            else:
+                _trie_insert(self._token_trie, literal[:_MAX_TOKEN_LENGTH], index)
+
+        if self._token_trie:
+            self._token_re = re.compile(f'(?=({_trie_regex(self._token_trie)}))', re.DOTALL)
+
+    def _candidates(self, url: str) -> list[int]:
+        candidates = list(self._unindexed)
+
+        node = self._prefix_trie
+        for char in url:
+            node = node.get(char)
+            if node is None:
+                break
+            if _END in node:
+                candidates.extend(node[_END])
+
+        if self._token_re is not None:
+            for match in self._token_re.finditer(url):
+                node = self._token_trie
+                for char in url[match.start():match.start() + _MAX_TOKEN_LENGTH]:
+                    node = node.get(char)
+                    if node is None:
+                        break
+                    if _END in node:
+                        candidates.extend(node[_END])
+
+        return candidates
+
+    def match_index(
+        self,
+        url: str,
+        resource_type: str | None = None,
+        method: str | None = None,
+        headers: dict[str, str] | None = None,
+        stage: str = 'Request'
+    ) -> int | None:
+        """ Return the index of the first rule matching the request, rules are tried in their given order. """
+        for index in sorted(set(self._candidates(url))):
+            rule = self.rules[index]
+            if rule.stage == stage and rule.matches(url, resource_type, method, headers):
+                return index
+        return None
+
+    def match(
+        self,
+        url: str,
+        resource_type: str | None = None,
+        method: str | None = None,
+        headers: dict[str, str] | None = None,
+        stage: str = 'Request'
+    ) -> InterceptRule | None:
+        index = self.match_index(url, resource_type, method, headers, stage)
+        return None if index is None else self.rules[index]
+
+    def request_patterns(self, max_patterns: int = 500) -> list[dict[str, str]]:
+        """
+        The smallest set of `Fetch.RequestPattern` covering every rule
+
+        Conditions on methods and headers cannot be pushed down, the patterns are a superset of the rules and the
+        engine continues the paused requests no rule matches. When more than `max_patterns` patterns would be
+        needed, the url conditions of the stage are dropped.
+        """
+        patterns = []
+        for stage in ('Request', 'Response'):
+            stage_rules = [rule for rule in self.rules if rule.stage == stage]
+            if not stage_rules:
+                continue
+
+            keys = set()
+            for rule in stage_rules:
+                url = rule.url if rule.pushable and rule.url else '*'
+                for resource_type in rule.resource_types or [None]:
+                    keys.add((url, resource_type))
+
+            if len(keys) > max_patterns:
+                keys = {('*', resource_type) for _, resource_type in keys}
+            if ('*', None) in keys:
+                keys = {('*', None)}
+            else:
+                # a catch-all url of a resource type covers every other pattern of that type
+                catch_all_types = {resource_type for url, resource_type in keys if url == '*'}
+                keys = {(url, rt) for url, rt in keys if url == '*' or rt not in catch_all_types}
+
+            for url, resource_type in sorted(keys, key=lambda key: (key[0], key[1] or '')):
+                pattern = {'urlPattern': url, 'requestStage': stage}
+                if resource_type is not None:
+                    pattern['resourceType'] = resource_type
+                patterns.append(pattern)
+        return patterns
+
+
+class InterceptionEngine(BaseModel):
+    """
+    Declarative request interception on `Fetch.requestPaused`
+
+    Only the url patterns needed by the rules are passed to `Fetch.enable`, so other traffic never pauses. Paused
+    requests are matched in the connection reader on the raw event and the decision is sent without waiting for
+    its response. Requests matched by no rule are continued unchanged.
+
+    Examples:
+        engine = InterceptionEngine(session=cdp_session, rules=[
+            InterceptRule(url='*://*.doubleclick.net/*'),
+            InterceptRule(url='*.png', resource_types=['Image'], action='fulfill', body=b''),
+        ])
+        await engine.start()
+    """
+    session: CDPSession
+    rules: list[InterceptRule] = []
+    max_patterns: int = 500
+    command_timeout: int = 10
+
+    _matcher: RuleMatcher | None = PrivateAttr(default=None)
+    _callback_id: int | None = PrivateAttr(default=None)
+    _paused: int = PrivateAttr(default=0)
+    _unmatched: int = PrivateAttr(default=0)
+    _hits: list[int] = PrivateAttr(default_factory=list)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            'paused': self._paused,
+            'unmatched': self._unmatched,
+            'hits': {index: hits for index, hits in enumerate(self._hits) if hits},
+        }
+
+    async def start(self) -> None:
+        if self._callback_id is None:
+            self._callback_id = await self.session.register_callback(
+                Fetch.RequestPaused, self._on_request_paused, raw=True
+            )
+        await self.update_rules(self.rules)
+
+    async def update_rules(self, rules: list[InterceptRule]) -> None:
+        self.rules = rules
+        self._matcher = RuleMatcher(rules)
+        self._hits = [0] * len(rules)
+
+        patterns = self._matcher.request_patterns(self.max_patterns)
+        logger.info(f'Intercepting with {len(rules)} rules pushed down as {len(patterns)} patterns')
+        if patterns:
+            await self.session.execute(Fetch.Enable(patterns=patterns))
+        else:
+            await self.session.execute(Fetch.Disable())
+
+    async def stop(self) -> None:
+        await self.session.execute(Fetch.Disable())
+        if self._callback_id is not None:
+            await self.session.remove_callback(self._callback_id)
+            self._callback_id = None
+
+    def _on_request_paused(self, event_data: dict) -> None:
+        self._paused += 1
+        request = event_data['request']
+        stage = 'Response' if 'responseStatusCode' in event_data or 'responseErrorReason' in event_data else 'Request'
+        index = self._matcher.match_index(
+            request['url'], event_data.get('resourceType'), request.get('method'), request.get('headers'), stage
+        )
+
+        if index is None:
+            rule = None
+            self._unmatched += 1
+        else:
+            rule = self.rules[index]
+            self._hits[index] += 1
+        self.session.send(self._decide(rule, event_data), self.command_timeout)
+
+    @staticmethod
+    def _decide(rule: InterceptRule | None, event_data: dict) -> CDPMethod:
+        request_id = event_data['requestId']
+        if rule is None:
+            if 'responseStatusCode' in event_data or 'responseErrorReason' in event_data:
+                return Fetch.ContinueResponse(request_id=request_id)
+            return Fetch.ContinueRequest(request_id=request_id)
+
+        if rule.action == 'fail':
+            return Fetch.FailRequest(request_id=request_id, error_reason=rule.error_reason)
+        elif rule.action == 'fulfill':
+            return Fetch.FulfillRequest(
+                request_id=request_id,
+                response_code=rule.response_code,
+                response_headers=[{'name': k, 'value': v} for k, v in (rule.response_headers or {}).items()],
+                body=rule.encoded_body
+            )
+        elif rule.stage == 'Response':
+            return Fetch.ContinueResponse(request_id=request_id)
+
+        headers = None
+        if rule.set_headers:
+            merged = {name.lower(): (name, value) for name, value in event_data['request']['headers'].items()}
+            merged.update({name.lower(): (name, value) for name, value in rule.set_headers.items()})
+            headers = [{'name': name, 'value': value} for name, value in merged.values()]
+        return Fetch.ContinueRequest(request_id=request_id, url=rule.set_url, headers=headers)
+
+    def __str__(self) -> str:
+        return f'InterceptionEngine(session={self.session}, rules={len(self.rules)})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,46 @@
+import base64
+from collections.abc import AsyncIterator
+from contextlib import suppress
+
+from cdpkit.connection import CDPSession
+from cdpkit.exception.base import CustomException
+from cdpkit.protocol import IO
+
+__all__ = [
+    'read_stream'
+]
+
+
+async def read_stream(
+    cdp_session: CDPSession, handle: IO.StreamHandle, chunk_size: int = 1024 * 1024, timeout: int = 30
+) -> AsyncIterator[bytes]:
+    """Read an `IO` stream chunk by chunk and close it.
+
+    The next `IO.Read` is sent as soon as a chunk arrived, so that reading overlaps with what the consumer does with
+    the chunk; at most two chunks are held.
+
+    Args:
+        cdp_session (CDPSession): The session owning the stream.
+        handle (IO.StreamHandle): The stream handle, e.g. from `Fetch.TakeResponseBodyAsStream`.
+        chunk_size (int): Maximum bytes requested per `IO.Read`.
+        timeout (int): Timeout of every `IO.Read`.
+
+    Yields:
+        bytes: The decoded chunks, in order.
+    """
+    read_task = cdp_session.send(IO.Read(handle=handle, size=chunk_size), timeout)
+    try:
+        while True:
+            read_resp = await read_task
+            if not read_resp.eof:
+                read_task = cdp_session.send(IO.Read(handle=handle, size=chunk_size), timeout)
+            if read_resp.data:
+                yield base64.b64decode(read_resp.data) if read_resp.base64Encoded else read_resp.data.encode()
+            if read_resp.eof:
+                break
+    finally:
+        if not read_task.done():
+            with suppress(CustomException, OSError):
+                await read_task
+        with suppress(CustomException, OSError):
+            await cdp_session.execute(IO.Close(handle=handle), timeout)
@@ -0,0 +1,103 @@
+import asyncio
+import inspect
+import os
+from collections.abc import Awaitable, Callable, Iterable
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession
+from cdpkit.exception import InvalidResponse
+from cdpkit.helpers.io import read_stream
+from cdpkit.protocol import Page
+from cdpkit.protocol.base import run_offloaded
+
+__all__ = [
+    'PdfSink',
+    'PdfExporter'
+]
+
+# receives the chunks of a document in order
+PdfSink = Callable[[bytes], Awaitable[None] | None]
+
+
+class PdfExporter(BaseModel):
+    """
+    Prints pages to PDF through `IO` streams, with bounded memory
+
+    `Page.printToPDF` always runs with the `ReturnAsStream` transfer mode, so a document never travels as one
+    WebSocket message, and the stream is read chunk by chunk into a file or a sink. `max_concurrency` caps the jobs
+    running over every page of the exporter; print options are the keyword arguments of `Page.PrintToPDF`.
+
+    Examples:
+        exporter = PdfExporter(max_concurrency=16, print_options={'print_background': True})
+        await exporter.export_many([(session, Path(f'invoices/{number}.pdf')) for number, session in jobs])
+    """
+    max_concurrency: int = 8
+    chunk_size: int = 1024 * 1024
+    print_options: dict[str, Any] = {}
+    command_timeout: int = 60
+
+    _semaphore: asyncio.Semaphore | None = PrivateAttr(default=None)
+
+    def model_post_init(self, __context) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def export(self, session: CDPSession, target: Path | PdfSink, **print_options) -> int:
+        """Print a page to a file or a sink.
+
+        Args:
+            session (CDPSession): The page session.
+            target (Path | PdfSink): The file, replaced once the document is complete, or a callable receiving the
+                chunks of the document.
+            **print_options: Options of `Page.PrintToPDF` overriding those of the exporter.
+
+        Returns:
+            int: The size of the document.
+        """
+        options = {**self.print_options, **print_options, 'transfer_mode': 'ReturnAsStream'}
+        async with self._semaphore:
+            result = await session.execute(Page.PrintToPDF(**options), self.command_timeout)
+            if result.stream is None:
+                raise InvalidResponse('Page.printToPDF did not return a stream')
+            chunks = read_stream(session, result.stream, self.chunk_size, self.command_timeout)
+            if isinstance(target, Path):
+                return await self._write_file(chunks, target)
+            size = 0
+            async for chunk in chunks:
+                size += len(chunk)
+                if inspect.isawaitable(written := target(chunk)):
+                    await written
+            return size
+
+    async def export_many(
+        self, jobs: Iterable[tuple[CDPSession, Path | PdfSink]], **print_options
+    ) -> list[int | BaseException]:
+        """ Print several pages concurrently, failed jobs are returned as their exception. """
+        return await asyncio.gather(
+            *(self.export(session, target, **print_options) for session, target in jobs), return_exceptions=True
+        )
+
+    @staticmethod
+    async def _write_file(chunks, path: Path) -> int:
+        temp_path = path.with_name(f'{path.name}.part')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file: BinaryIO = await run_offloaded(open, temp_path, 'wb')
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += await run_offloaded(file.write, chunk)
+        except BaseException:
+            await run_offloaded(file.close)
+            temp_path.unlink(missing_ok=True)
+            raise
+        await run_offloaded(file.close)
+        os.replace(temp_path, path)
+        return size
+
+    def __str__(self) -> str:
+        return f'PdfExporter(max_concurrency={self.max_concurrency})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
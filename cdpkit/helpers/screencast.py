@@ -0,0 +1,218 @@
+import asyncio
+import base64
+from collections import deque
+from pathlib import Path
+from typing import Any, Literal, NamedTuple
+
+from pydantic import BaseModel, PrivateAttr, field_validator
+
+from cdpkit.connection import CDPSession
+from cdpkit.logger import logger
+from cdpkit.protocol import Page
+from cdpkit.protocol.base import run_offloaded
+
+__all__ = [
+    'ScreencastFrame',
+    'ScreencastRecorder',
+    'ffmpeg_command'
+]
+
+
+class ScreencastFrame(NamedTuple):
+    # browser time of the frame in seconds, None if not reported
+    timestamp: float | None
+    data: bytes
+    device_width: float
+    device_height: float
+    offset_top: float
+    page_scale_factor: float
+    scroll_offset_x: float
+    scroll_offset_y: float
+
+
+def ffmpeg_command(output: str | Path, frame_format: str = 'jpeg', ffmpeg: str = 'ffmpeg') -> list[str]:
+    """The command line of an ffmpeg process encoding piped screencast frames into a video.
+
+    Frames arrive irregularly, each is timed by the moment ffmpeg reads it.
+    """
+    return [
+        ffmpeg, '-loglevel', 'error', '-y',
+        '-f', 'image2pipe', '-use_wallclock_as_timestamps', '1', '-c:v', 'mjpeg' if frame_format == 'jpeg' else 'png',
+        '-i', '-', '-vsync', 'vfr', '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p', str(output)
+    ]
+
+
+class ScreencastRecorder(BaseModel):
+    """
+    Records the screencast of a session with bounded memory
+
+    Frames are taken from the raw `Page.screencastFrame` events, without validating their base64 data, and acked
+    from the reader as they arrive. Up to `ack_ahead` frames are acked before the pipeline processed them; past
+    that, the oldest waiting frame is skipped (`skip_frames`) or the acks are held until the pipeline catches up,
+    which makes the browser send fewer frames. A single task decodes the frames in the offload thread pool, keeps
+    the last `ring_size` of them and writes them to the stdin of the `encoder` subprocess if one is given.
+
+    Examples:
+        recorder = ScreencastRecorder(session=cdp_session, encoder=ffmpeg_command('replay.mp4'))
+        await recorder.start()
+        ...
+        await recorder.stop()
+    """
+    session: CDPSession
+    frame_format: Literal['jpeg', 'png'] = 'jpeg'
+    quality: int | None = 80
+    max_width: int | None = None
+    max_height: int | None = None
+    every_nth_frame: int | None = None
+    ack_ahead: int = 2
+    skip_frames: bool = True
+    ring_size: int = 30
+    encoder: list[str] | None = None
+    command_timeout: int = 10
+
+    _waiting: deque[dict] = PrivateAttr(default_factory=deque)
+    _held_acks: deque[int] = PrivateAttr(default_factory=deque)
+    _frames: deque[ScreencastFrame] | None = PrivateAttr(default=None)
+    _wakeup: asyncio.Event = PrivateAttr(default_factory=asyncio.Event)
+    _worker: asyncio.Task | None = PrivateAttr(default=None)
+    _process: asyncio.subprocess.Process | None = PrivateAttr(default=None)
+    _callback_ids: list[int] = PrivateAttr(default_factory=list)
+    _running: bool = PrivateAttr(default=False)
+    _stats: dict[str, int] = PrivateAttr(default_factory=lambda: dict.fromkeys(
+        ('received', 'skipped', 'decoded', 'encoded', 'bytes'), 0
+    ))
+
+    @field_validator('ack_ahead')
+    @classmethod
+    def _check_ack_ahead(cls, ack_ahead: int) -> int:
+        # the reader skips the oldest of the `ack_ahead` waiting frames, there has to be one
+        if ack_ahead < 1:
+            raise ValueError(f'ack_ahead must be at least 1, got {ack_ahead}')
+        return ack_ahead
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {**self._stats, 'waiting': len(self._waiting), 'held_acks': len(self._held_acks)}
+
+    @property
+    def frames(self) -> list[ScreencastFrame]:
+        """ The last decoded frames, oldest first. """
+        return list(self._frames or ())
+
+    @property
+    def latest(self) -> ScreencastFrame | None:
+        return self._frames[-1] if self._frames else None
+
+    async def start(self) -> None:
+        self._frames = deque(maxlen=self.ring_size)
+        if self.encoder is not None:
+            self._process = await asyncio.create_subprocess_exec(
+                *self.encoder, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.DEVNULL
+            )
+        self._running = True
+        self._worker = asyncio.create_task(self._run())
+        self._callback_ids.append(
+            await self.session.register_callback(Page.ScreencastFrame, self._on_frame, raw=True)
+        )
+        await self.session.execute(Page.StartScreencast(
+            format_=self.frame_format,
+            quality=self.quality if self.frame_format == 'jpeg' else None,
+            max_width=self.max_width,
+            max_height=self.max_height,
+            every_nth_frame=self.every_nth_frame
+        ), self.command_timeout)
+
+    async def stop(self) -> int | None:
+        """Stop the screencast, process the waiting frames and wait for the encoder to finish.
+
+        The frames are processed and the encoder closed even if `Page.stopScreencast` fails.
+
+        Returns:
+            int | None: The exit code of the encoder.
+        """
+        try:
+            await self.session.execute(Page.StopScreencast(), self.command_timeout)
+        finally:
+            for callback_id in self._callback_ids:
+                await self.session.remove_callback(callback_id)
+            self._callback_ids.clear()
+            self._running = False
+            self._wakeup.set()
+            if self._worker is not None:
+                await self._worker
+                self._worker = None
+            return_code = await self._close_encoder()
+        return return_code
+
+    async def _close_encoder(self) -> int | None:
+        if self._process is None:
+            return None
+        if not self._process.stdin.is_closing():
+            self._process.stdin.close()
+        return_code = await self._process.wait()
+        self._process = None
+        if return_code:
+            logger.warning(f'Screencast encoder of {self.session} exited with {return_code}')
+        return return_code
+
+    def _on_frame(self, event_data: dict) -> None:
+        self._stats['received'] += 1
+        session_id = event_data['sessionId']
+        if len(self._waiting) < self.ack_ahead:
+            self._ack(session_id)
+        elif self.skip_frames:
+            self._waiting.popleft()
+            self._stats['skipped'] += 1
+            self._ack(session_id)
+        else:
+            self._held_acks.append(session_id)
+        self._waiting.append(event_data)
+        self._wakeup.set()
+
+    def _ack(self, session_id: int) -> None:
+        self.session.send(Page.ScreencastFrameAck(session_id=session_id), self.command_timeout)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._waiting:
+                if not self._running:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            event_data = self._waiting.popleft()
+            if self._held_acks:
+                self._ack(self._held_acks.popleft())
+            try:
+                data = await run_offloaded(base64.b64decode, event_data['data'])
+            except ValueError as exc:
+                logger.warning(f'Dropping undecodable screencast frame of {self.session}: {exc}')
+                continue
+
+            metadata = event_data['metadata']
+            self._frames.append(ScreencastFrame(
+                metadata.get('timestamp'), data, metadata['deviceWidth'], metadata['deviceHeight'],
+                metadata['offsetTop'], metadata['pageScaleFactor'], metadata['scrollOffsetX'],
+                metadata['scrollOffsetY']
+            ))
+            self._stats['decoded'] += 1
+            self._stats['bytes'] += len(data)
+            if self._process is not None and not self._process.stdin.is_closing():
+                await self._encode(data)
+
+    async def _encode(self, data: bytes) -> None:
+        try:
+            # the transport keeps a reference to the bytes instead of copying them
+            self._process.stdin.write(data)
+            await self._process.stdin.drain()
+            self._stats['encoded'] += 1
+        except (BrokenPipeError, ConnectionResetError) as exc:
+            logger.warning(f'Screencast encoder of {self.session} stopped reading: {exc!r}')
+            self._process.stdin.close()
+
+    def __str__(self) -> str:
+        return f'ScreencastRecorder(session={self.session}, received={self._stats["received"]})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
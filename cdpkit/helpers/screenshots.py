@@ -0,0 +1,514 @@
+import asyncio
+import base64
+import math
+import os
+import struct
+import zlib
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, BinaryIO, Literal, NamedTuple
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from cdpkit.connection import CDPSession
+from cdpkit.exception import InvalidResponse
+from cdpkit.logger import logger
+from cdpkit.protocol import DOM, LayerTree, Page
+from cdpkit.protocol.base import run_offloaded
+
+__all__ = [
+    'Screenshot',
+    'ScreenshotService',
+    'ChangeDetector',
+    'perceptual_hash'
+]
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_CHUNK_HEADER = struct.Struct('>I4s')
+_IHDR = struct.Struct('>IIBBBBB')
+# channels per PNG color type
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+_IDAT_SIZE = 1024 * 1024
+
+
+class Screenshot(NamedTuple):
+    path: Path
+    # the captured area in CSS pixels
+    width: int
+    height: int
+    tiles: int
+    size: int
+
+
+def _png_chunks(data: bytes) -> Iterable[tuple[bytes, memoryview]]:
+    if not data.startswith(_PNG_SIGNATURE):
+        raise InvalidResponse('Screenshot tile is not a PNG image')
+    view = memoryview(data)
+    offset = len(_PNG_SIGNATURE)
+    while offset < len(data):
+        length, chunk_type = _CHUNK_HEADER.unpack_from(data, offset)
+        yield chunk_type, view[offset + 8:offset + 8 + length]
+        offset += 12 + length
+
+
+def _unfilter_first_row(row: bytes, bpp: int) -> bytes:
+    """ The first scanline of a tile unfiltered, its filter must not refer to the last row of the tile above. """
+    filter_type, pixels = row[0], bytearray(row[1:])
+    # with an all-zero row above, Up is None and Paeth is Sub
+    if filter_type in (1, 4):
+        for i in range(bpp, len(pixels)):
+            pixels[i] = (pixels[i] + pixels[i - bpp]) & 0xFF
+    elif filter_type == 3:
+        for i in range(bpp, len(pixels)):
+            pixels[i] = (pixels[i] + (pixels[i - bpp] >> 1)) & 0xFF
+    return b'\x00' + pixels
+
+
+def _decode_png(data: bytes) -> tuple[int, int, int, bytes]:
+    """ The width, height, channels and unfiltered pixels of an 8-bit PNG, meant for thumbnails. """
+    header = None
+    scanlines = zlib.decompressobj()
+    raw = []
+    for chunk_type, chunk in _png_chunks(data):
+        if chunk_type == b'IHDR':
+            header = _IHDR.unpack(chunk)
+        elif chunk_type == b'IDAT':
+            raw.append(scanlines.decompress(chunk))
+        elif chunk_type == b'IEND':
+            break
+    if header is None or header[2] != 8 or header[3] == 3 or header[6]:
+        raise InvalidResponse('Only non-interlaced 8-bit PNG images without palette can be decoded')
+
+    width, height, _, color_type, _, _, _ = header
+    bpp = _CHANNELS[color_type]
+    stride = width * bpp
+    rows = b''.join(raw) + scanlines.flush()
+    pixels = bytearray(stride * height)
+    previous = bytearray(stride)
+    for y in range(height):
+        filter_type = rows[y * (stride + 1)]
+        row = bytearray(rows[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+        if filter_type == 1:
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif filter_type == 2:
+            for i in range(stride):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif filter_type == 3:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif filter_type == 4:
+            for i in range(stride):
+                left, up = (row[i - bpp], previous[i]) if i >= bpp else (0, previous[i])
+                up_left = previous[i - bpp] if i >= bpp else 0
+                estimate = left + up - up_left
+                distance_left, distance_up, distance_up_left = (
+                    abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+                )
+                if distance_left <= distance_up and distance_left <= distance_up_left:
+                    predictor = left
+                elif distance_up <= distance_up_left:
+                    predictor = up
+                else:
+                    predictor = up_left
+                row[i] = (row[i] + predictor) & 0xFF
+        pixels[y * stride:(y + 1) * stride] = row
+        previous = row
+    return width, height, bpp, bytes(pixels)
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def perceptual_hash(png: bytes, hash_size: int = 8) -> int:
+    """The difference hash of a PNG image, near-identical images have hashes a few bits apart.
+
+    The luminance of the image is averaged into `hash_size + 1` by `hash_size` cells and every bit tells whether a
+    cell is brighter than its right neighbour. Vectorized with NumPy when it is installed; the image should be a
+    thumbnail either way, as the PNG itself is decoded in Python.
+    """
+    width, height, channels, pixels = _decode_png(png)
+    columns, rows = hash_size + 1, hash_size
+    if width < columns or height < rows:
+        raise ValueError(f'Image of {width}x{height} is smaller than the hash grid')
+
+    if (numpy := _numpy()) is not None:
+        image = numpy.frombuffer(pixels, numpy.uint8).reshape(height, width, channels).astype(numpy.float64)
+        luminance = image[..., 0] if channels < 3 else image[..., :3] @ numpy.array([0.299, 0.587, 0.114])
+        # first row and column of every cell, as assigned by the loop below
+        row_edges = -(-numpy.arange(rows) * height // rows)
+        column_edges = -(-numpy.arange(columns) * width // columns)
+        sums = numpy.add.reduceat(numpy.add.reduceat(luminance, row_edges, axis=0), column_edges, axis=1)
+        counts = numpy.outer(numpy.diff(row_edges, append=height), numpy.diff(column_edges, append=width))
+        cells = sums / counts
+        bits = (cells[:, :-1] > cells[:, 1:]).ravel()
+        return int.from_bytes(numpy.packbits(bits).tobytes(), 'big') >> (-len(bits) % 8)
+
+    cell_columns = [x * columns // width for x in range(width)]
+    sums = [0.0] * (rows * columns)
+    counts = [0] * (rows * columns)
+    for y in range(height):
+        base = (y * rows // height) * columns
+        offset = y * width * channels
+        for x in range(width):
+            pixel = offset + x * channels
+            if channels < 3:
+                value = pixels[pixel]
+            else:
+                value = 0.299 * pixels[pixel] + 0.587 * pixels[pixel + 1] + 0.114 * pixels[pixel + 2]
+            cell = base + cell_columns[x]
+            sums[cell] += value
+            counts[cell] += 1
+    cells = [total / count for total, count in zip(sums, counts)]
+    result = 0
+    for row in range(rows):
+        for column in range(hash_size):
+            cell = row * columns + column
+            result = (result << 1) | (cells[cell] > cells[cell + 1])
+    return result
+
+
+def _thumbnail_hash(data: str, hash_size: int) -> int:
+    return perceptual_hash(base64.b64decode(data), hash_size)
+
+
+def _write_chunk(file: BinaryIO, chunk_type: bytes, data: bytes | memoryview) -> None:
+    file.write(_CHUNK_HEADER.pack(len(data), chunk_type))
+    file.write(data)
+    file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+class _PngStitcher:
+    """
+    Appends PNG tiles of the same width below each other into one PNG file
+
+    The scanlines of every tile are inflated and deflated again into the IDAT stream of the output as the tile comes,
+    only its first scanline is unfiltered. The height in the header is patched once the last tile was added.
+    """
+
+    def __init__(self, path: Path, compress_level: int) -> None:
+        self.path = path
+        self.width = 0
+        self.height = 0
+        self._file = open(path, 'wb')
+        self._header: tuple | None = None
+        self._palette: bytes | None = None
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+
+    def add(self, encoded: str) -> None:
+        data = base64.b64decode(encoded)
+        header = None
+        scanlines = zlib.decompressobj()
+        raw = []
+        ancillary = []
+        for chunk_type, chunk in _png_chunks(data):
+            if chunk_type == b'IHDR':
+                header = _IHDR.unpack(chunk)
+            elif chunk_type == b'IDAT':
+                raw.append(scanlines.decompress(chunk))
+            elif chunk_type == b'PLTE':
+                if self._palette is not None and self._palette != bytes(chunk):
+                    raise InvalidResponse('Screenshot tiles use different palettes')
+                self._palette = bytes(chunk)
+                ancillary.append((chunk_type, bytes(chunk)))
+            elif chunk_type == b'IEND':
+                break
+            elif not raw:
+                ancillary.append((chunk_type, bytes(chunk)))
+        if header is None:
+            raise InvalidResponse('Screenshot tile has no PNG header')
+
+        width, height, bit_depth, color_type, _, _, interlace = header
+        if self._header is None:
+            if interlace:
+                raise InvalidResponse('Interlaced screenshot tiles cannot be stitched')
+            self._header = header
+            self.width = width
+            self._file.write(_PNG_SIGNATURE)
+            _write_chunk(self._file, b'IHDR', _IHDR.pack(*header))
+            for chunk_type, chunk in ancillary:
+                _write_chunk(self._file, chunk_type, chunk)
+        elif (width, bit_depth, color_type, interlace) != (self.width, *self._header[2:4], self._header[6]):
+            raise InvalidResponse(f'Screenshot tile of {width}px wide does not match the first tile')
+
+        stride = 1 + math.ceil(width * _CHANNELS[color_type] * bit_depth / 8)
+        rows = b''.join(raw) + scanlines.flush()
+        if len(rows) != stride * height:
+            raise InvalidResponse('Screenshot tile is truncated')
+        bpp = max(1, _CHANNELS[color_type] * bit_depth // 8)
+        self._deflate(_unfilter_first_row(rows[:stride], bpp))
+        self._deflate(memoryview(rows)[stride:])
+        self.height += height
+
+    def _deflate(self, data: bytes | memoryview) -> None:
+        self._pending += self._compressor.compress(data)
+        if len(self._pending) >= _IDAT_SIZE:
+            _write_chunk(self._file, b'IDAT', self._pending)
+            self._pending.clear()
+
+    def close(self) -> int:
+        """ Finish the file, returns its size. """
+        self._pending += self._compressor.flush()
+        if self._pending:
+            _write_chunk(self._file, b'IDAT', self._pending)
+        _write_chunk(self._file, b'IEND', b'')
+        size = self._file.tell()
+        self._file.seek(len(_PNG_SIGNATURE))
+        _write_chunk(self._file, b'IHDR', _IHDR.pack(self.width, self.height, *self._header[2:]))
+        self._file.close()
+        return size
+
+    def discard(self) -> None:
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+def _write_file(path: Path, data: str) -> int:
+    temp_path = path.with_name(f'{path.name}.part')
+    with open(temp_path, 'wb') as file:
+        size = file.write(base64.b64decode(data))
+    os.replace(temp_path, path)
+    return size
+
+
+class ScreenshotService(BaseModel):
+    """
+    Captures full-page screenshots of many pages straight to disk
+
+    Pages taller than `tile_height` CSS pixels are captured as clipped PNG tiles (sized with `Page.getLayoutMetrics`)
+    so that no single response gets near the WebSocket message limit. The tiles of a page are requested together and
+    stitched in order into one PNG as they arrive: each is decoded, appended to the output file and dropped in the
+    offload thread pool, so at most the encoded tiles waiting for their turn are held. `max_concurrency` caps the
+    captures in flight over every page of the service.
+
+    Examples:
+        service = ScreenshotService(max_concurrency=16)
+        results = await service.capture_many([(session, Path(f'shots/{i}.png')) for i, session in enumerate(pages)])
+    """
+    tile_height: int = 4096
+    max_concurrency: int = 8
+    image_format: Literal['png', 'jpeg', 'webp'] = 'png'
+    quality: int | None = None
+    compress_level: int = 6
+    command_timeout: int = 60
+
+    _semaphore: asyncio.Semaphore | None = PrivateAttr(default=None)
+
+    def model_post_init(self, __context) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def capture(self, session: CDPSession, path: Path, full_page: bool = True) -> Screenshot:
+        """Capture a page into a file.
+
+        Args:
+            session (CDPSession): The page session.
+            path (Path): The output file, replaced once the capture is complete.
+            full_page (bool): Capture the whole document instead of the viewport.
+        """
+        metrics = await session.execute(Page.GetLayoutMetrics(), self.command_timeout)
+        if full_page:
+            width, height = metrics.cssContentSize.width, metrics.cssContentSize.height
+            left, top = 0.0, 0.0
+        else:
+            viewport = metrics.cssVisualViewport
+            width, height = viewport.clientWidth, viewport.clientHeight
+            left, top = viewport.pageX, viewport.pageY
+        width, height = math.ceil(width), math.ceil(height)
+        tiles = [
+            Page.Viewport(
+                x=left, y=top + tile_top, width=width, height=min(self.tile_height, height - tile_top), scale=1
+            )
+            for tile_top in range(0, max(height, 1), self.tile_height)
+        ]
+        if len(tiles) > 1 and self.image_format != 'png':
+            raise ValueError(f'A page of {height}px needs {len(tiles)} tiles, which are only stitched as PNG')
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        captures = [asyncio.create_task(self._capture_tile(session, clip)) for clip in tiles]
+        try:
+            if len(captures) == 1:
+                size = await run_offloaded(_write_file, path, await captures[0])
+                return Screenshot(path, width, height, 1, size)
+            return Screenshot(path, width, height, len(captures), await self._stitch(path, captures))
+        finally:
+            for capture in captures:
+                capture.cancel()
+
+    async def capture_many(
+        self, jobs: Iterable[tuple[CDPSession, Path]], full_page: bool = True
+    ) -> list[Screenshot | BaseException]:
+        """ Capture several pages concurrently, failed captures are returned as their exception. """
+        return await asyncio.gather(
+            *(self.capture(session, path, full_page) for session, path in jobs), return_exceptions=True
+        )
+
+    async def _capture_tile(self, session: CDPSession, clip: Page.Viewport) -> str:
+        async with self._semaphore:
+            result = await session.execute(Page.CaptureScreenshot(
+                format_=self.image_format,
+                quality=self.quality if self.image_format != 'png' else None,
+                clip=clip,
+                capture_beyond_viewport=True
+            ), self.command_timeout)
+        return result.data
+
+    async def _stitch(self, path: Path, captures: list[asyncio.Task[str]]) -> int:
+        temp_path = path.with_name(f'{path.name}.part')
+        stitcher = _PngStitcher(temp_path, self.compress_level)
+        try:
+            for capture in captures:
+                data = await capture
+                await run_offloaded(stitcher.add, data)
+            size = await run_offloaded(stitcher.close)
+        except BaseException:
+            await run_offloaded(stitcher.discard)
+            raise
+        os.replace(temp_path, path)
+        return size
+
+    def __str__(self) -> str:
+        return f'ScreenshotService(max_concurrency={self.max_concurrency}, tile_height={self.tile_height})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class ChangeDetector(BaseModel):
+    """
+    Takes a screenshot of a page only when it visibly changed since the last one
+
+    A page that neither painted (`LayerTree.layerPainted`) nor mutated its DOM since the last check is not captured at
+    all. Otherwise a thumbnail `hash_width` pixels wide is captured, the browser doing the downscaling, and its
+    `perceptual_hash` compared with the hash of the last stored screenshot: within `threshold` bits the page is
+    considered unchanged. Only then is the screenshot taken by `service`, straight to disk.
+
+    Examples:
+        detector = ChangeDetector(session=cdp_session)
+        await detector.start()
+        while True:
+            await detector.capture(Path(f'shots/{time.time()}.png'))
+            await asyncio.sleep(30)
+    """
+    session: CDPSession
+    service: ScreenshotService = Field(default_factory=ScreenshotService)
+    sources: list[Literal['paint', 'dom']] = ['paint', 'dom']
+    threshold: int = 4
+    hash_width: int = 64
+    hash_size: int = 8
+    full_page: bool = False
+    command_timeout: int = 10
+
+    _dirty: bool = PrivateAttr(default=True)
+    _last_hash: int | None = PrivateAttr(default=None)
+    _callback_ids: list[int] = PrivateAttr(default_factory=list)
+    _stats: dict[str, int] = PrivateAttr(default_factory=lambda: dict.fromkeys(
+        ('checks', 'unchanged', 'similar', 'captured'), 0
+    ))
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return dict(self._stats)
+
+    @property
+    def dirty(self) -> bool:
+        """ Whether the page painted or mutated since the last check. """
+        return self._dirty
+
+    async def start(self) -> None:
+        events = [Page.FrameNavigated]
+        if 'paint' in self.sources:
+            events += [LayerTree.LayerPainted, LayerTree.LayerTreeDidChange]
+        if 'dom' in self.sources:
+            events += [
+                DOM.DocumentUpdated, DOM.ChildNodeInserted, DOM.ChildNodeRemoved, DOM.ChildNodeCountUpdated,
+                DOM.AttributeModified, DOM.AttributeRemoved, DOM.CharacterDataModified
+            ]
+        for event in events:
+            self._callback_ids.append(await self.session.register_callback(event, self._on_change, raw=True))
+        if 'dom' in self.sources:
+            self._callback_ids.append(
+                await self.session.register_callback(DOM.DocumentUpdated, self._on_document_updated, raw=True)
+            )
+
+        commands = [Page.Enable()]
+        if 'paint' in self.sources:
+            commands.append(LayerTree.Enable())
+        if 'dom' in self.sources:
+            # mutations are only reported for the nodes the client was sent
+            commands += [DOM.Enable(), DOM.GetDocument(depth=-1)]
+        await asyncio.gather(*(self.session.send(command, self.command_timeout) for command in commands))
+
+    async def stop(self) -> None:
+        for callback_id in self._callback_ids:
+            await self.session.remove_callback(callback_id)
+        self._callback_ids.clear()
+        commands = []
+        if 'paint' in self.sources:
+            commands.append(LayerTree.Disable())
+        if 'dom' in self.sources:
+            commands.append(DOM.Disable())
+        await asyncio.gather(*(self.session.send(command, self.command_timeout) for command in commands))
+
+    async def capture(self, path: Path, force: bool = False) -> Screenshot | None:
+        """Capture the page into `path` if it changed.
+
+        Args:
+            path (Path): The file of the screenshot.
+            force (bool): Capture even if the page did not change.
+
+        Returns:
+            Screenshot | None: The screenshot, None if the page did not change.
+        """
+        self._stats['checks'] += 1
+        if not (self._dirty or force):
+            self._stats['unchanged'] += 1
+            return None
+        # changes during the capture are seen by the next check
+        self._dirty = False
+
+        page_hash = await self.thumbnail_hash()
+        if not force and self._last_hash is not None and (page_hash ^ self._last_hash).bit_count() <= self.threshold:
+            self._stats['similar'] += 1
+            return None
+
+        screenshot = await self.service.capture(self.session, path, self.full_page)
+        self._last_hash = page_hash
+        self._stats['captured'] += 1
+        return screenshot
+
+    async def thumbnail_hash(self) -> int:
+        """ The perceptual hash of the viewport, from a thumbnail scaled down by the browser. """
+        viewport = (await self.session.execute(Page.GetLayoutMetrics(), self.command_timeout)).cssVisualViewport
+        result = await self.session.execute(Page.CaptureScreenshot(
+            format_='png',
+            clip=Page.Viewport(
+                x=viewport.pageX, y=viewport.pageY, width=viewport.clientWidth, height=viewport.clientHeight,
+                scale=min(1.0, self.hash_width / max(viewport.clientWidth, 1))
+            ),
+            optimize_for_speed=True
+        ), self.command_timeout)
+        return await run_offloaded(_thumbnail_hash, result.data, self.hash_size)
+
+    def _on_change(self, event_data: dict) -> None:
+        self._dirty = True
+
+    def _on_document_updated(self, event_data: dict) -> None:
+        task = self.session.send(DOM.GetDocument(depth=-1), self.command_timeout)
+        task.add_done_callback(self._on_document_sent)
+
+    def _on_document_sent(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f'Cannot subscribe to the mutations of {self.session}: {task.exception()!r}')
+
+    def __str__(self) -> str:
+        return f'ChangeDetector(session={self.session}, dirty={self._dirty})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,198 @@
+import asyncio
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession, CDPSessionManager
+from cdpkit.protocol import CDPMethod, Page, Runtime
+
+__all__ = [
+    'InitScript',
+    'InitScriptRegistry'
+]
+
+
+class InitScript(BaseModel):
+    """
+    A script evaluated in every new document of the targets of a registry
+
+    Attributes:
+        name (str): Unique name of the script in its registry, adding a script of the same name replaces it.
+        source (str): The script source.
+        world_name (str | None): The isolated world the script runs in, the main world if None.
+        bundle (bool): Install the script in the bundle of its world. A bundled script runs inside a `try` block,
+            so its top level `let`, `const` and `class` declarations do not reach the global scope; scripts relying
+            on them are installed on their own.
+    """
+    name: str
+    source: str
+    world_name: str | None = None
+    bundle: bool = True
+
+
+class _Installed:
+    __slots__ = ('source', 'identifier')
+
+    def __init__(self, source: str, identifier: str) -> None:
+        self.source = source
+        self.identifier = identifier
+
+
+class InitScriptRegistry(BaseModel):
+    """
+    Installs init scripts on every target of a session manager
+
+    The bundled scripts of a world are concatenated into one `Page.addScriptToEvaluateOnNewDocument` source, a
+    script of the same source is only included once. Every change is installed with one pipelined burst per target
+    that only removes and adds the bundles whose source changed. The first burst of a target ends with
+    `Runtime.runIfWaitingForDebugger`, so targets started paused run their first document with the scripts in
+    place. Sessions the manager creates later get the scripts from a session hook before `get_session` returns
+    them; with `target_types` set the manager watches the browser for those targets. Scripts belong to the session
+    that added them, a new session of a target gets a first burst of its own. A bundle whose removal failed keeps
+    its identifier under a 'stale:' key and is removed again by the next install.
+
+    Examples:
+        registry = InitScriptRegistry(session_manager=session_manager)
+        await registry.add(InitScript(name='webdriver', source=STEALTH_SOURCE))
+        await registry.remove('webdriver')
+    """
+    session_manager: CDPSessionManager
+    target_types: list[str] | None = ['page', 'iframe']
+    run_immediately: bool = False
+    command_timeout: int = 10
+
+    _scripts: dict[str, InitScript] = PrivateAttr(default_factory=dict)
+    # target id to the session the scripts were installed on and its bundle keys to the installed bundles
+    _installed: dict[str, tuple[CDPSession, dict[str, _Installed]]] = PrivateAttr(default_factory=dict)
+    _target_locks: dict[str, asyncio.Lock] = PrivateAttr(default_factory=dict)
+    _hook_added: bool = PrivateAttr(default=False)
+
+    @property
+    def scripts(self) -> dict[str, InitScript]:
+        return dict(self._scripts)
+
+    def identifiers(self, target_id: str) -> dict[str, str]:
+        """ The bundle keys installed on a target and their `Page.ScriptIdentifier`. """
+        if target_id not in self._installed:
+            return {}
+        return {key: installed.identifier for key, installed in self._installed[target_id][1].items()}
+
+    async def add(self, *scripts: InitScript) -> dict[str, BaseException | None]:
+        """Add or replace scripts and install them on every current and future target.
+
+        Returns:
+            dict[str, BaseException | None]: Target id to the error of its installation, None where it succeeded.
+        """
+        for script in scripts:
+            self._scripts[script.name] = script
+
+        if not self._hook_added:
+            await self.session_manager.add_session_hook(self._install, apply_now=False)
+            self._hook_added = True
+            if self.target_types is not None:
+                # the targets found get the scripts from the hook
+                await self.session_manager.watch_targets(self.target_types)
+        return await self._install_all()
+
+    async def remove(self, *names: str) -> dict[str, BaseException | None]:
+        """ Remove scripts from every target, see `add`. """
+        for name in names:
+            self._scripts.pop(name, None)
+        return await self._install_all()
+
+    async def clear(self) -> dict[str, BaseException | None]:
+        """ Remove every script from every target and stop installing them on new ones. """
+        self._scripts.clear()
+        results = await self._install_all()
+        self.session_manager.remove_session_hook(self._install)
+        self._hook_added = False
+        return results
+
+    def bundles(self) -> dict[str, tuple[str, str | None]]:
+        """ The sources to install by bundle key, with their world. """
+        bundles: dict[str, tuple[str, str | None]] = {}
+        parts: dict[str | None, list[str]] = {}
+        seen: set[tuple[str | None, str]] = set()
+        for script in self._scripts.values():
+            if (script.world_name, script.source) in seen:
+                continue
+            seen.add((script.world_name, script.source))
+            if script.bundle:
+                parts.setdefault(script.world_name, []).append(
+                    f'try {{\n{script.source}\n}} catch (error) {{ console.error({script.name!r}, error) }}'
+                )
+            else:
+                bundles[f'script:{script.name}'] = (script.source, script.world_name)
+        for world_name, sources in parts.items():
+            bundles[f'bundle:{world_name or ""}'] = ('\n;\n'.join(sources), world_name)
+        return bundles
+
+    async def _install_all(self) -> dict[str, BaseException | None]:
+        sessions = self.session_manager.sessions
+        for target_id, (cdp_session, _) in list(self._installed.items()):
+            if sessions.get(target_id) is not cdp_session:
+                # closed targets and removed sessions take their scripts with them
+                del self._installed[target_id]
+                self._target_locks.pop(target_id, None)
+        target_sessions = [cdp_session for target_id, cdp_session in sessions.items() if target_id != 'browser']
+        results = await asyncio.gather(
+            *(self._install(cdp_session) for cdp_session in target_sessions), return_exceptions=True
+        )
+        return {
+            cdp_session.target_id: result if isinstance(result, BaseException) else None
+            for cdp_session, result in zip(target_sessions, results)
+        }
+
+    async def _install(self, cdp_session: CDPSession) -> None:
+        lock = self._target_locks.setdefault(cdp_session.target_id, asyncio.Lock())
+        async with lock:
+            await self._install_locked(cdp_session)
+
+    async def _install_locked(self, cdp_session: CDPSession) -> None:
+        target_id = cdp_session.target_id
+        first_install = target_id not in self._installed or self._installed[target_id][0] is not cdp_session
+        if first_install:
+            # scripts belong to the DevTools session, a new session of the target starts without them
+            self._installed[target_id] = (cdp_session, {})
+        installed = self._installed[target_id][1]
+        bundles = self.bundles()
+        removed = [
+            key for key, current in installed.items() if key not in bundles or bundles[key][0] != current.source
+        ]
+        added = [key for key in bundles if key not in installed or key in removed]
+
+        commands: list[CDPMethod] = [
+            Page.RemoveScriptToEvaluateOnNewDocument(identifier=installed[key].identifier) for key in removed
+        ]
+        commands.extend(
+            Page.AddScriptToEvaluateOnNewDocument(
+                source=bundles[key][0], world_name=bundles[key][1], run_immediately=self.run_immediately or None
+            )
+            for key in added
+        )
+        if first_install:
+            # commands run in the order they are sent, the target resumes once the scripts are in place
+            commands.append(Runtime.RunIfWaitingForDebugger())
+        if not commands:
+            return
+        results = await asyncio.gather(
+            *(cdp_session.send(command, self.command_timeout) for command in commands), return_exceptions=True
+        )
+
+        for key, result in zip(removed, results):
+            if not isinstance(result, BaseException):
+                del installed[key]
+        for key, result in zip(added, results[len(removed):]):
+            if not isinstance(result, BaseException):
+                if (previous := installed.get(key)) is not None:
+                    # its removal failed, the old bundle is removed again by the next install
+                    installed[f'stale:{previous.identifier}'] = previous
+                installed[key] = _Installed(bundles[key][0], result.identifier)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    def __str__(self) -> str:
+        return f'InitScriptRegistry(session_manager={self.session_manager}, scripts={len(self._scripts)})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,293 @@
+import asyncio
+import base64
+import fnmatch
+import re
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Literal, NamedTuple
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession
+from cdpkit.exception import NetworkError
+from cdpkit.logger import logger
+from cdpkit.protocol import Network
+
+__all__ = [
+    'ServerSentEvent',
+    'ResponseStream',
+    'StreamReassembler'
+]
+
+OverflowPolicy = Literal['drop_oldest', 'drop_newest', 'close']
+
+
+class ServerSentEvent(NamedTuple):
+    timestamp: float
+    event: str
+    id: str
+    data: str
+
+
+class ResponseStream:
+    """
+    The body of one in-flight response as an async iterator of byte chunks
+
+    Chunks are kept base64 encoded, as received, and decoded one by one as they are read, so dropped chunks are
+    never decoded. The browser cannot be slowed down over CDP, so the buffer is bounded instead: once more than
+    `max_buffer` bytes wait, the overflow policy drops the oldest or the newest chunks, or ends the stream.
+    EventSource requests also queue their parsed messages, read with `messages()`.
+    """
+
+    def __init__(
+        self,
+        request_id: str,
+        url: str,
+        status: int,
+        mime_type: str,
+        resource_type: str,
+        max_buffer: int,
+        overflow: OverflowPolicy
+    ) -> None:
+        self.request_id = request_id
+        self.url = url
+        self.status = status
+        self.mime_type = mime_type
+        self.resource_type = resource_type
+        self.max_buffer = max_buffer
+        self.overflow = overflow
+        self.received = 0
+        self.dropped = 0
+
+        self._chunks: deque[str] = deque()
+        self._buffered = 0
+        # messages are small, about one per KiB of buffer is kept
+        self._messages: deque[ServerSentEvent] = deque(maxlen=max(max_buffer // 1024, 1))
+        self._wakeup = asyncio.Event()
+        self._error: BaseException | None = None
+        self._done = False
+        # chunks received before streaming was confirmed follow its buffered data
+        self._pending: list[str] | None = []
+        self._ended = False
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    @property
+    def buffered(self) -> int:
+        return self._buffered
+
+    def _start(self, buffered_data: str) -> None:
+        pending, self._pending = self._pending, None
+        for data in (buffered_data, *pending):
+            self._feed(data)
+        if self._ended:
+            self._finish()
+
+    def _feed(self, data: str) -> None:
+        if self._done or not data:
+            return
+        if self._pending is not None:
+            self._pending.append(data)
+            return
+
+        size = len(data) * 3 // 4
+        self.received += size
+        if self._buffered + size > self.max_buffer:
+            if self.overflow == 'close':
+                self._finish(NetworkError(f'Stream {self.request_id} buffer overflow, consumer too slow'))
+                return
+            if self.overflow == 'drop_newest':
+                self.dropped += size
+                return
+            while self._chunks and self._buffered + size > self.max_buffer:
+                dropped = self._chunks.popleft()
+                self._buffered -= len(dropped) * 3 // 4
+                self.dropped += len(dropped) * 3 // 4
+
+        self._chunks.append(data)
+        self._buffered += size
+        self._wakeup.set()
+
+    def _feed_message(self, message: ServerSentEvent) -> None:
+        self._messages.append(message)
+        self._wakeup.set()
+
+    def _end(self) -> None:
+        """ The response finished loading, the stream ends once its buffered data was fed. """
+        if self._pending is not None:
+            self._ended = True
+        else:
+            self._finish()
+
+    def _finish(self, error: BaseException | None = None) -> None:
+        if not self._done:
+            self._done = True
+            self._error = error
+            self._wakeup.set()
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._read_chunks()
+
+    async def _read_chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            while self._chunks:
+                data = self._chunks.popleft()
+                self._buffered -= len(data) * 3 // 4
+                yield base64.b64decode(data)
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                return
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def read(self) -> bytes:
+        """ The rest of the body, only suited to bounded responses. """
+        return b''.join([chunk async for chunk in self])
+
+    async def messages(self) -> AsyncIterator[ServerSentEvent]:
+        """ Iterate over the EventSource messages of the stream until it ends. """
+        while True:
+            while self._messages:
+                yield self._messages.popleft()
+            if self._done:
+                return
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def __str__(self) -> str:
+        return f'ResponseStream(request_id={self.request_id}, url={self.url}, received={self.received})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class StreamReassembler(BaseModel):
+    """
+    Exposes matching responses of a session as `ResponseStream`s while they download
+
+    Responses of the given resource types whose mime type and url match are switched to streaming with
+    `Network.streamResourceContent` as soon as their headers arrive; from then on `Network.dataReceived` carries
+    their data. Nothing is stored beyond the bounded buffers of the streams, so long-lived feeds can be consumed
+    for hours. New streams are announced through `streams()`; responses arriving while `max_streams` announced
+    streams are unread are not streamed.
+
+    Examples:
+        reassembler = StreamReassembler(session=cdp_session, mime_types=['text/event-stream'])
+        await reassembler.start()
+        async for stream in reassembler.streams():
+            async for chunk in stream:
+                ...
+    """
+    session: CDPSession
+    mime_types: list[str] = ['text/event-stream', 'application/x-ndjson', 'application/stream+json']
+    resource_types: list[str] | None = ['EventSource', 'Fetch', 'XHR']
+    urls: list[str] | None = None
+    max_buffer: int = 4 * 1024 * 1024
+    overflow: OverflowPolicy = 'drop_oldest'
+    max_streams: int = 100
+    command_timeout: int = 10
+
+    _streams: dict[str, ResponseStream] = PrivateAttr(default_factory=dict)
+    _announced: asyncio.Queue | None = PrivateAttr(default=None)
+    _url_re: re.Pattern | None = PrivateAttr(default=None)
+    _callback_ids: list[int] = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, __context) -> None:
+        if self.urls:
+            self._url_re = re.compile('|'.join(fnmatch.translate(pattern) for pattern in self.urls))
+
+    @property
+    def active_streams(self) -> dict[str, ResponseStream]:
+        return dict(self._streams)
+
+    async def start(self) -> None:
+        self._announced = asyncio.Queue(self.max_streams)
+        for event, callback in (
+            (Network.ResponseReceived, self._on_response_received),
+            (Network.DataReceived, self._on_data_received),
+            (Network.EventSourceMessageReceived, self._on_event_source_message),
+            (Network.LoadingFinished, self._on_loading_finished),
+            (Network.LoadingFailed, self._on_loading_failed),
+        ):
+            self._callback_ids.append(await self.session.register_callback(event, callback, raw=True))
+        await self.session.execute(Network.Enable())
+
+    async def stop(self) -> None:
+        """ Stop streaming, the active streams end after their buffered chunks and `streams()` ends too. """
+        for callback_id in self._callback_ids:
+            await self.session.remove_callback(callback_id)
+        self._callback_ids.clear()
+        for stream in self._streams.values():
+            stream._finish()
+        self._streams.clear()
+        if self._announced.full():
+            # nobody takes the streams, the oldest one makes room for the end of the iteration
+            self._announced.get_nowait()
+        self._announced.put_nowait(None)
+
+    async def streams(self) -> AsyncIterator[ResponseStream]:
+        """ Iterate over the new streams until the reassembler is stopped. """
+        while True:
+            stream = await self._announced.get()
+            if stream is None:
+                return
+            yield stream
+
+    def _matches(self, event_data: dict) -> bool:
+        if self.resource_types is not None and event_data['type'] not in self.resource_types:
+            return False
+        response = event_data['response']
+        if not response.get('mimeType', '').startswith(tuple(self.mime_types)):
+            return False
+        return self._url_re is None or bool(self._url_re.match(response['url']))
+
+    def _on_response_received(self, event_data: dict) -> None:
+        if not self._matches(event_data) or self._announced.full():
+            return
+
+        request_id = event_data['requestId']
+        response = event_data['response']
+        stream = ResponseStream(
+            request_id, response['url'], response['status'], response.get('mimeType', ''), event_data['type'],
+            self.max_buffer, self.overflow
+        )
+        self._streams[request_id] = stream
+        self._announced.put_nowait(stream)
+
+        task = self.session.send(Network.StreamResourceContent(request_id=request_id), self.command_timeout)
+        task.add_done_callback(lambda t: self._on_stream_started(stream, t))
+
+    def _on_stream_started(self, stream: ResponseStream, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is not None:
+            logger.debug(f'Cannot stream {stream}: {task.exception() if not task.cancelled() else "cancelled"}')
+            self._streams.pop(stream.request_id, None)
+            stream._finish(NetworkError(f'Streaming of {stream.request_id} could not be enabled'))
+            return
+        stream._start(task.result().bufferedData)
+
+    def _on_data_received(self, event_data: dict) -> None:
+        if (stream := self._streams.get(event_data['requestId'])) is not None:
+            stream._feed(event_data.get('data', ''))
+
+    def _on_event_source_message(self, event_data: dict) -> None:
+        if (stream := self._streams.get(event_data['requestId'])) is not None:
+            stream._feed_message(ServerSentEvent(
+                event_data['timestamp'], event_data['eventName'], event_data['eventId'], event_data['data']
+            ))
+
+    def _on_loading_finished(self, event_data: dict) -> None:
+        if (stream := self._streams.pop(event_data['requestId'], None)) is not None:
+            stream._end()
+
+    def _on_loading_failed(self, event_data: dict) -> None:
+        if (stream := self._streams.pop(event_data['requestId'], None)) is not None:
+            stream._finish(None if event_data.get('canceled') else NetworkError(event_data['errorText']))
+
+    def __str__(self) -> str:
+        return f'StreamReassembler(session={self.session}, active={len(self._streams)})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
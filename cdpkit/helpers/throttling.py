@@ -0,0 +1,215 @@
+import asyncio
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession, CDPSessionManager
+from cdpkit.protocol import CDPMethod, Emulation, Network, Target
+
+__all__ = [
+    'THROTTLING_PROFILES',
+    'ThrottlingProfile',
+    'ThrottlingReport',
+    'ThrottlingController'
+]
+
+# target types without the Emulation domain, only their network is throttled
+_WORKER_TYPES = frozenset(('worker', 'shared_worker', 'service_worker'))
+
+
+class ThrottlingProfile(BaseModel):
+    """
+    Network and CPU conditions of a lab test
+
+    Attributes:
+        latency (float): Minimum latency from request sent to response headers received, in ms.
+        download_throughput (float): Bytes per second, -1 disables download throttling.
+        upload_throughput (float): Bytes per second, -1 disables upload throttling.
+        connection_type (str | None): Network.ConnectionType reported to the page, e.g. 'cellular3g'.
+        offline (bool): Emulate a lost connection.
+        packet_loss (float | None): WebRTC packet loss in percent.
+        url_patterns (list[str] | None): URLPattern strings the network conditions are limited to, requires
+            `Network.emulateNetworkConditionsByRule`.
+        cpu_rate (float): CPU slowdown factor, 1 is no throttling.
+        cache_disabled (bool): Bypass the HTTP cache.
+    """
+    name: str
+    latency: float = 0
+    download_throughput: float = -1
+    upload_throughput: float = -1
+    connection_type: str | None = None
+    offline: bool = False
+    packet_loss: float | None = None
+    url_patterns: list[str] | None = None
+    cpu_rate: float = 1
+    cache_disabled: bool = False
+
+    def commands(self, by_rule: bool = False, target_type: str = 'page') -> list[CDPMethod]:
+        """ The commands applying the profile to a target of the given type, in order. """
+        commands: list[CDPMethod] = [Network.Enable()]
+        if by_rule or self.url_patterns is not None:
+            commands.append(Network.EmulateNetworkConditionsByRule(
+                offline=self.offline,
+                matched_network_conditions=[
+                    {
+                        'urlPattern': url_pattern,
+                        'latency': self.latency,
+                        'downloadThroughput': self.download_throughput,
+                        'uploadThroughput': self.upload_throughput,
+                        'connectionType': self.connection_type,
+                        'packetLoss': self.packet_loss,
+                    }
+                    for url_pattern in self.url_patterns or ['']
+                ]
+            ))
+            commands.append(Network.OverrideNetworkState(
+                offline=self.offline,
+                latency=self.latency,
+                download_throughput=self.download_throughput,
+                upload_throughput=self.upload_throughput,
+                connection_type=self.connection_type
+            ))
+        else:
+            commands.append(Network.EmulateNetworkConditions(
+                offline=self.offline,
+                latency=self.latency,
+                download_throughput=self.download_throughput,
+                upload_throughput=self.upload_throughput,
+                connection_type=self.connection_type,
+                packet_loss=self.packet_loss
+            ))
+        if target_type not in _WORKER_TYPES:
+            commands.append(Emulation.SetCPUThrottlingRate(rate=self.cpu_rate))
+        commands.append(Network.SetCacheDisabled(cache_disabled=self.cache_disabled))
+        return commands
+
+
+def _kbps(kbps: float) -> float:
+    return kbps * 1024 / 8
+
+
+THROTTLING_PROFILES: dict[str, ThrottlingProfile] = {profile.name: profile for profile in (
+    ThrottlingProfile(name='no-throttling'),
+    ThrottlingProfile(name='offline', offline=True),
+    ThrottlingProfile(
+        name='slow-3g', latency=2000, download_throughput=_kbps(400), upload_throughput=_kbps(400),
+        connection_type='cellular3g'
+    ),
+    ThrottlingProfile(
+        name='fast-3g', latency=562.5, download_throughput=_kbps(1474.56), upload_throughput=_kbps(675),
+        connection_type='cellular3g'
+    ),
+    ThrottlingProfile(
+        name='4g', latency=170, download_throughput=_kbps(9000), upload_throughput=_kbps(9000),
+        connection_type='cellular4g'
+    ),
+    ThrottlingProfile(name='slow-cpu', cpu_rate=4),
+    # the simulated mobile conditions of Lighthouse
+    ThrottlingProfile(
+        name='lighthouse-mobile', latency=150, download_throughput=_kbps(1638.4), upload_throughput=_kbps(675),
+        connection_type='cellular4g', cpu_rate=4
+    ),
+)}
+
+
+class ThrottlingReport(BaseModel):
+    profile: str
+    # target ids where every command succeeded
+    confirmed: list[str] = []
+    # target id to the error of its first failed command
+    failed: dict[str, str] = {}
+
+
+class ThrottlingController(BaseModel):
+    """
+    Applies a throttling profile to every target of a session manager
+
+    The commands of a profile are pipelined on every target session concurrently, and the report tells which
+    targets confirmed all of them. Sessions the manager creates later get the current profile from a session
+    hook and are added to the report of the profile; with `target_types` set the manager watches the browser for
+    those targets, workers and iframes included. Workers have no `Emulation` domain, they only get the network
+    conditions and the CPU rate of their page applies to them.
+
+    Examples:
+        controller = ThrottlingController(session_manager=session_manager)
+        report = await controller.apply('lighthouse-mobile')
+        print(report.failed)
+    """
+    session_manager: CDPSessionManager
+    target_types: list[str] | None = ['page', 'iframe', 'worker', 'shared_worker', 'service_worker']
+    by_rule: bool = False
+    command_timeout: int = 10
+
+    _profile: ThrottlingProfile | None = PrivateAttr(default=None)
+    _report: ThrottlingReport | None = PrivateAttr(default=None)
+    _hook_added: bool = PrivateAttr(default=False)
+
+    @property
+    def profile(self) -> ThrottlingProfile | None:
+        return self._profile
+
+    @property
+    def report(self) -> ThrottlingReport | None:
+        return self._report
+
+    async def apply(self, profile: str | ThrottlingProfile) -> ThrottlingReport:
+        """Apply a profile to every current and future target.
+
+        Args:
+            profile (str | ThrottlingProfile): A profile or the name of one of `THROTTLING_PROFILES`.
+
+        Returns:
+            ThrottlingReport: The targets that confirmed the profile and those that failed.
+        """
+        self._profile = THROTTLING_PROFILES[profile] if isinstance(profile, str) else profile
+        report = self._report = ThrottlingReport(profile=self._profile.name)
+
+        if not self._hook_added:
+            await self.session_manager.add_session_hook(self._apply_to, apply_now=False)
+            self._hook_added = True
+            if self.target_types is not None:
+                # the targets found get the profile from the hook
+                await self.session_manager.watch_targets(self.target_types)
+
+        browser_session = await self.session_manager.get_session()
+        targets_resp = await browser_session.execute(Target.GetTargets(), self.command_timeout)
+        target_types = {target_info.targetId: target_info.type for target_info in targets_resp.targetInfos}
+        await asyncio.gather(*(
+            self._apply_to(cdp_session, target_types.get(target_id))
+            for target_id, cdp_session in self.session_manager.sessions.items()
+            if target_id != 'browser' and target_id not in report.confirmed and target_id not in report.failed
+        ), return_exceptions=True)
+        return report
+
+    async def reset(self) -> ThrottlingReport:
+        """ Remove the throttling of every target and stop applying it to new ones. """
+        report = await self.apply('no-throttling')
+        self.session_manager.remove_session_hook(self._apply_to)
+        self._hook_added = False
+        return report
+
+    async def _apply_to(self, cdp_session: CDPSession, target_type: str | None = None) -> None:
+        profile, report = self._profile, self._report
+        if target_type is None:
+            try:
+                browser_session = await self.session_manager.get_session()
+                target_type = (await browser_session.execute(
+                    Target.GetTargetInfo(target_id=cdp_session.target_id), self.command_timeout
+                )).targetInfo.type
+            except Exception as exc:
+                report.failed[cdp_session.target_id] = f'GetTargetInfo: {exc!r}'
+                raise
+        commands = profile.commands(self.by_rule, target_type)
+        results = await asyncio.gather(
+            *(cdp_session.send(command, self.command_timeout) for command in commands), return_exceptions=True
+        )
+        for command, result in zip(commands, results):
+            if isinstance(result, BaseException):
+                report.failed[cdp_session.target_id] = f'{command.__class__.__name__}: {result!r}'
+                raise result
+        report.confirmed.append(cdp_session.target_id)
+
+    def __str__(self) -> str:
+        return f'ThrottlingController(session_manager={self.session_manager}, profile={self._profile})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,339 @@
+import asyncio
+import base64
+import fnmatch
+import json
+import re
+import struct
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, BinaryIO, NamedTuple
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession
+from cdpkit.logger import logger
+from cdpkit.protocol import Network
+
+__all__ = [
+    'CapturedFrame',
+    'WebSocketCapture',
+    'WebSocketLog'
+]
+
+_MAGIC = b'CDPW\x01'
+_FLAG_ZSTD = 1
+# compressed length, uncompressed length, record count
+_BLOCK_HEADER = struct.Struct('<III')
+# timestamp, connection index, opcode, kind, payload length
+_RECORD_HEADER = struct.Struct('<dIBBI')
+
+_RECEIVED, _SENT, _OPENED, _CLOSED, _ERROR = range(5)
+_DIRECTIONS = {_RECEIVED: 'received', _SENT: 'sent'}
+
+
+def _zstd() -> Any:
+    """ The zstd module of the standard library (3.14+) or of the `zstandard` package. """
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('zstd compression requires Python 3.14 or the zstandard package') from None
+    return zstandard
+
+
+class CapturedFrame(NamedTuple):
+    timestamp: float
+    request_id: str
+    url: str
+    direction: str
+    opcode: int
+    # length of the payload as sent by the browser, base64 for binary frames
+    size: int
+    # None when read without payloads
+    payload: bytes | str | None
+
+
+class WebSocketCapture(BaseModel):
+    """
+    Captures the WebSocket frames of a session into an append-only log
+
+    Frame events are consumed raw. A connection matched by no `urls` pattern, or a frame whose opcode is not in
+    `opcodes`, is dropped on a dict lookup before its payload is touched. Kept frames are buffered and written
+    in blocks of at most `batch_size` records, or every `flush_interval` seconds, from a worker thread. Every
+    record is a fixed-size header followed by the payload as sent by the browser (base64 for binary frames). With
+    `compress` each block is a zstd frame, which requires Python 3.14 or the `zstandard` package.
+
+    Examples:
+        capture = WebSocketCapture(session=cdp_session, path=Path('frames.cdpw'), urls=['wss://*.example.com/*'])
+        await capture.start()
+        ...
+        await capture.stop()
+        for frame in WebSocketLog(Path('frames.cdpw')).frames(opcode=1):
+            ...
+    """
+    session: CDPSession
+    path: Path
+    urls: list[str] | None = None
+    opcodes: set[int] | None = None
+    directions: set[str] = {'received', 'sent'}
+    batch_size: int = 4096
+    flush_interval: float = 1.0
+    compress: bool = False
+
+    _file: BinaryIO | None = PrivateAttr(default=None)
+    _url_re: re.Pattern | None = PrivateAttr(default=None)
+    # requestId to the connection index of the open connections, None for filtered out connections
+    _connections: dict[str, int | None] = PrivateAttr(default_factory=dict)
+    _batch: list[bytes] = PrivateAttr(default_factory=list)
+    _batch_records: int = PrivateAttr(default=0)
+    _write_lock: asyncio.Lock | None = PrivateAttr(default=None)
+    _flush_task: asyncio.Task | None = PrivateAttr(default=None)
+    _write_tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+    _callback_ids: list[int] = PrivateAttr(default_factory=list)
+    _opened: int = PrivateAttr(default=0)
+    _captured: int = PrivateAttr(default=0)
+    _filtered: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context) -> None:
+        if self.compress:
+            _zstd()
+        if self.urls:
+            self._url_re = re.compile('|'.join(fnmatch.translate(pattern) for pattern in self.urls))
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'captured': self._captured, 'filtered': self._filtered, 'connections': self._opened}
+
+    async def start(self) -> None:
+        self._file = open(self.path, 'wb')
+        self._file.write(_MAGIC + bytes((_FLAG_ZSTD if self.compress else 0,)))
+        self._write_lock = asyncio.Lock()
+
+        for event, callback in (
+            (Network.WebSocketCreated, self._on_created),
+            (Network.WebSocketClosed, self._on_closed),
+            (Network.WebSocketFrameError, self._on_frame_error),
+        ):
+            self._callback_ids.append(await self.session.register_callback(event, callback, raw=True))
+        if 'received' in self.directions:
+            self._callback_ids.append(await self.session.register_callback(
+                Network.WebSocketFrameReceived, self._on_frame_received, raw=True
+            ))
+        if 'sent' in self.directions:
+            self._callback_ids.append(await self.session.register_callback(
+                Network.WebSocketFrameSent, self._on_frame_sent, raw=True
+            ))
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+        await self.session.execute(Network.Enable())
+
+    async def stop(self) -> None:
+        for callback_id in self._callback_ids:
+            await self.session.remove_callback(callback_id)
+        self._callback_ids.clear()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        self._flush()
+        if self._write_tasks:
+            await asyncio.gather(*self._write_tasks, return_exceptions=True)
+        self._file.close()
+        self._file = None
+        logger.info(f'Captured {self._captured} WebSocket frames to {self.path}')
+
+    def _append(self, timestamp: float, connection: int, opcode: int, kind: int, payload: bytes) -> None:
+        self._batch.append(_RECORD_HEADER.pack(timestamp, connection, opcode, kind, len(payload)))
+        self._batch.append(payload)
+        self._batch_records += 1
+        if self._batch_records >= self.batch_size:
+            self._flush()
+
+    def _on_created(self, event_data: dict) -> None:
+        url = event_data['url']
+        if self._url_re is not None and not self._url_re.match(url):
+            self._connections[event_data['requestId']] = None
+            return
+        self._open_connection(event_data['requestId'], url)
+
+    def _open_connection(self, request_id: str, url: str) -> int:
+        connection = self._opened
+        self._opened += 1
+        self._connections[request_id] = connection
+        self._append(0.0, connection, 0, _OPENED, json.dumps({'requestId': request_id, 'url': url}).encode())
+        return connection
+
+    def _on_closed(self, event_data: dict) -> None:
+        if (connection := self._connections.pop(event_data['requestId'], None)) is not None:
+            self._append(event_data['timestamp'], connection, 0, _CLOSED, b'')
+
+    def _on_frame_error(self, event_data: dict) -> None:
+        if (connection := self._connections.get(event_data['requestId'])) is not None:
+            self._append(event_data['timestamp'], connection, 0, _ERROR, event_data['errorMessage'].encode())
+
+    def _on_frame(self, event_data: dict, kind: int) -> None:
+        connection = self._connections.get(event_data['requestId'], -1)
+        if connection == -1:
+            # created before the capture started, its url is not known
+            if self._url_re is not None:
+                connection = self._connections[event_data['requestId']] = None
+            else:
+                connection = self._open_connection(event_data['requestId'], '')
+        if connection is None:
+            self._filtered += 1
+            return
+
+        frame = event_data['response']
+        opcode = int(frame['opcode'])
+        if self.opcodes is not None and opcode not in self.opcodes:
+            self._filtered += 1
+            return
+        self._captured += 1
+        self._append(event_data['timestamp'], connection, opcode, kind, frame['payloadData'].encode())
+
+    def _on_frame_received(self, event_data: dict) -> None:
+        self._on_frame(event_data, _RECEIVED)
+
+    def _on_frame_sent(self, event_data: dict) -> None:
+        self._on_frame(event_data, _SENT)
+
+    def _flush(self) -> None:
+        if not self._batch_records:
+            return
+        batch, records = self._batch, self._batch_records
+        self._batch, self._batch_records = [], 0
+        task = asyncio.create_task(self._write_block(batch, records))
+        self._write_tasks.add(task)
+        task.add_done_callback(self._write_tasks.discard)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self._flush()
+
+    async def _write_block(self, batch: list[bytes], records: int) -> None:
+        # blocks are written in the order they were flushed
+        async with self._write_lock:
+            await asyncio.to_thread(self._write, b''.join(batch), records)
+
+    def _write(self, data: bytes, records: int) -> None:
+        block = _zstd().compress(data) if self.compress else data
+        self._file.write(_BLOCK_HEADER.pack(len(block), len(data), records))
+        self._file.write(block)
+
+    def __str__(self) -> str:
+        return f'WebSocketCapture(session={self.session}, path={self.path})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class WebSocketLog:
+    """
+    Reads a log written by `WebSocketCapture`
+
+    The connections are indexed once when the log is opened. Every `frames` and `summary` call reads the blocks
+    again, payloads are only sliced out when iterated with `payloads` set.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        # requestId and url per connection index
+        self.connections: list[tuple[str, str]] = []
+        self._compressed = False
+        self._frames = 0
+        with open(self.path, 'rb') as f:
+            header = f.read(len(_MAGIC) + 1)
+            if header[:len(_MAGIC)] != _MAGIC:
+                raise ValueError(f'{self.path} is not a WebSocket capture')
+            self._compressed = bool(header[-1] & _FLAG_ZSTD)
+        for _, _, _, kind, _, payload in self._records(payloads=True, frames_only=False):
+            if kind == _OPENED:
+                opened = json.loads(payload)
+                self.connections.append((opened['requestId'], opened['url']))
+            elif kind in _DIRECTIONS:
+                self._frames += 1
+
+    def __len__(self) -> int:
+        return self._frames
+
+    def _blocks(self) -> Iterator[bytes]:
+        zstd = _zstd() if self._compressed else None
+        with open(self.path, 'rb') as f:
+            f.seek(len(_MAGIC) + 1)
+            while header := f.read(_BLOCK_HEADER.size):
+                length, _, _ = _BLOCK_HEADER.unpack(header)
+                block = f.read(length)
+                yield zstd.decompress(block) if zstd is not None else block
+
+    def _records(self, payloads: bool, frames_only: bool = True) -> Iterator[tuple[float, int, int, int, int, bytes]]:
+        """ (timestamp, connection, opcode, kind, payload length, payload or b'') of every record. """
+        for block in self._blocks():
+            offset = 0
+            while offset < len(block):
+                timestamp, connection, opcode, kind, length = _RECORD_HEADER.unpack_from(block, offset)
+                offset += _RECORD_HEADER.size
+                if not frames_only or kind in _DIRECTIONS:
+                    payload = block[offset:offset + length] if payloads else b''
+                    yield timestamp, connection, opcode, kind, length, payload
+                offset += length
+
+    def frames(
+        self,
+        url: str | None = None,
+        opcode: int | None = None,
+        direction: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        payloads: bool = True
+    ) -> Iterator[CapturedFrame]:
+        """Iterate over the captured frames matching every given filter.
+
+        Args:
+            url (str | None): Glob pattern the url of the connection must match.
+            opcode (int | None): 1 for text frames, 2 for binary frames.
+            direction (str | None): 'received' or 'sent'.
+            since (float | None): Minimum Network.MonotonicTime of the frame.
+            until (float | None): Maximum Network.MonotonicTime of the frame.
+            payloads (bool): Decode payloads, text frames as str and binary frames as bytes.
+
+        Yields:
+            CapturedFrame: The frames in capture order.
+        """
+        url_re = re.compile(fnmatch.translate(url)) if url is not None else None
+        connections = [url_re is None or bool(url_re.match(conn_url)) for _, conn_url in self.connections]
+
+        for timestamp, connection, frame_opcode, kind, size, payload in self._records(payloads):
+            if not connections[connection] or (opcode is not None and frame_opcode != opcode):
+                continue
+            if direction is not None and _DIRECTIONS[kind] != direction:
+                continue
+            if (since is not None and timestamp < since) or (until is not None and timestamp > until):
+                continue
+
+            request_id, conn_url = self.connections[connection]
+            decoded = None
+            if payloads:
+                decoded = base64.b64decode(payload) if frame_opcode == 2 else payload.decode()
+            yield CapturedFrame(timestamp, request_id, conn_url, _DIRECTIONS[kind], frame_opcode, size, decoded)
+
+    def summary(self) -> dict[str, Any]:
+        """ Frame counts and payload bytes per connection url, direction and opcode. """
+        frames, sizes = Counter(), Counter()
+        for _, connection, opcode, kind, length, _ in self._records(payloads=False):
+            key = (self.connections[connection][1], _DIRECTIONS[kind], opcode)
+            frames[key] += 1
+            sizes[key] += length
+        return {
+            'frames': self._frames,
+            'connections': len(self.connections),
+            'by_stream': [
+                {'url': url, 'direction': direction, 'opcode': opcode, 'frames': count, 'bytes': sizes[key]}
+                for key, count in frames.items()
+                for url, direction, opcode in (key,)
+            ],
+        }
@@ -1,3 +1,7 @@
+import asyncio
+import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, TypeVar
 
 from pydantic import BaseModel, ConfigDict
@@ -11,12 +15,54 @@ __all__ = [
     'CDPEvent',
     'CDPMethod',
     'JSON_DICT',
-    'RESULT_TYPE'
+    'RESULT_TYPE',
+    'set_parse_offload',
+    'should_offload',
+    'run_offloaded'
 ]
 
 RESULT_TYPE = TypeVar('RESULT_TYPE')
 JSON_DICT = dict[str, Any]
 
+# JSON decoding and pydantic validation hold the GIL, so offloading them only pays off on free-threaded builds.
+_GIL_ENABLED = getattr(sys, '_is_gil_enabled', lambda: True)()
+
+_offload_threshold: int | None = None if _GIL_ENABLED else 256 * 1024
+_offload_max_workers: int | None = None
+_offload_executor: ThreadPoolExecutor | None = None
+
+
+def set_parse_offload(threshold: int | None, max_workers: int | None = None) -> None:
+    """Configure the decoding of large messages in a thread pool.
+
+    Messages and responses of at least `threshold` characters are decoded and validated in a thread pool instead
+    of on the event loop. Enabled by default with a 256 KiB threshold on free-threaded builds, disabled otherwise.
+
+    Args:
+        threshold (int | None): Minimum size in characters to offload, None disables offloading.
+        max_workers (int | None): Size of the thread pool, defaults to the ThreadPoolExecutor default.
+    """
+    global _offload_threshold, _offload_max_workers, _offload_executor
+
+    _offload_threshold = threshold
+    if max_workers != _offload_max_workers and _offload_executor is not None:
+        _offload_executor.shutdown(wait=False)
+        _offload_executor = None
+    _offload_max_workers = max_workers
+
+
+def should_offload(size: int) -> bool:
+    return _offload_threshold is not None and size >= _offload_threshold
+
+
+async def run_offloaded[T](func: Callable[..., T], *args) -> T:
+    """Run `func(*args)` in the parse thread pool."""
+    global _offload_executor
+
+    if _offload_executor is None:
+        _offload_executor = ThreadPoolExecutor(max_workers=_offload_max_workers, thread_name_prefix='cdpkit-parse')
+    return await asyncio.get_running_loop().run_in_executor(_offload_executor, func, *args)
+
 
 def gen_command_name(class_obj: object, remove_suffix: str) -> str:
     """Generate a DevTools protocol command name from a class object.
@@ -131,18 +177,24 @@ class CDPMethod[RESULT_TYPE]:
             }
         return self._command
 
-    async def parse_response(self, response: str) -> RESULT_TYPE:
+    async def parse_response(self, response: str | JSON_DICT) -> RESULT_TYPE:
         """
         Parse the response of the CDP method
 
+        Large JSON responses are validated in the parse thread pool, see `set_parse_offload`.
+
         Args:
-            response (str): The response string.
+            response (str | JSON_DICT): The `result` of the response, as JSON text or as decoded dict.
 
         Returns:
             RESULT_TYPE: The parsed response result.
         """
-        logger.info(f'Parsing response for command: {response}')
+        logger.info(f'Parsing response for command: {self.command["method"]}')
         if self.OUTPUT_VALIDATOR is None:
             return None
+        elif isinstance(response, dict):
+            return self.OUTPUT_VALIDATOR.model_validate(response)
         else:
+            if should_offload(len(response)):
+                return await run_offloaded(self.OUTPUT_VALIDATOR.model_validate_json, response)
             return self.OUTPUT_VALIDATOR.model_validate_json(response)
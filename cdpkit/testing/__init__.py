@@ -0,0 +1,13 @@
+from . import workloads
+from .recorder import CDPRecorder, RecordedMessage, read_recording
+from .server import CommandHandler, MockCDPServer, MockTarget
+
+__all__ = [
+    'MockCDPServer',
+    'MockTarget',
+    'CommandHandler',
+    'CDPRecorder',
+    'RecordedMessage',
+    'read_recording',
+    'workloads'
+]
@@ -0,0 +1,106 @@
+import gzip
+import struct
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+from pydantic import BaseModel, PrivateAttr
+
+from cdpkit.connection import CDPSession, CDPSessionManager
+from cdpkit.logger import logger
+
+__all__ = [
+    'CDPRecorder',
+    'RecordedMessage',
+    'read_recording'
+]
+
+_MAGIC = b'CDPR\x01'
+# time offset, outgoing flag, target id length, message length
+_RECORD_HEADER = struct.Struct('<d?HI')
+
+
+class RecordedMessage(NamedTuple):
+    timestamp: float
+    outgoing: bool
+    target_id: str
+    message: str
+
+
+def _open(path: Path, mode: str) -> BinaryIO:
+    if path.suffix == '.gz':
+        return gzip.open(path, mode, compresslevel=6)
+    return open(path, mode)
+
+
+class CDPRecorder(BaseModel):
+    """
+    Records the WebSocket traffic of sessions into a compact binary file
+
+    Every message is stored as a fixed-size header (time offset, direction, lengths) followed by the target id and
+    the raw JSON text. Paths ending in `.gz` are gzip-compressed. Recordings can be replayed by `MockCDPServer`.
+
+    Examples:
+        recorder = CDPRecorder(path='session.cdpr.gz')
+        recorder.attach_manager(session_manager)
+        ...
+        recorder.close()
+    """
+    path: Path
+
+    _file: BinaryIO | None = PrivateAttr(default=None)
+    _started_at: float = PrivateAttr(default=0.0)
+    _count: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context) -> None:
+        self._file = _open(self.path, 'wb')
+        self._file.write(_MAGIC)
+        self._started_at = time.monotonic()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def attach(self, cdp_session: CDPSession) -> None:
+        cdp_session.set_traffic_hook(self.record)
+
+    def attach_manager(self, session_manager: CDPSessionManager) -> None:
+        session_manager.set_traffic_hook(self.record)
+
+    def record(self, target_id: str, outgoing: bool, message: str) -> None:
+        if self._file is None:
+            return
+        target_bytes = target_id.encode()
+        message_bytes = message.encode()
+        self._file.write(_RECORD_HEADER.pack(
+            time.monotonic() - self._started_at, outgoing, len(target_bytes), len(message_bytes)
+        ))
+        self._file.write(target_bytes)
+        self._file.write(message_bytes)
+        self._count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(f'Recorded {self._count} messages to {self.path}')
+
+    def __enter__(self) -> 'CDPRecorder':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def read_recording(path: str | Path) -> Iterator[RecordedMessage]:
+    """ Iterate over the messages of a recording made by `CDPRecorder`. """
+    path = Path(path)
+    with _open(path, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f'{path} is not a cdpkit recording')
+
+        while header := f.read(_RECORD_HEADER.size):
+            timestamp, outgoing, target_length, message_length = _RECORD_HEADER.unpack(header)
+            target_id = f.read(target_length).decode()
+            yield RecordedMessage(timestamp, outgoing, target_id, f.read(message_length).decode())
@@ -0,0 +1,375 @@
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+import random
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, PrivateAttr
+from websockets.asyncio.server import Server, ServerConnection, serve
+from websockets.datastructures import Headers
+from websockets.exceptions import ConnectionClosed
+from websockets.http11 import Request, Response
+
+from cdpkit.logger import logger
+from cdpkit.testing.recorder import read_recording
+
+__all__ = [
+    'CommandHandler',
+    'MockCDPServer',
+    'MockTarget'
+]
+
+# called with (target_id, params), returns the command result, raising makes it an error response
+CommandHandler = Callable[[str, dict[str, Any]], dict[str, Any] | Awaitable[dict[str, Any]]]
+
+
+class MockTarget(BaseModel):
+    target_id: str
+    type: str = 'page'
+    url: str = 'about:blank'
+    title: str = ''
+
+    def target_info(self) -> dict[str, Any]:
+        return {
+            'targetId': self.target_id,
+            'type': self.type,
+            'title': self.title,
+            'url': self.url,
+            'attached': False,
+        }
+
+
+class _Replay(BaseModel):
+    """ Recorded responses and events of one target. """
+    responses: dict[str, list[dict]] = {}
+    method_responses: dict[str, list[dict]] = {}
+    events: list[tuple[float, str]] = []
+
+    _served: dict[str, int] = PrivateAttr(default_factory=lambda: defaultdict(int))
+    _replayed: int = PrivateAttr(default=0)
+
+    def take_events(self) -> list[tuple[float, str]]:
+        """ The events not replayed yet, every loaded event is replayed once. """
+        events, self._replayed = self.events[self._replayed:], len(self.events)
+        return events
+
+    def take_response(self, method: str, params: dict) -> dict | None:
+        key = f'{method}:{json.dumps(params, sort_keys=True)}'
+        for responses, response_key in ((self.responses, key), (self.method_responses, method)):
+            if responses.get(response_key):
+                # responses are served in recorded order, the last one is repeated once exhausted
+                index = min(self._served[response_key], len(responses[response_key]) - 1)
+                self._served[response_key] += 1
+                return responses[response_key][index]
+        return None
+
+
+class MockCDPServer(BaseModel):
+    """
+    A local stand-in for the `remote-debugging-port` of a browser
+
+    Serves `/json/version`, `/json/list` and the browser and page WebSocket endpoints. Commands are answered by
+    registered handlers, by a recording loaded with `load_recording`, or with an empty result. Every response is
+    delayed by `latency` plus up to `jitter` seconds.
+
+    Examples:
+        async with MockCDPServer(latency=0.002) as server:
+            server.on_command('DOM.getDocument', lambda target_id, params: workloads.dom_document(50000))
+            target_id = server.add_target()
+            server.stream_events(target_id, 'Network.requestWillBeSent', workloads.request_will_be_sent, rate=10000)
+
+            session_manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+    """
+    host: str = '127.0.0.1'
+    port: int = 0
+    latency: float = 0.0
+    jitter: float = 0.0
+    strict: bool = False
+
+    _server: Server | None = PrivateAttr(default=None)
+    _targets: dict[str, MockTarget] = PrivateAttr(default_factory=dict)
+    _handlers: dict[str, CommandHandler] = PrivateAttr(default_factory=dict)
+    _connections: dict[str, set[ServerConnection]] = PrivateAttr(default_factory=lambda: defaultdict(set))
+    _replays: dict[str, _Replay] = PrivateAttr(default_factory=dict)
+    _replay_speed: float = PrivateAttr(default=1.0)
+    _tasks: set[asyncio.Task] = PrivateAttr(default_factory=set)
+    _target_ids: Any = PrivateAttr(default_factory=itertools.count)
+
+    def model_post_init(self, __context) -> None:
+        self._handlers.update({
+            'Browser.getVersion': self._get_version,
+            'Target.getTargets': self._get_targets,
+            'Target.getTargetInfo': self._get_target_info,
+            'Target.createTarget': self._create_target,
+            'Target.closeTarget': self._close_target,
+            'SystemInfo.getProcessInfo': lambda *_: {'processInfo': [{'type': 'browser', 'id': 1, 'cpuTime': 0.0}]},
+            'Performance.getMetrics': lambda *_: {'metrics': []},
+        })
+
+    @property
+    def ws_endpoint(self) -> str:
+        """ The address to pass to `CDPSessionManager(ws_endpoint=...)`. """
+        return f'{self.host}:{self.port}'
+
+    @property
+    def targets(self) -> dict[str, MockTarget]:
+        return dict(self._targets)
+
+    async def start(self) -> None:
+        self._server = await serve(
+            self._handle_connection, self.host, self.port, process_request=self._process_http_request, max_size=None
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f'Mock CDP server listening on {self.ws_endpoint}')
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> 'MockCDPServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    def on_command(self, method: str, handler: CommandHandler) -> None:
+        self._handlers[method] = handler
+
+    def add_target(self, target_id: str | None = None, url: str = 'about:blank', type_: str = 'page') -> str:
+        if target_id is None:
+            target_id = f'MOCK{next(self._target_ids):08X}'
+        self._targets[target_id] = MockTarget(target_id=target_id, url=url, type=type_)
+        return target_id
+
+    async def emit(self, target_id: str, method: str, params: dict[str, Any] | None = None) -> None:
+        await self._broadcast(target_id, json.dumps({'method': method, 'params': params or {}}))
+
+    def stream_events(
+        self,
+        target_id: str,
+        method: str,
+        params: dict[str, Any] | Callable[[int], dict[str, Any]],
+        rate: float,
+        count: int | None = None
+    ) -> asyncio.Task:
+        """
+        Send events to a target at a steady rate
+
+        Args:
+            target_id (str): The target whose connections receive the events.
+            method (str): The event name, e.g. `Network.requestWillBeSent`.
+            params (dict | Callable[[int], dict]): The event params, or a factory called with the event index.
+            rate (float): Events per second.
+            count (int | None): Number of events to send, None streams until the task is cancelled.
+        """
+        return self._spawn(self._stream_events(target_id, method, params, rate, count))
+
+    async def _stream_events(self, target_id, method, params, rate, count) -> None:
+        loop = asyncio.get_running_loop()
+        static_message = None if callable(params) else json.dumps({'method': method, 'params': params})
+
+        started_at = loop.time()
+        sent = 0
+        while count is None or sent < count:
+            due = int((loop.time() - started_at) * rate) + 1
+            if count is not None:
+                due = min(due, count)
+            while sent < due:
+                message = static_message or json.dumps({'method': method, 'params': params(sent)})
+                await self._broadcast(target_id, message)
+                sent += 1
+            await asyncio.sleep(max(started_at + sent / rate - loop.time(), 0))
+
+    def load_recording(self, path: str | Path, speed: float = 1.0) -> None:
+        """
+        Replay a recording made by `CDPRecorder`
+
+        The recorded targets are added to the server. Commands are answered with the recorded response of the
+        same method and params, falling back to the same method, and the recorded events of a target are sent with
+        their original timing, divided by `speed`, once, when the next client connects to it.
+        """
+        sent_commands: dict[tuple[str, int], tuple[str, str]] = {}
+        started_at: dict[str, float] = {}
+        self._replay_speed = speed
+
+        for recorded in read_recording(path):
+            message = json.loads(recorded.message)
+            replay = self._replays.setdefault(recorded.target_id, _Replay())
+            started_at.setdefault(recorded.target_id, recorded.timestamp)
+            if recorded.target_id != 'browser' and recorded.target_id not in self._targets:
+                self.add_target(recorded.target_id)
+
+            if recorded.outgoing:
+                key = f'{message["method"]}:{json.dumps(message.get("params", {}), sort_keys=True)}'
+                sent_commands[(recorded.target_id, message['id'])] = (message['method'], key)
+            elif 'id' in message:
+                method, key = sent_commands.pop((recorded.target_id, message['id']), (None, None))
+                if method is None:
+                    continue
+                body = {_: message[_] for _ in ('result', 'error') if _ in message}
+                replay.responses.setdefault(key, []).append(body)
+                replay.method_responses.setdefault(method, []).append(body)
+            else:
+                replay.events.append((recorded.timestamp - started_at[recorded.target_id], recorded.message))
+
+    async def _replay_events(self, target_id: str, events: list[tuple[float, str]]) -> None:
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        for offset, message in events:
+            delay = started_at + offset / self._replay_speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._broadcast(target_id, message)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _broadcast(self, target_id: str, message: str) -> None:
+        for connection in list(self._connections.get(target_id, ())):
+            try:
+                await connection.send(message)
+            except ConnectionClosed:
+                self._connections[target_id].discard(connection)
+
+    def _json_response(self, data: Any) -> Response:
+        body = json.dumps(data).encode()
+        headers = Headers({'Content-Type': 'application/json; charset=UTF-8', 'Content-Length': str(len(body))})
+        return Response(HTTPStatus.OK.value, HTTPStatus.OK.phrase, headers, body)
+
+    def _process_http_request(self, connection: ServerConnection, request: Request) -> Response | None:
+        path = request.path.rstrip('/')
+        if path == '/json/version':
+            return self._json_response({
+                'Browser': 'MockCDP/1.0',
+                'Protocol-Version': '1.3',
+                'webSocketDebuggerUrl': f'ws://{self.ws_endpoint}/devtools/browser/mock',
+            })
+        elif path in ('/json', '/json/list'):
+            return self._json_response([
+                {
+                    'id': target.target_id,
+                    'type': target.type,
+                    'title': target.title,
+                    'url': target.url,
+                    'webSocketDebuggerUrl': f'ws://{self.ws_endpoint}/devtools/page/{target.target_id}',
+                }
+                for target in self._targets.values()
+            ])
+        return None
+
+    async def _handle_connection(self, connection: ServerConnection) -> None:
+        path = connection.request.path
+        target_id = 'browser' if path.startswith('/devtools/browser/') else path.rsplit('/', 1)[-1]
+        if target_id != 'browser' and target_id not in self._targets:
+            self.add_target(target_id)
+
+        self._connections[target_id].add(connection)
+        replay = self._replays.get(target_id)
+        if replay is not None and (events := replay.take_events()):
+            self._spawn(self._replay_events(target_id, events))
+
+        try:
+            async for raw_message in connection:
+                command = json.loads(raw_message)
+                if self.latency or self.jitter:
+                    self._spawn(self._respond(connection, target_id, command))
+                else:
+                    await self._respond(connection, target_id, command)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._connections[target_id].discard(connection)
+
+    async def _respond(self, connection: ServerConnection, target_id: str, command: dict) -> None:
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        method, params = command.get('method', ''), command.get('params', {})
+        body = None
+        replay = self._replays.get(target_id)
+        if replay is not None:
+            body = replay.take_response(method, params)
+
+        if body is None:
+            handler = self._handlers.get(method)
+            try:
+                if handler is not None:
+                    result = handler(target_id, params)
+                    if inspect.isawaitable(result):
+                        result = await result
+                    body = {'result': result or {}}
+                elif self.strict:
+                    body = {'error': {'code': -32601, 'message': f"'{method}' wasn't found"}}
+                else:
+                    body = {'result': {}}
+            except Exception as exc:
+                body = {'error': {'code': -32000, 'message': str(exc)}}
+
+        try:
+            # compact like the browser's own responses
+            await connection.send(json.dumps({'id': command['id'], **body}, separators=(',', ':')))
+        except ConnectionClosed:
+            pass
+
+    def _get_version(self, *_) -> dict[str, Any]:
+        return {
+            'protocolVersion': '1.3',
+            'product': 'MockCDP/1.0',
+            'revision': '0',
+            'userAgent': 'MockCDP',
+            'jsVersion': '0',
+        }
+
+    def _get_targets(self, *_) -> dict[str, Any]:
+        return {'targetInfos': [target.target_info() for target in self._targets.values()]}
+
+    def _get_target_info(self, target_id: str, params: dict) -> dict[str, Any]:
+        target = self._targets[params.get('targetId', target_id)]
+        return {'targetInfo': target.target_info()}
+
+    def _create_target(self, _: str, params: dict) -> dict[str, Any]:
+        return {'targetId': self.add_target(url=params.get('url', 'about:blank'))}
+
+    def _close_target(self, _: str, params: dict) -> dict[str, Any]:
+        target_id = params['targetId']
+        if target_id not in self._targets:
+            raise KeyError(f'No target with given id found: {target_id}')
+        del self._targets[target_id]
+        for connection in self._connections.pop(target_id, ()):
+            self._spawn(connection.close())
+        return {'success': True}
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    server = MockCDPServer(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter)
+    if args.replay:
+        server.load_recording(args.replay, speed=args.speed)
+    async with server:
+        print(f'Mock CDP server listening on {server.ws_endpoint}')
+        await asyncio.Future()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a mock CDP server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9222)
+    parser.add_argument('--latency', type=float, default=0.0, help='response delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra response delay in seconds')
+    parser.add_argument('--replay', help='a recording made by CDPRecorder')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed factor of recorded events')
+
+    asyncio.run(_serve_forever(parser.parse_args()))
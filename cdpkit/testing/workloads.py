@@ -0,0 +1,94 @@
+"""
+Synthetic payloads shaped like the messages of a real browser, for load tests and benchmarks.
+"""
+from typing import Any
+
+__all__ = [
+    'request_will_be_sent',
+    'dom_document',
+    'full_ax_tree'
+]
+
+
+def request_will_be_sent(index: int) -> dict[str, Any]:
+    """ Params of a `Network.requestWillBeSent` event for the index-th request. """
+    return {
+        'requestId': f'1000.{index}',
+        'loaderId': 'LOADER0',
+        'documentURL': 'https://example.com/',
+        'request': {
+            'url': f'https://example.com/assets/{index}.js',
+            'method': 'GET',
+            'headers': {'Accept': '*/*', 'User-Agent': 'Mozilla/5.0'},
+            'initialPriority': 'High',
+            'referrerPolicy': 'strict-origin-when-cross-origin',
+        },
+        'timestamp': 1000.0 + index / 1000,
+        'wallTime': 1700000000.0 + index / 1000,
+        'initiator': {'type': 'parser', 'url': 'https://example.com/'},
+        'type': 'Script',
+        'frameId': 'FRAME0',
+    }
+
+
+def dom_document(nodes: int, fanout: int = 8) -> dict[str, Any]:
+    """ Result of `DOM.getDocument(depth=-1)` for a document with about `nodes` elements. """
+    next_id = 1
+
+    def make_node(remaining: int) -> dict[str, Any]:
+        nonlocal next_id
+        node_id, next_id = next_id, next_id + 1
+        node = {
+            'nodeId': node_id,
+            'backendNodeId': node_id,
+            'nodeType': 1,
+            'nodeName': 'DIV',
+            'localName': 'div',
+            'nodeValue': '',
+            'attributes': ['class', f'node-{node_id}'],
+        }
+        children = []
+        remaining -= 1
+        while remaining > 0 and len(children) < fanout:
+            share = max(remaining // (fanout - len(children)), 1)
+            children.append(make_node(share))
+            remaining -= share
+        if children:
+            node['childNodeCount'] = len(children)
+            node['children'] = children
+        return node
+
+    root = make_node(nodes)
+    return {
+        'root': {
+            'nodeId': 0,
+            'backendNodeId': 0,
+            'nodeType': 9,
+            'nodeName': '#document',
+            'localName': '',
+            'nodeValue': '',
+            'childNodeCount': 1,
+            'children': [root],
+            'documentURL': 'https://example.com/',
+            'baseURL': 'https://example.com/',
+        }
+    }
+
+
+def full_ax_tree(nodes: int) -> dict[str, Any]:
+    """ Result of `Accessibility.getFullAXTree` with `nodes` nodes. """
+    return {
+        'nodes': [
+            {
+                'nodeId': str(index),
+                'ignored': False,
+                'role': {'type': 'role', 'value': 'generic'},
+                'name': {'type': 'computedString', 'value': f'node {index}'},
+                'properties': [{'name': 'focusable', 'value': {'type': 'booleanOrUndefined', 'value': True}}],
+                'parentId': str(index // 2),
+                'childIds': [str(index * 2 + 1), str(index * 2 + 2)],
+                'backendDOMNodeId': index,
+            }
+            for index in range(nodes)
+        ]
+    }
@@ -0,0 +1,55 @@
+import asyncio
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.helpers.blocking import ResourceBlocker
+from cdpkit.testing import MockCDPServer
+
+
+def _record_blocked(server: MockCDPServer) -> list[str]:
+    blocked_on = []
+    server.on_command('Network.setBlockedURLs', lambda target_id, _: blocked_on.append(target_id))
+    return blocked_on
+
+
+def test_recreated_session_is_blocked_again():
+    async def main():
+        async with MockCDPServer() as server:
+            blocked_on = _record_blocked(server)
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            blocker = ResourceBlocker(session_manager=manager, profiles=['images'], target_types=None)
+            await manager.get_session(target_id)
+            await blocker.start()
+
+            await manager.remove_session(target_id)
+            await manager.get_session(target_id)
+            stats = blocker.stats
+            await manager.close()
+            return target_id, blocked_on, stats
+
+    target_id, blocked_on, stats = asyncio.run(main())
+    assert blocked_on == [target_id, target_id]
+    assert stats['targets'] == 1
+
+
+def test_destroyed_targets_are_forgotten():
+    async def main():
+        async with MockCDPServer() as server:
+            blocked_on = _record_blocked(server)
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            blocker = ResourceBlocker(session_manager=manager, profiles=['images'])
+            await blocker.start()
+            installed = blocker.stats['targets']
+
+            await server.emit('browser', 'Target.targetDestroyed', {'targetId': target_id})
+            await asyncio.sleep(0.05)
+            stats = blocker.stats
+            await blocker.stop()
+            await manager.close()
+            return target_id, blocked_on, installed, stats
+
+    target_id, blocked_on, installed, stats = asyncio.run(main())
+    # the patterns are set on install only, stop does not reach the destroyed target
+    assert blocked_on == [target_id]
+    assert (installed, stats['targets']) == (1, 0)
@@ -0,0 +1,78 @@
+import asyncio
+import base64
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.helpers.bodies import BodyHarvester
+from cdpkit.testing import MockCDPServer
+
+
+def _response(request_id: str, content_length: int | None = None) -> dict:
+    return {
+        'requestId': request_id, 'loaderId': 'L', 'timestamp': 1, 'type': 'Fetch',
+        'response': {
+            'url': f'http://x/{request_id}', 'status': 200, 'statusText': '', 'mimeType': 'application/json',
+            'headers': {'Content-Length': str(content_length)} if content_length else {},
+            'connectionReused': False, 'connectionId': 0, 'encodedDataLength': 0, 'securityState': 'secure'
+        }
+    }
+
+
+async def _finish(server: MockCDPServer, target_id: str, request_id: str) -> None:
+    await server.emit(target_id, 'Network.loadingFinished', {
+        'requestId': request_id, 'timestamp': 2, 'encodedDataLength': 1
+    })
+
+
+def test_streamed_chunks_are_written_in_order():
+    chunks = [bytes([i]) * 1000 for i in range(5)]
+
+    async def main():
+        async with MockCDPServer(latency=0.02) as server:
+            server.on_command('Network.streamResourceContent', lambda *_: {
+                'bufferedData': base64.b64encode(chunks[0]).decode()
+            })
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            harvester = BodyHarvester(
+                session=await manager.get_session(target_id), stream_threshold=5000, queue_size=10
+            )
+            await harvester.start()
+            await server.emit(target_id, 'Network.responseReceived', _response('1', 5000))
+            for chunk in chunks[1:]:
+                await server.emit(target_id, 'Network.dataReceived', {
+                    'requestId': '1', 'timestamp': 1, 'dataLength': len(chunk), 'encodedDataLength': 1,
+                    'data': base64.b64encode(chunk).decode()
+                })
+            await _finish(server, target_id, '1')
+            harvested = await anext(harvester.bodies())
+            await harvester.stop()
+            await manager.close()
+            return harvested
+
+    harvested = asyncio.run(main())
+    assert harvested.body == b''.join(chunks)
+    assert harvested.size == 5000
+
+
+def test_stop_drops_bodies_nobody_consumes():
+    async def main():
+        async with MockCDPServer() as server:
+            server.on_command('Network.getResponseBody', lambda _, params: {
+                'body': params['requestId'], 'base64Encoded': False
+            })
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            harvester = BodyHarvester(session=await manager.get_session(target_id), queue_size=1)
+            await harvester.start()
+            for request_id in ('1', '2', '3'):
+                await server.emit(target_id, 'Network.responseReceived', _response(request_id))
+                await _finish(server, target_id, request_id)
+            await asyncio.sleep(0.1)
+            await asyncio.wait_for(harvester.stop(timeout=0.2), 5)
+            bodies = [harvested.body async for harvested in harvester.bodies()]
+            await manager.close()
+            return bodies, harvester.stats
+
+    bodies, stats = asyncio.run(main())
+    assert bodies == []
+    assert stats['dropped'] == 3
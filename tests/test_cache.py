@@ -0,0 +1,36 @@
+import base64
+
+import pytest
+
+from cdpkit.helpers import ResponseStore
+
+
+@pytest.mark.parametrize('in_directory', [False, True])
+def test_put_same_body_again_keeps_blob(tmp_path, in_directory):
+    store = ResponseStore(directory=tmp_path if in_directory else None)
+    store.put('http://x/app.js', 200, [], b'body', ttl=60)
+    entry = store.put('http://x/app.js', 200, [], b'body', ttl=60)
+
+    assert base64.b64decode(store.encoded_body(entry)) == b'body'
+    assert store.stats['entries'] == 1
+    assert store.stats['size'] == 4
+
+
+def test_put_new_body_releases_old_blob(tmp_path):
+    store = ResponseStore(directory=tmp_path)
+    old = store.put('http://x/app.js', 200, [], b'old', ttl=60)
+    new = store.put('http://x/app.js', 200, [], b'new body', ttl=60)
+
+    assert not store._blob_path(old.digest).exists()
+    assert base64.b64decode(store.encoded_body(new)) == b'new body'
+    assert store.stats['size'] == 8
+
+
+def test_shared_blob_survives_removal_of_one_key():
+    store = ResponseStore()
+    store.put('http://x/a.js', 200, [], b'same', ttl=60)
+    entry = store.put('http://x/b.js', 200, [], b'same', ttl=60)
+    store.put('http://x/a.js', 200, [], b'other', ttl=60)
+
+    assert base64.b64decode(store.encoded_body(entry)) == b'same'
+    assert store.stats['size'] == 9
@@ -0,0 +1,105 @@
+import asyncio
+import itertools
+
+import pytest
+
+from cdpkit.connection import CDPClusterManager
+from cdpkit.exception import CommandExecutionError, NoAvailableBrowser
+from cdpkit.testing import MockCDPServer
+
+
+def _unique_targets(server: MockCDPServer, prefix: str) -> None:
+    # the mock servers number their targets alike, a browser has ids of its own
+    ids = itertools.count()
+    server.on_command('Target.createTarget', lambda _, params: {
+        'targetId': server.add_target(f'{prefix}{next(ids)}', url=params.get('url', 'about:blank'))
+    })
+
+
+def _run(main):
+    async def with_servers():
+        async with MockCDPServer() as first, MockCDPServer() as second:
+            _unique_targets(first, 'FIRST')
+            _unique_targets(second, 'SECOND')
+            cluster = CDPClusterManager(ws_endpoints=[first.ws_endpoint, second.ws_endpoint], sample_interval=60)
+            await cluster.start()
+            try:
+                return await main(cluster, first, second)
+            finally:
+                await cluster.close()
+
+    return asyncio.run(with_servers())
+
+
+def test_new_page_goes_to_least_loaded():
+    async def main(cluster, first, second):
+        pages = [await cluster.new_page(f'http://x/{i}') for i in range(4)]
+        return [cluster.node_of(page.target_id).ws_endpoint for page in pages], first, second
+
+    endpoints, first, second = _run(main)
+    assert sorted(endpoints) == sorted([first.ws_endpoint, second.ws_endpoint] * 2)
+
+
+def test_command_error_does_not_mark_browsers_down():
+    async def main(cluster, first, second):
+        def refuse(_, params):
+            raise ValueError('invalid url')
+
+        first.on_command('Target.createTarget', refuse)
+        second.on_command('Target.createTarget', refuse)
+        with pytest.raises(CommandExecutionError):
+            await cluster.new_page('bad')
+        return [node.alive for node in cluster.nodes]
+
+    assert _run(main) == [True, True]
+
+
+def test_dead_browser_pages_move():
+    async def main(cluster, first, second):
+        first_page = await cluster.new_page('http://x/a')
+        node = cluster.node_of(first_page.target_id)
+        dead, alive = (first, second) if node.ws_endpoint == first.ws_endpoint else (second, first)
+        await dead.close()
+        await cluster.refresh()
+
+        moved = await cluster.get_session(first_page.target_id)
+        assert not node.alive
+        assert cluster.node_of(moved.target_id).ws_endpoint == alive.ws_endpoint
+        assert [target.url for target in alive.targets.values()] == ['http://x/a']
+
+        await cluster.drain(alive.ws_endpoint, rebalance=False)
+        with pytest.raises(NoAvailableBrowser):
+            await cluster.new_page()
+
+    _run(main)
+
+
+def test_drain_closes_pages_of_live_browser():
+    async def main(cluster, first, second):
+        pages = [await cluster.new_page(f'http://x/{i}') for i in range(4)]
+        moved = await cluster.drain(first.ws_endpoint)
+        return pages, moved, first, second
+
+    pages, moved, first, second = _run(main)
+    assert len(moved) == 2
+    assert first.targets == {}
+    assert sorted(target.url for target in second.targets.values()) == [f'http://x/{i}' for i in range(4)]
+
+
+def test_failed_sample_marks_only_its_browser_down():
+    async def main(cluster, first, second):
+        pages = [await cluster.new_page(f'http://x/{i}') for i in range(2)]
+        first_node, second_node = cluster.nodes
+        sampled_at = second_node.load.sampled_at
+
+        def refuse(*_):
+            raise ValueError('not allowed')
+
+        first.on_command('SystemInfo.getProcessInfo', refuse)
+        await cluster.refresh()
+        assert not first_node.alive
+        assert second_node.alive and second_node.load.sampled_at > sampled_at
+        assert {cluster.node_of(page.target_id).ws_endpoint for page in pages} == {second.ws_endpoint}
+        assert sorted(target.url for target in second.targets.values()) == ['http://x/0', 'http://x/1']
+
+    _run(main)
@@ -0,0 +1,99 @@
+import asyncio
+import itertools
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.testing import MockCDPServer
+
+
+def _context(context_id: int, frame_id: str, name: str = '') -> dict:
+    return {'context': {
+        'id': context_id, 'origin': '', 'name': name, 'uniqueId': f'u{context_id}',
+        'auxData': {'frameId': frame_id, 'isDefault': not name}
+    }}
+
+
+def _browser(server: MockCDPServer) -> list[dict]:
+    # every frame has a default context, isolated worlds get a new one per creation
+    context_ids, creations = itertools.count(1), []
+
+    async def enable(target_id, _):
+        await server.emit(target_id, 'Runtime.executionContextCreated', _context(next(context_ids), target_id))
+
+    async def create_isolated_world(target_id, params):
+        creations.append(params)
+        await asyncio.sleep(0.05)
+        context_id = next(context_ids)
+        await server.emit(
+            target_id, 'Runtime.executionContextCreated', _context(context_id, params['frameId'], params['worldName'])
+        )
+        return {'executionContextId': context_id}
+
+    server.on_command('Runtime.enable', enable)
+    server.on_command('Page.createIsolatedWorld', create_isolated_world)
+    return creations
+
+
+def _run(main):
+    async def with_session():
+        async with MockCDPServer() as server:
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            try:
+                return await main(server, await manager.get_session(target_id), target_id)
+            finally:
+                await manager.close()
+
+    return asyncio.run(with_session())
+
+
+def test_isolated_world_is_created_once():
+    async def main(server, session, target_id):
+        creations = _browser(server)
+        context_ids = await asyncio.gather(*(session.execution_context(world_name='w') for _ in range(5)))
+        default_id = await session.execution_context()
+        return creations, context_ids, default_id
+
+    creations, context_ids, default_id = _run(main)
+    assert len(creations) == 1
+    assert len(set(context_ids)) == 1
+    assert default_id not in context_ids
+
+
+def test_navigation_drops_the_worlds():
+    async def main(server, session, target_id):
+        creations = _browser(server)
+        before = await session.execution_context(world_name='w')
+        await server.emit(target_id, 'Runtime.executionContextsCleared', {})
+        await server.emit(target_id, 'Runtime.executionContextCreated', _context(100, target_id))
+        await asyncio.sleep(0.05)
+        registry = session.execution_context_registry
+        cleared = (registry.context_id(target_id), registry.context_id(target_id, 'w'))
+        after = await session.execution_context(world_name='w')
+        return creations, before, cleared, after
+
+    creations, before, cleared, after = _run(main)
+    assert cleared == (100, None)
+    assert len(creations) == 2
+    assert after != before
+
+
+def test_call_function_keeps_null_arguments():
+    async def main(server, session, target_id):
+        _browser(server)
+        calls = []
+
+        def call_function_on(_, params):
+            calls.append(params)
+            return {'result': {'type': 'number', 'value': 1}}
+
+        server.on_command('Runtime.callFunctionOn', call_function_on)
+        value = await session.call_function('(a, b) => a === null ? b : -1', None, 1)
+        await session.call_function('() => 1')
+        return value, calls
+
+    value, (with_args, without_args) = _run(main)
+    assert value == 1
+    assert with_args['arguments'] == [{'value': [None, 1]}]
+    assert '(a, b) => a === null ? b : -1' in with_args['functionDeclaration']
+    assert without_args['functionDeclaration'] == '() => 1'
+    assert 'arguments' not in without_args
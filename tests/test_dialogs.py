@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.connection.manager import DialogPolicy, DialogRule, FileChooserPolicy, FileChooserRule
+from cdpkit.protocol import Page, Runtime
+from cdpkit.testing import MockCDPServer
+
+
+def _dialog(type_: str, message: str) -> dict:
+    return {
+        'url': 'http://x/', 'frameId': 'F', 'message': message, 'type': type_, 'hasBrowserHandler': False,
+        'defaultPrompt': 'default'
+    }
+
+
+def test_invalid_message_pattern_is_rejected():
+    with pytest.raises(ValidationError):
+        DialogRule(message='Total: $5 (incl')
+
+
+def test_dialog_policy_command():
+    policy = DialogPolicy(accept=False, rules=[
+        DialogRule(type='prompt', prompt_text='42'),
+        DialogRule(message=r'^Leave', accept=True),
+    ])
+    assert policy.command(_dialog('alert', 'hi'))['params'] == {'accept': False}
+    assert policy.command(_dialog('prompt', 'name?'))['params'] == {'accept': True, 'promptText': '42'}
+    assert policy.command(_dialog('confirm', 'Leave page?'))['params'] == {'accept': True}
+    assert DialogPolicy().command(_dialog('prompt', 'name?'))['params'] == {'accept': True, 'promptText': 'default'}
+
+
+def test_file_chooser_policy_command():
+    policy = FileChooserPolicy(files=['/a', '/b'], rules=[FileChooserRule(frame_id='F2', files=[])])
+    single = policy.command({'frameId': 'F1', 'mode': 'selectSingle', 'backendNodeId': 3})
+    assert single == {'method': 'DOM.setFileInputFiles', 'params': {'files': ['/a'], 'backendNodeId': 3}}
+    assert policy.command({'frameId': 'F2', 'mode': 'selectMultiple', 'backendNodeId': 4})['params']['files'] == []
+    assert policy.command({'frameId': 'F1', 'mode': 'selectMultiple'}) is None
+
+
+class _FailingPolicy(DialogPolicy):
+    def command(self, params: dict) -> dict:
+        raise RuntimeError('bad answer')
+
+
+def test_dialogs_answered_from_reader():
+    async def main():
+        async with MockCDPServer() as server:
+            answers = []
+            server.on_command('Page.enable', lambda target_id, params: {})
+            server.on_command('Page.setInterceptFileChooserDialog', lambda target_id, params: {})
+            server.on_command('Page.handleJavaScriptDialog', lambda target_id, params: answers.append(params) or {})
+            server.on_command('DOM.setFileInputFiles', lambda target_id, params: answers.append(params) or {})
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            session = await manager.get_session(target_id)
+
+            seen = []
+            await session.register_callback(
+                Page.JavascriptDialogOpening, lambda event_data: seen.append(event_data['type']), raw=True
+            )
+            await session.set_dialog_policy(DialogPolicy(rules=[DialogRule(type='prompt', prompt_text='42')]))
+            await session.set_file_chooser_policy(FileChooserPolicy(files=['/a']))
+            await server.emit(target_id, 'Page.javascriptDialogOpening', _dialog('prompt', 'name?'))
+            await server.emit(target_id, 'Page.fileChooserOpened', {'mode': 'selectSingle', 'backendNodeId': 7})
+            await asyncio.sleep(0.1)
+            await manager.close()
+            return answers, seen
+
+    answers, seen = asyncio.run(main())
+    assert answers == [{'accept': True, 'promptText': '42'}, {'files': ['/a'], 'backendNodeId': 7}]
+    assert seen == ['prompt']
+
+
+def test_failing_policy_does_not_stop_reader():
+    async def main():
+        async with MockCDPServer() as server:
+            server.on_command('Page.enable', lambda target_id, params: {})
+            server.on_command('Runtime.evaluate', lambda target_id, params: {'result': {'type': 'number', 'value': 1}})
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            session = await manager.get_session(target_id)
+            await session.set_dialog_policy(_FailingPolicy())
+            await server.emit(target_id, 'Page.javascriptDialogOpening', _dialog('alert', 'hi'))
+            await asyncio.sleep(0.05)
+            result = await session.execute(Runtime.Evaluate(expression='1'))
+            await manager.close()
+            return result.result.value
+
+    assert asyncio.run(main()) == 1
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.exception import NetworkError
+from cdpkit.helpers import DownloadManager
+from cdpkit.testing import MockCDPServer
+
+
+async def _begin(server: MockCDPServer, target_id: str, guid: str) -> None:
+    await server.emit(target_id, 'Browser.downloadWillBegin', {
+        'frameId': target_id, 'guid': guid, 'url': f'http://x/{guid}', 'suggestedFilename': f'{guid}.csv'
+    })
+
+
+async def _progress(server: MockCDPServer, target_id: str, guid: str, state: str, size: int = 0) -> None:
+    await server.emit(target_id, 'Browser.downloadProgress', {
+        'guid': guid, 'totalBytes': size, 'receivedBytes': size, 'state': state
+    })
+
+
+def _run(tmp_path, main, **options):
+    async def with_manager():
+        async with MockCDPServer() as server:
+            canceled = []
+            server.on_command('Browser.cancelDownload', lambda _, params: canceled.append(params['guid']))
+            target_id = server.add_target()
+            session_manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            manager = DownloadManager(
+                session=await session_manager.get_session(target_id), download_dir=tmp_path / 'downloads', **options
+            )
+            await manager.start()
+            try:
+                return await main(server, target_id, manager, canceled)
+            finally:
+                await manager.stop()
+                await session_manager.close()
+
+    return asyncio.run(with_manager())
+
+
+def test_concurrency_cap_cancels_and_done_raises(tmp_path):
+    async def main(server, target_id, manager, canceled):
+        for guid in 'abc':
+            await _begin(server, target_id, guid)
+        await asyncio.sleep(0.05)
+        await _progress(server, target_id, 'c', 'canceled')
+        await asyncio.sleep(0.05)
+        with pytest.raises(NetworkError, match='concurrent'):
+            await asyncio.wait_for(manager.get('c').done(), 5)
+        return canceled, manager.stats
+
+    canceled, stats = _run(tmp_path, main, max_concurrent=2)
+    assert canceled == ['c']
+    assert (stats['capped'], stats['canceled'], stats['active']) == (1, 1, 2)
+
+
+def test_identical_files_are_stored_once(tmp_path):
+    async def main(server, target_id, manager, canceled):
+        for guid in 'ab':
+            await _begin(server, target_id, guid)
+            (tmp_path / 'downloads' / guid).write_bytes(b'same' * 1000)
+            await _progress(server, target_id, guid, 'completed', 4000)
+        await asyncio.sleep(0.05)
+        paths = [await asyncio.wait_for(manager.get(guid).done(), 5) for guid in 'ab']
+        return paths, manager.stats
+
+    (first, second), stats = _run(tmp_path, main, store_dir=tmp_path / 'store')
+    assert first == second
+    assert first.read_bytes() == b'same' * 1000
+    assert (stats['completed'], stats['duplicates']) == (2, 1)
+    assert list((tmp_path / 'downloads').iterdir()) == []
+
+
+def test_failed_store_finishes_the_download(tmp_path, monkeypatch):
+    def broken_store(*_):
+        raise RuntimeError('cannot schedule new futures after shutdown')
+
+    monkeypatch.setattr('cdpkit.helpers.downloads._store', broken_store)
+
+    async def main(server, target_id, manager, canceled):
+        await _begin(server, target_id, 'a')
+        (tmp_path / 'downloads' / 'a').write_bytes(b'data')
+        await _progress(server, target_id, 'a', 'completed', 4)
+        await asyncio.sleep(0.05)
+        with pytest.raises(NetworkError, match='failed'):
+            await asyncio.wait_for(manager.get('a').done(), 5)
+        return manager.get('a').state
+
+    assert _run(tmp_path, main, store_dir=tmp_path / 'store') == 'failed'
+
+
+def test_finished_downloads_are_forgotten_past_in_progress_ones(tmp_path, monkeypatch):
+    monkeypatch.setattr('cdpkit.helpers.downloads._MAX_FINISHED', 2)
+
+    async def main(server, target_id, manager, canceled):
+        await _begin(server, target_id, 'active')
+        for guid in 'abcd':
+            await _begin(server, target_id, guid)
+            await _progress(server, target_id, guid, 'completed')
+        await asyncio.sleep(0.05)
+        return list(manager.downloads)
+
+    assert _run(tmp_path, main) == ['active', 'd']
@@ -0,0 +1,74 @@
+import asyncio
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.connection.manager import FrameTree
+from cdpkit.testing import MockCDPServer
+
+
+def _frame(frame_id: str, parent_id: str | None = None, url: str = 'http://x/') -> dict:
+    frame = {
+        'id': frame_id, 'loaderId': f'L{frame_id}', 'url': url, 'domainAndRegistry': 'x', 'securityOrigin': 'http://x',
+        'mimeType': 'text/html', 'secureContextType': 'Secure', 'crossOriginIsolatedContextType': 'NotIsolated',
+        'gatedAPIFeatures': []
+    }
+    if parent_id is not None:
+        frame['parentId'] = parent_id
+    return frame
+
+
+def test_load_and_events():
+    tree = FrameTree()
+    tree.load({'frame': _frame('MAIN'), 'childFrames': [
+        {'frame': _frame('A', 'MAIN', 'http://a/')},
+        {'frame': _frame('B', 'MAIN', 'http://b/'), 'childFrames': [{'frame': _frame('C', 'B', 'http://c/')}]},
+    ]})
+    assert [frame.id for frame in tree.children('MAIN')] == ['A', 'B']
+    assert tree.parent('C').id == 'B'
+
+    tree.frame_attached({'frameId': 'D', 'parentFrameId': 'C'})
+    tree.frame_navigated({'frame': _frame('D', 'C', 'http://d/'), 'type': 'Navigation'})
+    tree.navigated_within_document({'frameId': 'A', 'url': 'http://a/#h', 'navigationType': 'fragment'})
+    assert tree.url('D') == 'http://d/'
+    assert tree.url('A') == 'http://a/#h'
+
+    tree.frame_detached({'frameId': 'B', 'reason': 'remove'})
+    assert sorted(tree.frames) == ['A', 'MAIN']
+
+
+def test_events_before_load_are_replayed():
+    tree = FrameTree()
+    tree.frame_attached({'frameId': 'A', 'parentFrameId': 'MAIN'})
+    tree.frame_navigated({'frame': _frame('A', 'MAIN', 'http://a/'), 'type': 'Navigation'})
+    tree.load({'frame': _frame('MAIN')})
+    assert [frame.id for frame in tree.children('MAIN')] == ['A']
+    assert tree.url('A') == 'http://a/'
+
+
+def test_events_right_after_snapshot_are_kept():
+    async def main():
+        async with MockCDPServer() as server:
+            target_id = server.add_target()
+
+            async def attach_child():
+                await server.emit(target_id, 'Page.frameAttached', {'frameId': 'A', 'parentFrameId': target_id})
+                await server.emit(
+                    target_id, 'Page.frameNavigated', {'frame': _frame('A', target_id), 'type': 'Navigation'}
+                )
+
+            def get_frame_tree(_, params):
+                # the events follow the response on the wire
+                asyncio.get_running_loop().call_soon(asyncio.ensure_future, attach_child())
+                return {'frameTree': {'frame': _frame(target_id)}}
+
+            server.on_command('Page.enable', lambda _, params: {})
+            server.on_command('Runtime.enable', lambda _, params: {})
+            server.on_command('Page.getFrameTree', get_frame_tree)
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            session = await manager.get_session(target_id)
+            tree = await session.frame_tree()
+            await asyncio.sleep(0.1)
+            children = [frame.id for frame in tree.children(target_id)]
+            await manager.close()
+            return children
+
+    assert asyncio.run(main()) == ['A']
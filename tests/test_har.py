@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.helpers import HarRecorder
+from cdpkit.helpers.har import _MAX_PLACEHOLDERS
+from cdpkit.testing import MockCDPServer
+
+
+def _request(request_id: str, url: str) -> dict:
+    return {
+        'requestId': request_id, 'loaderId': 'L', 'documentURL': url, 'timestamp': 1.0, 'wallTime': 1700000000.0,
+        'initiator': {'type': 'other'}, 'redirectHasExtraInfo': False, 'type': 'Document',
+        'request': {'url': url, 'method': 'GET', 'headers': {}, 'initialPriority': 'High', 'referrerPolicy': ''},
+    }
+
+
+def _response(request_id: str, url: str) -> dict:
+    return {
+        'requestId': request_id, 'loaderId': 'L', 'timestamp': 1.1, 'type': 'Document', 'hasExtraInfo': True,
+        'response': {
+            'url': url, 'status': 200, 'statusText': 'OK', 'headers': {}, 'mimeType': 'text/html',
+            'connectionReused': False, 'connectionId': 1, 'encodedDataLength': 10, 'securityState': 'secure',
+            'charset': '', 'protocol': 'h2',
+        },
+    }
+
+
+def _extra_info(request_id: str) -> dict:
+    return {'requestId': request_id, 'blockedCookies': [], 'headers': {'x-extra': '1'}, 'statusCode': 200}
+
+
+def _record(tmp_path, events):
+    async def main():
+        async with MockCDPServer() as server:
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            session = await manager.get_session(target_id)
+            recorder = HarRecorder(session=session, path=tmp_path / 'trace.har')
+            await recorder.start()
+            for method, params in events:
+                await server.emit(target_id, method, params)
+            await asyncio.sleep(0.1)
+            pending = recorder.pending_entries
+            await recorder.stop()
+            await manager.close()
+            return pending
+
+    pending = asyncio.run(main())
+    return pending, json.loads((tmp_path / 'trace.har').read_text())['log']['entries']
+
+
+def test_entry_written_on_loading_finished(tmp_path):
+    pending, entries = _record(tmp_path, [
+        ('Network.responseReceivedExtraInfo', _extra_info('1')),
+        ('Network.requestWillBeSent', _request('1', 'http://x/?a=1')),
+        ('Network.responseReceived', _response('1', 'http://x/?a=1')),
+        ('Network.loadingFinished', {'requestId': '1', 'timestamp': 1.2, 'encodedDataLength': 10}),
+    ])
+    assert pending == 0
+    assert len(entries) == 1
+    assert entries[0]['request']['queryString'] == [{'name': 'a', 'value': '1'}]
+    assert entries[0]['response']['headers'] == [{'name': 'x-extra', 'value': '1'}]
+    assert entries[0]['response']['httpVersion'] == 'HTTP/2.0'
+
+
+def test_late_extra_info_is_dropped(tmp_path):
+    pending, entries = _record(tmp_path, [
+        ('Network.requestWillBeSent', _request('1', 'http://x/')),
+        ('Network.responseReceived', _response('1', 'http://x/')),
+        ('Network.loadingFinished', {'requestId': '1', 'timestamp': 1.2, 'encodedDataLength': 10}),
+        ('Network.responseReceivedExtraInfo', _extra_info('1')),
+    ])
+    assert pending == 0
+    assert len(entries) == 1
+
+
+def test_extra_info_placeholders_are_bounded(tmp_path):
+    count = _MAX_PLACEHOLDERS + 10
+    pending, entries = _record(
+        tmp_path, [('Network.responseReceivedExtraInfo', _extra_info(str(i))) for i in range(count)]
+    )
+    assert pending == _MAX_PLACEHOLDERS
+    assert entries == []
+
+
+def test_finished_placeholders_are_not_written(tmp_path, monkeypatch):
+    monkeypatch.setattr('cdpkit.helpers.har._MAX_PLACEHOLDERS', 2)
+    events = []
+    for i in range(5):
+        events.append(('Network.responseReceivedExtraInfo', _extra_info(str(i))))
+        events.append(('Network.loadingFinished', {'requestId': str(i), 'timestamp': 1.2, 'encodedDataLength': 1}))
+    events += [
+        ('Network.requestWillBeSent', _request('9', 'http://x/')),
+        ('Network.responseReceived', _response('9', 'http://x/')),
+        ('Network.loadingFinished', {'requestId': '9', 'timestamp': 1.2, 'encodedDataLength': 10}),
+    ]
+    pending, entries = _record(tmp_path, events)
+    assert pending == 0
+    assert [entry['request']['url'] for entry in entries] == ['http://x/']
@@ -0,0 +1,118 @@
+import asyncio
+import base64
+from pathlib import Path
+
+import pytest
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.exception import CommandExecutionError
+from cdpkit.helpers import PdfExporter
+from cdpkit.helpers.io import read_stream
+from cdpkit.testing import MockCDPServer
+
+DOCUMENT = bytes(range(256)) * 40
+
+
+def _streams(server: MockCDPServer, document: bytes = DOCUMENT, fail_at: int | None = None) -> list[str]:
+    # every printToPDF opens a stream over the document, the log tells the order the commands completed in
+    log, offsets = [], {}
+
+    def print_to_pdf(_, params):
+        assert params['transferMode'] == 'ReturnAsStream'
+        handle = f'stream{len(offsets)}'
+        offsets[handle] = 0
+        return {'data': '', 'stream': handle}
+
+    async def read(_, params):
+        await asyncio.sleep(0.02)
+        offset = offsets.setdefault(params['handle'], 0)
+        if offset == fail_at:
+            raise RuntimeError('Read failed')
+        chunk = document[offset:offset + params['size']]
+        offsets[params['handle']] = offset + len(chunk)
+        log.append(f'read {offset}')
+        return {
+            'base64Encoded': True, 'data': base64.b64encode(chunk).decode(),
+            'eof': offset + len(chunk) >= len(document)
+        }
+
+    server.on_command('Page.printToPDF', print_to_pdf)
+    server.on_command('IO.read', read)
+    server.on_command('IO.close', lambda _, params: log.append(f'close {params["handle"]}'))
+    return log
+
+
+def _run(main):
+    async def with_session():
+        async with MockCDPServer() as server:
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            try:
+                return await main(server, await manager.get_session(target_id))
+            finally:
+                await manager.close()
+
+    return asyncio.run(with_session())
+
+
+def test_eof_on_the_first_read():
+    async def main(server, session):
+        log = []
+        server.on_command('IO.read', lambda *_: log.append('read') or {'data': 'abc', 'eof': True})
+        server.on_command('IO.close', lambda *_: log.append('close'))
+        return [chunk async for chunk in read_stream(session, 'handle')], log
+
+    chunks, log = _run(main)
+    assert chunks == [b'abc']
+    assert log == ['read', 'close']
+
+
+def test_abandoned_stream_waits_for_the_read_in_flight():
+    async def main(server, session):
+        log = _streams(server)
+        chunks = read_stream(session, 'stream0', chunk_size=1000)
+        first = await anext(chunks)
+        await chunks.aclose()
+        return first, log
+
+    first, log = _run(main)
+    assert first == DOCUMENT[:1000]
+    assert log == ['read 0', 'read 1000', 'close stream0']
+
+
+def _export(target, **streams):
+    async def main(server, session):
+        log = _streams(server, **streams)
+        exporter = PdfExporter(chunk_size=4096)
+        try:
+            return await exporter.export(session, target, print_background=True)
+        finally:
+            assert log[-1].startswith('close')
+
+    return _run(main)
+
+
+def test_export_to_a_file(tmp_path):
+    path = tmp_path / 'documents' / 'page.pdf'
+    assert _export(path) == len(DOCUMENT)
+    assert path.read_bytes() == DOCUMENT
+    assert sorted(path.parent.iterdir()) == [path]
+
+
+def test_export_to_a_sink():
+    received = []
+
+    async def sink(chunk: bytes) -> None:
+        received.append(chunk)
+
+    assert _export(sink) == len(DOCUMENT)
+    assert b''.join(received) == DOCUMENT
+    assert len(received) == 3
+
+
+def test_failed_export_removes_the_partial_file(tmp_path):
+    path = tmp_path / 'page.pdf'
+    with pytest.raises(CommandExecutionError):
+        _export(path, fail_at=4096)
+    assert list(tmp_path.iterdir()) == []
+    assert not Path(f'{path}.part').exists()
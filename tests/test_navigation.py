@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.exception import NetworkError, WaitTimeout
+from cdpkit.testing import MockCDPServer
+
+
+def _lifecycle(frame_id: str, loader_id: str, name: str) -> tuple[str, dict]:
+    return 'Page.lifecycleEvent', {'frameId': frame_id, 'loaderId': loader_id, 'name': name, 'timestamp': 1.0}
+
+
+def _on_navigate(server: MockCDPServer, before: dict[str, list[str]], after: dict[str, list[tuple[float, str]]]):
+    # `Page.navigate` to url answers with the loader 'L-url', its lifecycle events sent before the response and
+    # at the given delays after it
+    tasks = set()
+
+    async def emit_later(target_id, loader_id, delay, name):
+        await asyncio.sleep(delay)
+        await server.emit(target_id, *_lifecycle(target_id, loader_id, name))
+
+    async def navigate(target_id, params):
+        url = params['url']
+        loader_id = f'L-{url}'
+        for name in before.get(url, ()):
+            await server.emit(target_id, *_lifecycle(target_id, loader_id, name))
+        for delay, name in after.get(url, ()):
+            task = asyncio.create_task(emit_later(target_id, loader_id, delay, name))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        return {'frameId': target_id, 'loaderId': loader_id}
+
+    server.on_command('Page.navigate', navigate)
+
+
+def _run(main, latency: float = 0):
+    async def with_session():
+        async with MockCDPServer(latency=latency) as server:
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            try:
+                return await main(server, await manager.get_session(target_id), target_id)
+            finally:
+                await manager.close()
+
+    return asyncio.run(with_session())
+
+
+def test_events_before_the_navigate_response():
+    async def main(server, session, target_id):
+        _on_navigate(server, before={'a': ['init', 'DOMContentLoaded', 'load']}, after={})
+        return await session.goto('a', 'load', timeout=5)
+
+    assert _run(main).loaderId == 'L-a'
+
+
+def test_replaced_navigation_does_not_fail_the_newer_one():
+    async def main(server, session, target_id):
+        # the init of the replaced loader arrives after the newer one started
+        _on_navigate(server, before={}, after={
+            'b': [(0.1, 'init')],
+            'c': [(0.05, 'init'), (0.2, 'load')],
+        })
+        return await asyncio.gather(
+            session.goto('b', 'networkidle', timeout=5), session.goto('c', timeout=5), return_exceptions=True
+        )
+
+    replaced, loaded = _run(main, latency=0.01)
+    assert isinstance(replaced, NetworkError)
+    assert loaded.loaderId == 'L-c'
+
+
+def test_frame_detached_fails_the_navigation():
+    async def main(server, session, target_id):
+        _on_navigate(server, before={'a': ['init']}, after={})
+        navigation = asyncio.create_task(session.goto('a', timeout=5))
+        await asyncio.sleep(0.1)
+        await server.emit(target_id, 'Page.frameDetached', {'frameId': target_id, 'reason': 'remove'})
+        with pytest.raises(NetworkError, match='detached'):
+            await navigation
+
+    _run(main)
+
+
+def test_navigation_timeout():
+    async def main(server, session, target_id):
+        _on_navigate(server, before={'a': ['init', 'DOMContentLoaded']}, after={})
+        with pytest.raises(WaitTimeout, match='load'):
+            await session.goto('a', 'load', timeout=0.2)
+        return await session.goto('a', 'domcontentloaded', timeout=5)
+
+    assert _run(main).loaderId == 'L-a'
@@ -0,0 +1,30 @@
+import asyncio
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.testing import MockCDPServer
+
+
+def test_concurrent_track_network_share_one_tracker():
+    async def main():
+        async with MockCDPServer(latency=0.01) as server:
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            session = await manager.get_session(target_id)
+            trackers = await asyncio.gather(*(session.track_network() for _ in range(5)))
+
+            tracker = trackers[0]
+            await server.emit(target_id, 'Network.requestWillBeSent', {
+                'requestId': '1', 'type': 'XHR', 'timestamp': 1.0, 'request': {'url': 'http://x/'}
+            })
+            await asyncio.sleep(0.05)
+            inflight = tracker.inflight
+            await server.emit(target_id, 'Network.loadingFinished', {
+                'requestId': '1', 'timestamp': 1.1, 'encodedDataLength': 1
+            })
+            await session.network_idle(idle_ms=10, timeout=1)
+            await manager.close()
+            return trackers, inflight, tracker.inflight
+
+    trackers, inflight_before, inflight_after = asyncio.run(main())
+    assert all(tracker is trackers[0] for tracker in trackers)
+    assert (inflight_before, inflight_after) == (1, 0)
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.exception import CommandExecutionError
+from cdpkit.protocol import Runtime, base
+from cdpkit.protocol.Runtime.methods import EvaluateOutput
+from cdpkit.testing import MockCDPServer
+
+SMALL = {'nested': {'braces': [{}, {'a': {'b': {}}}], 'text': '}} {"id":1,"result":{'}}
+LARGE = {'nested': {'braces': [{}, {'a': {'b': {}}}], 'text': '}}' * 200_000}}
+
+
+@pytest.fixture(params=[None, 0], ids=['inline', 'offloaded'])
+def offload(request, monkeypatch):
+    offloaded = []
+
+    async def run_offloaded(func, *args):
+        offloaded.append(func)
+        return await original(func, *args)
+
+    original = base.run_offloaded
+    monkeypatch.setattr(base, 'run_offloaded', run_offloaded)
+    monkeypatch.setattr(base, '_offload_threshold', request.param)
+    return offloaded
+
+
+def _evaluate(*expressions: str) -> list[EvaluateOutput | Exception]:
+    async def main():
+        async with MockCDPServer() as server:
+            target_id = server.add_target()
+            server.on_command('Runtime.evaluate', lambda _, params: {
+                'result': {'type': 'object', 'value': {'small': SMALL, 'large': LARGE}[params['expression']]}
+            })
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            try:
+                session = await manager.get_session(target_id)
+                return await asyncio.gather(
+                    *(session.execute(Runtime.Evaluate(expression=expression)) for expression in expressions),
+                    return_exceptions=True
+                )
+            finally:
+                await manager.close()
+
+    return asyncio.run(main())
+
+
+def test_results_parse_the_same(offload):
+    small, large, error = _evaluate('small', 'large', 'missing')
+    assert small.result.value == SMALL
+    assert large.result.value == LARGE
+    assert isinstance(error, CommandExecutionError)
+    assert "'missing'" in str(error)
+    if base._offload_threshold is None:
+        assert offload == []
+    else:
+        # both results skip the message decoding and are validated off the loop, the error is decoded as usual
+        assert offload.count(EvaluateOutput.model_validate_json) == 2
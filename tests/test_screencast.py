@@ -0,0 +1,47 @@
+import asyncio
+import base64
+import sys
+
+import pydantic
+import pytest
+
+from cdpkit.connection import CDPSession, CDPSessionManager
+from cdpkit.exception import CommandExecutionError
+from cdpkit.helpers.screencast import ScreencastRecorder
+from cdpkit.testing import MockCDPServer
+
+
+def test_ack_ahead_must_be_positive():
+    session = CDPSession(ws_endpoint='ws://127.0.0.1:9222', target_id='browser')
+    with pytest.raises(pydantic.ValidationError, match='ack_ahead'):
+        ScreencastRecorder(session=session, ack_ahead=0)
+    assert ScreencastRecorder(session=session, ack_ahead=1).ack_ahead == 1
+
+
+def test_failed_stop_still_closes_the_encoder():
+    async def main():
+        async with MockCDPServer() as server:
+            server.on_command('Page.stopScreencast', lambda *_: 1 / 0)
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            recorder = ScreencastRecorder(
+                session=await manager.get_session(target_id),
+                encoder=[sys.executable, '-c', 'import sys; sys.exit(len(sys.stdin.buffer.read()) != 3)']
+            )
+            await recorder.start()
+            await server.emit(target_id, 'Page.screencastFrame', {
+                'sessionId': 1, 'data': base64.b64encode(b'abc').decode(), 'metadata': {
+                    'deviceWidth': 1, 'deviceHeight': 1, 'offsetTop': 0, 'pageScaleFactor': 1,
+                    'scrollOffsetX': 0, 'scrollOffsetY': 0
+                }
+            })
+            await asyncio.sleep(0.05)
+            process = recorder._process
+            with pytest.raises(CommandExecutionError):
+                await recorder.stop()
+            await manager.close()
+            return process.returncode, recorder.stats
+
+    return_code, stats = asyncio.run(main())
+    assert return_code == 0
+    assert stats['encoded'] == 1
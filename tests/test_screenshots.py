@@ -0,0 +1,222 @@
+import asyncio
+import base64
+import random
+import struct
+import zlib
+
+import pytest
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.exception import InvalidResponse
+from cdpkit.helpers.screenshots import ChangeDetector, ScreenshotService, _PngStitcher, perceptual_hash
+from cdpkit.testing import MockCDPServer
+
+
+def _paeth(left: int, up: int, up_left: int) -> int:
+    estimate = left + up - up_left
+    distances = abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+    if distances[0] <= distances[1] and distances[0] <= distances[2]:
+        return left
+    return up if distances[1] <= distances[2] else up_left
+
+
+def _predictors(filter_type: int, row: bytes, previous: bytes, i: int, bpp: int) -> int:
+    left = row[i - bpp] if i >= bpp else 0
+    up_left = previous[i - bpp] if i >= bpp else 0
+    return (0, left, previous[i], (left + previous[i]) // 2, _paeth(left, previous[i], up_left))[filter_type]
+
+
+def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def _encode_png(width: int, pixels: bytes, filters: list[int], truncate: int = 0) -> bytes:
+    """ An 8-bit RGB PNG of the pixels, every row filtered with its filter type. """
+    stride = width * 3
+    rows, previous = [], bytes(stride)
+    for y, filter_type in enumerate(filters):
+        row = pixels[y * stride:(y + 1) * stride]
+        filtered = bytes(
+            (row[i] - _predictors(filter_type, row, previous, i, 3)) & 0xFF for i in range(stride)
+        )
+        rows.append(bytes([filter_type]) + filtered)
+        previous = row
+    scanlines = b''.join(rows)
+    scanlines = scanlines[:len(scanlines) - truncate]
+    return (
+        b'\x89PNG\r\n\x1a\n' + _chunk(b'IHDR', struct.pack('>IIBBBBB', width, len(filters), 8, 2, 0, 0, 0))
+        + _chunk(b'IDAT', zlib.compress(scanlines)) + _chunk(b'IEND', b'')
+    )
+
+
+def _decode_png(data: bytes) -> tuple[int, int, bytes]:
+    """ The width, height and pixels of an 8-bit RGB PNG, decoded after the specification. """
+    offset, idat, header = 8, b'', None
+    while offset < len(data):
+        length, chunk_type = struct.unpack_from('>I4s', data, offset)
+        chunk = data[offset + 8:offset + 8 + length]
+        assert struct.unpack_from('>I', data, offset + 8 + length)[0] == zlib.crc32(chunk_type + chunk)
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif chunk_type == b'IDAT':
+            idat += chunk
+        offset += 12 + length
+    width, height = header[:2]
+    stride, scanlines = width * 3, zlib.decompress(idat)
+    pixels, previous = bytearray(), bytes(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        filter_type, row = scanlines[start], bytearray(scanlines[start + 1:start + 1 + stride])
+        for i in range(stride):
+            row[i] = (row[i] + _predictors(filter_type, row, previous, i, 3)) & 0xFF
+        pixels += row
+        previous = bytes(row)
+    return width, height, bytes(pixels)
+
+
+def _pixels(width: int, height: int, seed: int) -> bytes:
+    return random.Random(seed).randbytes(width * height * 3)
+
+
+def test_stitched_tiles_match_the_concatenated_pixels(tmp_path):
+    width = 7
+    # every filter type starts a tile, the first row of a tile must not refer to the tile above
+    tiles = [(_pixels(width, 5, first_filter), [first_filter, 4, 3, 2, 1]) for first_filter in range(5)]
+    stitcher = _PngStitcher(tmp_path / 'page.png', compress_level=6)
+    for pixels, filters in tiles:
+        stitcher.add(base64.b64encode(_encode_png(width, pixels, filters)).decode())
+    size = stitcher.close()
+
+    data = (tmp_path / 'page.png').read_bytes()
+    assert size == len(data)
+    assert _decode_png(data) == (width, 25, b''.join(pixels for pixels, _ in tiles))
+
+
+def test_stitching_rejects_mismatched_tiles(tmp_path):
+    stitcher = _PngStitcher(tmp_path / 'page.png', compress_level=6)
+    stitcher.add(base64.b64encode(_encode_png(4, _pixels(4, 2, 0), [0, 0])).decode())
+    with pytest.raises(InvalidResponse, match='does not match'):
+        stitcher.add(base64.b64encode(_encode_png(5, _pixels(5, 2, 0), [0, 0])).decode())
+    with pytest.raises(InvalidResponse, match='truncated'):
+        stitcher.add(base64.b64encode(_encode_png(4, _pixels(4, 2, 0), [0, 0], truncate=3)).decode())
+    stitcher.discard()
+    assert not (tmp_path / 'page.png').exists()
+
+
+def _layout_metrics(width: int, height: int) -> dict:
+    viewport = {'pageX': 0, 'pageY': 0, 'clientWidth': width, 'clientHeight': min(height, 100)}
+    visual_viewport = {**viewport, 'offsetX': 0, 'offsetY': 0, 'scale': 1}
+    content_size = {'x': 0, 'y': 0, 'width': width, 'height': height}
+    return {
+        'layoutViewport': viewport, 'visualViewport': visual_viewport, 'contentSize': content_size,
+        'cssLayoutViewport': viewport, 'cssVisualViewport': visual_viewport, 'cssContentSize': content_size,
+    }
+
+
+def _capture(tmp_path, width: int, height: int, **options):
+    pixels = _pixels(width, height, 1)
+
+    def capture_screenshot(_, params):
+        clip = params['clip']
+        top, rows = int(clip['y']), int(clip['height'])
+        tile = pixels[top * width * 3:(top + rows) * width * 3]
+        return {'data': base64.b64encode(_encode_png(width, tile, [4] * rows)).decode()}
+
+    async def main():
+        async with MockCDPServer() as server:
+            server.on_command('Page.getLayoutMetrics', lambda *_: _layout_metrics(width, height))
+            server.on_command('Page.captureScreenshot', capture_screenshot)
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            try:
+                service = ScreenshotService(**options)
+                return await service.capture(await manager.get_session(target_id), tmp_path / 'shots' / 'page.png')
+            finally:
+                await manager.close()
+
+    return asyncio.run(main()), pixels
+
+
+def test_capture_single_tile_is_written_as_is(tmp_path):
+    screenshot, pixels = _capture(tmp_path, 6, 10, tile_height=10)
+    assert (screenshot.tiles, screenshot.height) == (1, 10)
+    assert screenshot.path.read_bytes() == _encode_png(6, pixels, [4] * 10)
+    assert not (tmp_path / 'shots' / 'page.png.part').exists()
+
+
+def test_capture_stitches_tiles(tmp_path):
+    screenshot, pixels = _capture(tmp_path, 6, 10, tile_height=4)
+    assert screenshot.tiles == 3
+    assert _decode_png(screenshot.path.read_bytes()) == (6, 10, pixels)
+
+
+def test_capture_other_formats_need_a_single_tile(tmp_path):
+    with pytest.raises(ValueError, match='only stitched as PNG'):
+        _capture(tmp_path, 6, 10, tile_height=4, image_format='jpeg')
+
+
+def _gradient(width: int, height: int, falling: bool) -> bytes:
+    row = bytes(value for x in range(width) for value in [(width - x if falling else x) * 255 // width] * 3)
+    return _encode_png(width, row * height, [1] * height)
+
+
+def test_perceptual_hash_pure_python(monkeypatch):
+    monkeypatch.setattr('cdpkit.helpers.screenshots._numpy', lambda: None)
+    # every cell is brighter than its right neighbour on a falling gradient, none on a rising one
+    assert perceptual_hash(_gradient(45, 20, falling=True)) == (1 << 64) - 1
+    assert perceptual_hash(_gradient(45, 20, falling=False)) == 0
+    assert perceptual_hash(_gradient(45, 20, falling=True), hash_size=4) == (1 << 16) - 1
+    with pytest.raises(ValueError, match='smaller than the hash grid'):
+        perceptual_hash(_gradient(8, 8, falling=True))
+
+
+def test_perceptual_hash_numpy_matches_pure_python(monkeypatch):
+    pytest.importorskip('numpy')
+    # sizes that do not divide into the grid, so cells differ in size
+    images = [
+        _encode_png(width, _pixels(width, height, seed), [seed % 5] * height)
+        for seed, (width, height) in enumerate([(9, 8), (37, 23), (64, 48), (101, 9)])
+    ]
+    vectorized = [perceptual_hash(image) for image in images]
+    monkeypatch.setattr('cdpkit.helpers.screenshots._numpy', lambda: None)
+    assert vectorized == [perceptual_hash(image) for image in images]
+
+
+def test_change_detector_accounting(tmp_path):
+    thumbnails = [_gradient(18, 8, falling=True)]
+
+    def capture_screenshot(_, params):
+        data = thumbnails[-1] if params.get('optimizeForSpeed') else _gradient(6, 10, falling=True)
+        return {'data': base64.b64encode(data).decode()}
+
+    async def main():
+        async with MockCDPServer() as server:
+            server.on_command('Page.getLayoutMetrics', lambda *_: _layout_metrics(6, 10))
+            server.on_command('Page.captureScreenshot', capture_screenshot)
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            detector = ChangeDetector(session=await manager.get_session(target_id), sources=['paint'])
+            await detector.start()
+
+            async def paint():
+                await server.emit(target_id, 'LayerTree.layerPainted', {
+                    'layerId': '1', 'clip': {'x': 0, 'y': 0, 'width': 1, 'height': 1}
+                })
+                await asyncio.sleep(0.05)
+
+            results = [await detector.capture(tmp_path / 'first.png')]
+            results.append(await detector.capture(tmp_path / 'unchanged.png'))
+            await paint()
+            results.append(await detector.capture(tmp_path / 'similar.png'))
+            thumbnails.append(_gradient(18, 8, falling=False))
+            await paint()
+            results.append(await detector.capture(tmp_path / 'changed.png'))
+            results.append(await detector.capture(tmp_path / 'forced.png', force=True))
+            await detector.stop()
+            await manager.close()
+            return results, detector.stats
+
+    results, stats = asyncio.run(main())
+    assert [result is not None for result in results] == [True, False, False, True, True]
+    assert stats == {'checks': 5, 'unchanged': 1, 'similar': 1, 'captured': 3}
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['changed.png', 'first.png', 'forced.png']
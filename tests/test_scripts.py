@@ -0,0 +1,70 @@
+import asyncio
+import itertools
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.helpers.scripts import InitScript, InitScriptRegistry
+from cdpkit.testing import MockCDPServer
+
+
+def _record_scripts(server: MockCDPServer, fail_removals: int = 0) -> list[tuple[str, str]]:
+    calls, identifiers, failures = [], itertools.count(), itertools.count()
+
+    def add(target_id, _):
+        identifier = str(next(identifiers))
+        calls.append(('add', identifier))
+        return {'identifier': identifier}
+
+    def remove(target_id, params):
+        if next(failures) < fail_removals:
+            raise RuntimeError('removal failed')
+        calls.append(('remove', params['identifier']))
+
+    server.on_command('Page.addScriptToEvaluateOnNewDocument', add)
+    server.on_command('Page.removeScriptToEvaluateOnNewDocument', remove)
+    server.on_command('Runtime.runIfWaitingForDebugger', lambda *_: calls.append(('run', '')))
+    return calls
+
+
+def test_recreated_session_gets_the_scripts_again():
+    async def main():
+        async with MockCDPServer() as server:
+            calls = _record_scripts(server)
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            registry = InitScriptRegistry(session_manager=manager, target_types=None)
+            await manager.get_session(target_id)
+            await registry.add(InitScript(name='a', source='1'))
+
+            await manager.remove_session(target_id)
+            await manager.get_session(target_id)
+            identifiers = registry.identifiers(target_id)
+            await manager.close()
+            return calls, identifiers
+
+    calls, identifiers = asyncio.run(main())
+    assert calls == [('add', '0'), ('run', ''), ('add', '1'), ('run', '')]
+    assert identifiers == {'bundle:': '1'}
+
+
+def test_failed_removal_keeps_the_old_identifier():
+    async def main():
+        async with MockCDPServer() as server:
+            calls = _record_scripts(server, fail_removals=1)
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            registry = InitScriptRegistry(session_manager=manager, target_types=None)
+            await manager.get_session(target_id)
+            await registry.add(InitScript(name='a', source='1'))
+
+            report = await registry.add(InitScript(name='a', source='2'))
+            after_failure = registry.identifiers(target_id)
+            await registry.add(InitScript(name='b', source='3', bundle=False))
+            identifiers = registry.identifiers(target_id)
+            await manager.close()
+            return calls, report, after_failure, identifiers
+
+    calls, report, after_failure, identifiers = asyncio.run(main())
+    assert isinstance(report[next(iter(report))], Exception)
+    assert after_failure == {'bundle:': '1', 'stale:0': '0'}
+    assert ('remove', '0') in calls
+    assert identifiers == {'bundle:': '1', 'script:b': '2'}
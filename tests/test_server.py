@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+from websockets.asyncio.client import connect
+
+from cdpkit.testing import CDPRecorder, MockCDPServer
+
+
+def _record(path, *methods: str) -> None:
+    with CDPRecorder(path=path) as recorder:
+        for method in methods:
+            recorder.record('T1', False, json.dumps({'method': method, 'params': {}}))
+
+
+async def _received(connection) -> list[str]:
+    methods = []
+    try:
+        while True:
+            methods.append(json.loads(await asyncio.wait_for(connection.recv(), 0.2))['method'])
+    except TimeoutError:
+        return methods
+
+
+def test_recorded_events_are_replayed_once(tmp_path):
+    async def main():
+        async with MockCDPServer() as server:
+            _record(tmp_path / 'first.cdpr', 'Page.loadEventFired', 'Page.frameNavigated')
+            server.load_recording(tmp_path / 'first.cdpr')
+            url = f'ws://{server.ws_endpoint}/devtools/page/T1'
+            async with connect(url) as first:
+                received = [await _received(first)]
+                async with connect(url) as second:
+                    received += await asyncio.gather(_received(first), _received(second))
+
+                    # a later recording is replayed on the next connection, to every client
+                    _record(tmp_path / 'second.cdpr', 'Page.domContentEventFired')
+                    server.load_recording(tmp_path / 'second.cdpr')
+                    async with connect(url) as third:
+                        received += await asyncio.gather(_received(first), _received(second), _received(third))
+                        async with connect(url) as fourth:
+                            received.append(await _received(fourth))
+            return received
+
+    received = asyncio.run(main())
+    assert received == [
+        ['Page.loadEventFired', 'Page.frameNavigated'], [], [],
+        ['Page.domContentEventFired'], ['Page.domContentEventFired'], ['Page.domContentEventFired'], []
+    ]
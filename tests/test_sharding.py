@@ -0,0 +1,48 @@
+import asyncio
+
+from cdpkit.connection import CDPSession, CDPShardCoordinator
+from cdpkit.exception import ShardJobError
+from cdpkit.testing import MockCDPServer
+
+
+def _refuse_loading():
+    raise ValueError('cannot be loaded here')
+
+
+class _Unloadable:
+    def __reduce__(self):
+        return _refuse_loading, ()
+
+
+async def target_of(cdp_session: CDPSession) -> str:
+    return cdp_session.target_id
+
+
+async def unloadable_result(cdp_session: CDPSession) -> _Unloadable:
+    return _Unloadable()
+
+
+def test_jobs_resolve_when_pickling_fails():
+    async def main():
+        async with MockCDPServer() as server:
+            target_id = server.add_target()
+            coordinator = CDPShardCoordinator(ws_endpoint=server.ws_endpoint, workers=1)
+            await coordinator.start()
+            try:
+                async def local_job(cdp_session):
+                    return 1
+
+                return await asyncio.wait_for(coordinator.gather([
+                    (target_id, target_of),
+                    (target_id, local_job),
+                    (target_id, lambda cdp_session: None),
+                    (target_id, unloadable_result),
+                ], return_exceptions=True), 30)
+            finally:
+                await coordinator.close()
+
+    own_target, local_job, lambda_job, unloadable = asyncio.run(main())
+    assert own_target.startswith('MOCK')
+    for error in (local_job, lambda_job):
+        assert isinstance(error, ShardJobError) and 'Cannot pickle job' in str(error)
+    assert isinstance(unloadable, ShardJobError) and 'Cannot unpickle the result' in str(unloadable)
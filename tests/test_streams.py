@@ -0,0 +1,38 @@
+import asyncio
+import base64
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.helpers.streams import StreamReassembler
+from cdpkit.testing import MockCDPServer
+
+
+def _response(request_id: str) -> dict:
+    return {
+        'requestId': request_id, 'loaderId': 'L', 'timestamp': 1, 'type': 'EventSource',
+        'response': {
+            'url': f'http://x/{request_id}', 'status': 200, 'statusText': '', 'mimeType': 'text/event-stream',
+            'headers': {}, 'connectionReused': False, 'connectionId': 0, 'encodedDataLength': 0,
+            'securityState': 'secure'
+        }
+    }
+
+
+def test_stop_with_unread_streams():
+    async def main():
+        async with MockCDPServer() as server:
+            server.on_command('Network.streamResourceContent', lambda *_: {
+                'bufferedData': base64.b64encode(b'data: 1\n\n').decode()
+            })
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            reassembler = StreamReassembler(session=await manager.get_session(target_id), max_streams=1)
+            await reassembler.start()
+            await server.emit(target_id, 'Network.responseReceived', _response('1'))
+            await asyncio.sleep(0.05)
+
+            await asyncio.wait_for(reassembler.stop(), 5)
+            streams = [stream async for stream in reassembler.streams()]
+            await manager.close()
+            return streams
+
+    assert asyncio.run(main()) == []
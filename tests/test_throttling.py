@@ -0,0 +1,33 @@
+import asyncio
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.helpers.throttling import ThrottlingController
+from cdpkit.testing import MockCDPServer
+
+
+def test_workers_only_get_network_conditions():
+    async def main():
+        async with MockCDPServer() as server:
+            cpu_throttled = []
+
+            def set_cpu_throttling_rate(target_id, params):
+                if server.targets[target_id].type != 'page':
+                    raise RuntimeError("'Emulation.setCPUThrottlingRate' wasn't found")
+                cpu_throttled.append(target_id)
+
+            server.on_command('Emulation.setCPUThrottlingRate', set_cpu_throttling_rate)
+            page_id = server.add_target()
+            worker_id = server.add_target(type_='service_worker')
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            controller = ThrottlingController(session_manager=manager)
+            report = await controller.apply('lighthouse-mobile')
+
+            new_worker_id = server.add_target(type_='worker')
+            await manager.get_session(new_worker_id)
+            await manager.close()
+            return report, cpu_throttled, page_id, worker_id, new_worker_id
+
+    report, cpu_throttled, page_id, worker_id, new_worker_id = asyncio.run(main())
+    assert report.failed == {}
+    assert sorted(report.confirmed) == sorted([page_id, worker_id, new_worker_id])
+    assert cpu_throttled == [page_id]
@@ -0,0 +1,45 @@
+import asyncio
+
+from cdpkit.connection import CDPSessionManager
+from cdpkit.helpers import WebSocketCapture, WebSocketLog
+from cdpkit.testing import MockCDPServer
+
+
+def test_capture_forgets_closed_connections(tmp_path):
+    async def main():
+        async with MockCDPServer() as server:
+            target_id = server.add_target()
+            manager = CDPSessionManager(ws_endpoint=server.ws_endpoint)
+            try:
+                capture = WebSocketCapture(
+                    session=await manager.get_session(target_id), path=tmp_path / 'frames.cdpw',
+                    urls=['wss://kept.test/*']
+                )
+                await capture.start()
+                for index, url in enumerate(('wss://kept.test/a', 'wss://dropped.test/b', 'wss://kept.test/c')):
+                    request_id = f'ws{index}'
+                    await server.emit(target_id, 'Network.webSocketCreated', {'requestId': request_id, 'url': url})
+                    await server.emit(target_id, 'Network.webSocketFrameReceived', {
+                        'requestId': request_id, 'timestamp': float(index),
+                        'response': {'opcode': 1, 'mask': False, 'payloadData': f'frame {index}'}
+                    })
+                    if index < 2:
+                        await server.emit(
+                            target_id, 'Network.webSocketClosed', {'requestId': request_id, 'timestamp': index + 0.5}
+                        )
+                await asyncio.sleep(0.05)
+                connections = dict(capture._connections)
+                await capture.stop()
+                return connections, capture.stats
+            finally:
+                await manager.close()
+
+    connections, stats = asyncio.run(main())
+    assert connections == {'ws2': 1}
+    assert stats == {'captured': 2, 'filtered': 1, 'connections': 2}
+
+    log = WebSocketLog(tmp_path / 'frames.cdpw')
+    assert log.connections == [('ws0', 'wss://kept.test/a'), ('ws2', 'wss://kept.test/c')]
+    assert [(frame.url, frame.payload) for frame in log.frames()] == [
+        ('wss://kept.test/a', 'frame 0'), ('wss://kept.test/c', 'frame 2')
+    ]